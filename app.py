@@ -1,11 +1,16 @@
 import streamlit as st
+import io
 import os
 import uuid
-import requests
-from gtts import gTTS
 import tempfile
 import json
-from io import BytesIO
+import time
+from history_store import AudioHistoryStore
+from job_queue import JobQueue, QueueFullError
+from metrics import span, start_metrics_server
+from model_router import AUTO_MODEL
+from tts_generator import AUDIO_MIME_TYPES, create_tts_generator
+from zip_export import iter_zip
 
 # 페이지 설정
 st.set_page_config(
@@ -19,769 +24,95 @@ st.set_page_config(
 ELEVENLABS_API_KEY = st.secrets.get("ELEVENLABS_API_KEY", os.getenv('ELEVENLABS_API_KEY'))
 OPENAI_API_KEY = st.secrets.get("OPENAI_API_KEY", os.getenv('OPENAI_API_KEY'))
 
-class TTSGenerator:
-    def __init__(self):
-        self.elevenlabs_headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ELEVENLABS_API_KEY
-        }
+def get_config(name, default=None):
+    """secrets → 환경변수 → 기본값 순으로 설정값 조회"""
+    return st.secrets.get(name, os.getenv(name, default))
 
-        self.openai_headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
+# 정적 CSS/HTML 위치
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 
-        # 일레븐랩스 음성 목록
-        self.elevenlabs_voices = [
-            {"id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel", "gender": "female", "accent": "American"},
-            {"id": "AZnzlk1XvdvUeBnXmlld", "name": "Domi", "gender": "female", "accent": "American"},
-            {"id": "EXAVITQu4vr4xnSDxMaL", "name": "Bella", "gender": "female", "accent": "American"},
-            {"id": "ErXwobaYiN019PkySvjV", "name": "Antoni", "gender": "male", "accent": "American"},
-            {"id": "MF3mGyEYCl7XYWbV9V6O", "name": "Elli", "gender": "female", "accent": "American"},
-            {"id": "TxGEqnHWrfWFTfGW9XjX", "name": "Josh", "gender": "male", "accent": "American"},
-            {"id": "VR6AewLTigWG4xSOukaG", "name": "Arnold", "gender": "male", "accent": "American"},
-            {"id": "pNInz6obpgDQGcFmaJgB", "name": "Adam", "gender": "male", "accent": "American"},
-            {"id": "yoZ06aMxZJJ28mfd3POQ", "name": "Sam", "gender": "male", "accent": "American"}
-        ]
-
-        # OpenAI TTS 음성 목록
-        self.openai_voices = [
-            {"id": "alloy", "name": "Alloy", "description": "균형 잡힌 중성적 음성"},
-            {"id": "echo", "name": "Echo", "description": "남성적이고 깊은 음성"},
-            {"id": "fable", "name": "Fable", "description": "따뜻하고 친근한 음성"},
-            {"id": "onyx", "name": "Onyx", "description": "강렬하고 카리스마 있는 음성"},
-            {"id": "nova", "name": "Nova", "description": "활기차고 현대적인 음성"},
-            {"id": "shimmer", "name": "Shimmer", "description": "부드럽고 우아한 음성"}
-        ]
-
-        # OpenAI TTS 모델 목록
-        self.openai_models = [
-            {"id": "tts-1", "name": "TTS-1 (빠름)", "description": "빠른 처리, 기본 품질"},
-            {"id": "tts-1-hd", "name": "TTS-1-HD (고품질)", "description": "높은 품질, 약간 느림"}
-        ]
-
-        # OpenAI TTS 오디오 포맷
-        self.openai_formats = [
-            {"id": "mp3", "name": "MP3", "description": "호환성 최고"},
-            {"id": "opus", "name": "OPUS", "description": "인터넷 스트리밍 최적화"},
-            {"id": "aac", "name": "AAC", "description": "Apple 기기 최적화"},
-            {"id": "flac", "name": "FLAC", "description": "무손실 압축"}
-        ]
-
-        # 일레븐랩스 모델 목록
-        self.elevenlabs_models = [
-            {"id": "eleven_monolingual_v1", "name": "English v1"},
-            {"id": "eleven_multilingual_v1", "name": "Multilingual v1"},
-            {"id": "eleven_multilingual_v2", "name": "Multilingual v2"},
-            {"id": "eleven_turbo_v2", "name": "Turbo v2 (Fast)"}
-        ]
-
-        # 구글 TTS 언어 목록
-        self.google_languages = [
-            {"code": "ko", "name": "🇰🇷 한국어"},
-            {"code": "en", "name": "🇺🇸 English"},
-            {"code": "ja", "name": "🇯🇵 日本語"},
-            {"code": "zh", "name": "🇨🇳 中文"},
-            {"code": "es", "name": "🇪🇸 Español"},
-            {"code": "fr", "name": "🇫🇷 Français"},
-            {"code": "de", "name": "🇩🇪 Deutsch"},
-            {"code": "it", "name": "🇮🇹 Italiano"},
-            {"code": "pt", "name": "🇵🇹 Português"},
-            {"code": "ru", "name": "🇷🇺 Русский"}
-        ]
-
-    def generate_google_tts(self, text, settings):
-        """구글 TTS로 음성 생성"""
-        try:
-            lang = settings.get('language', 'ko')
-            slow = settings.get('slow', False)
-
-            tts = gTTS(text=text, lang=lang, slow=slow)
-            audio_buffer = BytesIO()
-            tts.write_to_fp(audio_buffer)
-            audio_buffer.seek(0)
-
-            return {
-                "success": True,
-                "audio_data": audio_buffer.read(),
-                "service": f"Google TTS ({lang.upper()})",
-                "settings": settings,
-                "filename": f"google_tts_{lang}.mp3"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "service": "Google TTS"
-            }
-
-    def generate_elevenlabs_tts(self, text, settings):
-        """일레븐랩스 TTS로 음성 생성"""
-        try:
-            if not ELEVENLABS_API_KEY:
-                return {
-                    "success": False,
-                    "error": "ElevenLabs API 키가 설정되지 않았습니다",
-                    "service": "ElevenLabs"
-                }
-
-            voice_id = settings.get('voice_id', self.elevenlabs_voices[0]["id"])
-            model_id = settings.get('model_id', 'eleven_multilingual_v2')
-            stability = float(settings.get('stability', 0.5))
-            similarity_boost = float(settings.get('similarity_boost', 0.5))
-            style = float(settings.get('style', 0.0))
-            use_speaker_boost = settings.get('use_speaker_boost', True)
-
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-
-            data = {
-                "text": text,
-                "model_id": model_id,
-                "voice_settings": {
-                    "stability": stability,
-                    "similarity_boost": similarity_boost,
-                    "style": style,
-                    "use_speaker_boost": use_speaker_boost
-                }
-            }
-
-            response = requests.post(url, json=data, headers=self.elevenlabs_headers)
-
-            if response.status_code == 200:
-                voice_name = next((v["name"] for v in self.elevenlabs_voices if v["id"] == voice_id), "Unknown")
-                model_name = next((m["name"] for m in self.elevenlabs_models if m["id"] == model_id), "Unknown")
-
-                return {
-                    "success": True,
-                    "audio_data": response.content,
-                    "service": f"ElevenLabs ({voice_name} - {model_name})",
-                    "settings": settings,
-                    "filename": f"elevenlabs_{voice_name.lower()}.mp3"
-                }
-            else:
-                error_msg = f"API Error: {response.status_code}"
-                if response.status_code == 401:
-                    error_msg += " - API 키를 확인해주세요"
-                elif response.status_code == 429:
-                    error_msg += " - 사용량 한도를 초과했습니다"
-                elif response.status_code == 422:
-                    error_msg += " - 텍스트가 너무 길거나 잘못된 설정입니다"
-
-                return {
-                    "success": False,
-                    "error": error_msg,
-                    "service": "ElevenLabs"
-                }
-
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "service": "ElevenLabs"
-            }
-
-    def generate_openai_tts(self, text, settings):
-        """OpenAI TTS로 음성 생성"""
-        try:
-            if not OPENAI_API_KEY:
-                return {
-                    "success": False,
-                    "error": "OpenAI API 키가 설정되지 않았습니다",
-                    "service": "OpenAI TTS"
-                }
-
-            voice = settings.get('voice', 'alloy')
-            model = settings.get('model', 'tts-1')
-            speed = float(settings.get('speed', 1.0))
-            audio_format = settings.get('response_format', 'mp3')
-
-            url = "https://api.openai.com/v1/audio/speech"
-
-            data = {
-                "model": model,
-                "input": text,
-                "voice": voice,
-                "speed": speed,
-                "response_format": audio_format
-            }
-
-            response = requests.post(url, json=data, headers=self.openai_headers)
-
-            if response.status_code == 200:
-                voice_name = next((v["name"] for v in self.openai_voices if v["id"] == voice), voice)
-                model_name = next((m["name"] for m in self.openai_models if m["id"] == model), model)
-
-                return {
-                    "success": True,
-                    "audio_data": response.content,
-                    "service": f"OpenAI TTS ({voice_name} - {model_name})",
-                    "settings": settings,
-                    "filename": f"openai_{voice}_{model}.{audio_format}"
-                }
-            else:
-                error_msg = f"OpenAI API Error: {response.status_code}"
-                try:
-                    error_data = response.json()
-                    if 'error' in error_data:
-                        error_msg += f" - {error_data['error'].get('message', 'Unknown error')}"
-                except:
-                    pass
-
-                return {
-                    "success": False,
-                    "error": error_msg,
-                    "service": "OpenAI TTS"
-                }
-
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"연결 오류: {str(e)}",
-                "service": "OpenAI TTS"
-            }
+# "auto" 모델 선택지 (요청마다 지연 목표를 맞추는 가장 품질 높은 모델을 고름)
+AUTO_MODEL_OPTION = {"🤖 자동 (지연 시간 기준)": AUTO_MODEL}
+
+# 입력 가능한 최대 글자 수
+MAX_TEXT_CHARS = int(get_config("MAX_TEXT_CHARS", 100000))
+
+# ZIP으로 내려받을 수 있는 최대 크기 (Streamlit은 다운로드 데이터를 메모리에 모두 올려 보냄)
+ZIP_MAX_MB = float(get_config("ZIP_MAX_MB", 200))
+
+# ZIP을 만들 때 이 크기까지는 메모리에, 넘으면 임시 파일에 씀
+ZIP_SPOOL_BYTES = 16 * 1024 * 1024
 
 # TTS 생성기 인스턴스 생성
 @st.cache_resource
 def get_tts_generator():
-    return TTSGenerator()
+    return create_tts_generator(get_config)
 
 tts_generator = get_tts_generator()
 
-# 세션 상태 초기화
-if 'generated_audios' not in st.session_state:
-    st.session_state.generated_audios = []
-if 'total_generated' not in st.session_state:
-    st.session_state.total_generated = 0
-
-# 원본 HTML의 neumorphism CSS 완전 적용
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-
-    :root {
-        /* Neumorphism 색상 팔레트 */
-        --primary: #4f46e5;
-        --secondary: #6366f1;
-        --accent: #8b5cf6;
-        --accent-light: #a78bfa;
-        --openai: #10b981;
-        --openai-dark: #059669;
-        --success: #22c55e;
-        --warning: #f59e0b;
-        --error: #ef4444;
-
-        /* Neumorphism 배경 및 표면 */
-        --background: #e0e7ff;
-        --surface: #e0e7ff;
-        --surface-light: #f1f5f9;
-        --surface-dark: #cbd5e1;
-
-        /* 텍스트 색상 */
-        --text: #1e293b;
-        --text-secondary: #475569;
-        --text-muted: #64748b;
-
-        /* Neumorphism 그림자 */
-        --shadow-light: rgba(255, 255, 255, 0.7);
-        --shadow-dark: rgba(148, 163, 184, 0.4);
-        --shadow-inset-light: rgba(255, 255, 255, 0.9);
-        --shadow-inset-dark: rgba(148, 163, 184, 0.3);
-
-        /* 기본 설정 */
-        --border-radius: 20px;
-        --border-radius-large: 30px;
-        --border-radius-small: 12px;
-    }
-
-    /* Streamlit 전체 배경 */
-    .stApp {
-        background: linear-gradient(135deg, #e0e7ff 0%, #f1f5f9 100%);
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* 메인 컨테이너 */
-    .main .block-container {
-        padding-top: 2rem;
-        max-width: 1200px;
-    }
-
-    /* Neumorphism 카드 기본 스타일 */
-    .neumorphism-card {
-        background: var(--surface);
-        border-radius: var(--border-radius);
-        box-shadow:
-                12px 12px 24px var(--shadow-dark),
-                -12px -12px 24px var(--shadow-light);
-        transition: all 0.3s ease;
-        border: 1px solid rgba(255, 255, 255, 0.3);
-        padding: 2rem;
-        margin: 1rem 0;
-    }
-
-    .neumorphism-card:hover {
-        transform: translateY(-2px);
-        box-shadow:
-                16px 16px 32px var(--shadow-dark),
-                -16px -16px 32px var(--shadow-light);
-    }
-
-    /* 헤더 스타일 */
-    .main-header {
-        background: var(--surface);
-        border-radius: var(--border-radius-large);
-        padding: 40px;
-        text-align: center;
-        margin-bottom: 30px;
-        box-shadow:
-                20px 20px 40px var(--shadow-dark),
-                -20px -20px 40px var(--shadow-light);
-    }
-
-    .main-header h1 {
-        font-size: 3.5em;
-        font-weight: 700;
-        color: var(--text);
-        margin-bottom: 15px;
-        letter-spacing: -0.02em;
-        text-shadow: 2px 2px 4px rgba(148, 163, 184, 0.3);
-    }
-
-    .main-header p {
-        font-size: 1.4em;
-        font-weight: 400;
-        color: var(--text-secondary);
-        margin: 0;
-    }
-
-    .white-bg-black-text {
-        background: linear-gradient(145deg, #ffffff, #f8fafc);
-        color: var(--text);
-        padding: 4px 8px;
-        border-radius: 12px;
-        font-weight: 900;
-        box-shadow:
-                2px 2px 4px var(--shadow-dark),
-                -2px -2px 4px var(--shadow-light);
-    }
-
-    /* 통계 카드 */
-    .stat-card {
-        background: var(--surface);
-        padding: 20px 25px;
-        border-radius: var(--border-radius);
-        text-align: center;
-        min-width: 120px;
-        box-shadow:
-                8px 8px 16px var(--shadow-dark),
-                -8px -8px 16px var(--shadow-light);
-        transition: all 0.3s ease;
-        margin: 0.5rem;
-    }
-
-    .stat-card:hover {
-        transform: translateY(-1px);
-        box-shadow:
-                10px 10px 20px var(--shadow-dark),
-                -10px -10px 20px var(--shadow-light);
-    }
-
-    .stat-number {
-        font-size: 2.2em;
-        font-weight: 700;
-        color: var(--accent);
-        display: block;
-        text-shadow: 1px 1px 2px rgba(139, 92, 246, 0.3);
-    }
-
-    .stat-label {
-        font-size: 1em;
-        color: var(--text-muted);
-        margin-top: 5px;
-    }
-
-    /* 서비스 카드 */
-    .service-card {
-        background: var(--surface);
-        border-radius: var(--border-radius);
-        padding: 25px;
-        margin: 1rem 0;
-        box-shadow:
-                12px 12px 24px var(--shadow-dark),
-                -12px -12px 24px var(--shadow-light);
-        transition: all 0.3s ease;
-    }
-
-    .service-card:hover {
-        transform: translateY(-1px);
-        box-shadow:
-                16px 16px 32px var(--shadow-dark),
-                -16px -16px 32px var(--shadow-light);
-    }
-
-    .service-card h3 {
-        color: var(--text);
-        margin: 0;
-        text-shadow: 1px 1px 2px rgba(148, 163, 184, 0.3);
-    }
-
-    .openai-card {
-        background: linear-gradient(145deg, #d1fae5, #ecfdf5);
-        border: 1px solid rgba(16, 185, 129, 0.2);
-    }
-
-    .openai-card h3 {
-        color: var(--openai-dark);
-    }
-
-    /* 결과 카드 */
-    .result-card {
-        background: var(--surface);
-        border-radius: var(--border-radius);
-        padding: 25px;
-        margin: 20px 0;
-        transition: all 0.3s ease;
-        box-shadow:
-                8px 8px 16px var(--shadow-dark),
-                -8px -8px 16px var(--shadow-light);
-    }
-
-    .result-card:hover {
-        transform: translateY(-1px);
-        box-shadow:
-                12px 12px 24px var(--shadow-dark),
-                -12px -12px 24px var(--shadow-light);
-    }
-
-    .result-card h4 {
-        color: var(--text);
-        margin-bottom: 15px;
-        text-shadow: 1px 1px 2px rgba(148, 163, 184, 0.2);
-    }
-
-    .error-card {
-        background: linear-gradient(145deg, #fecaca, #fee2e2);
-        border: 1px solid rgba(239, 68, 68, 0.3);
-    }
-
-    .error-card h4, .error-card p {
-        color: var(--error);
-    }
-
-    /* Streamlit 컴포넌트 커스터마이징 */
-    .stTextArea > div > div > textarea {
-        background: var(--surface);
-        border: none;
-        border-radius: var(--border-radius);
-        color: var(--text);
-        font-size: 17px;
-        font-family: 'Inter', sans-serif;
-        box-shadow:
-                inset 8px 8px 16px var(--shadow-inset-dark),
-                inset -8px -8px 16px var(--shadow-inset-light);
-        transition: all 0.3s ease;
-    }
-
-    .stTextArea > div > div > textarea:focus {
-        box-shadow:
-                inset 10px 10px 20px var(--shadow-inset-dark),
-                inset -10px -10px 20px var(--shadow-inset-light),
-                0 0 0 3px rgba(79, 70, 229, 0.1);
-    }
-
-    /* 선택박스 스타일링 */
-    .stSelectbox > div > div {
-        background: var(--surface);
-        border: none;
-        border-radius: var(--border-radius-small);
-        box-shadow:
-                inset 6px 6px 12px var(--shadow-inset-dark),
-                inset -6px -6px 12px var(--shadow-inset-light);
-    }
-
-    /* 체크박스 스타일링 */
-    .stCheckbox > label {
-        background: var(--surface);
-        border-radius: var(--border-radius-small);
-        padding: 10px;
-        box-shadow:
-                6px 6px 12px var(--shadow-dark),
-                -6px -6px 12px var(--shadow-light);
-        transition: all 0.3s ease;
-    }
-
-    .stCheckbox > label:hover {
-        transform: translateY(-1px);
-        box-shadow:
-                8px 8px 16px var(--shadow-dark),
-                -8px -8px 16px var(--shadow-light);
-    }
-
-    /* 슬라이더 스타일링 */
-    .stSlider > div > div > div {
-        background: var(--surface);
-        box-shadow:
-                inset 3px 3px 6px var(--shadow-inset-dark),
-                inset -3px -3px 6px var(--shadow-inset-light);
-    }
-
-    /* 버튼 스타일링 */
-    .stButton > button {
-        background: linear-gradient(145deg, #4f46e5, #6366f1);
-        border: none;
-        border-radius: var(--border-radius);
-        color: white;
-        font-weight: 600;
-        padding: 18px;
-        font-size: 1.3em;
-        box-shadow:
-                12px 12px 24px var(--shadow-dark),
-                -12px -12px 24px var(--shadow-light);
-        transition: all 0.3s ease;
-        text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.3);
-    }
-
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow:
-                16px 16px 32px var(--shadow-dark),
-                -16px -16px 32px var(--shadow-light);
-    }
-
-    .stButton > button:active {
-        transform: translateY(0px);
-        box-shadow:
-                inset 6px 6px 12px rgba(79, 70, 229, 0.3),
-                inset -6px -6px 12px rgba(255, 255, 255, 0.1);
-    }
-
-    /* 다운로드 버튼 */
-    .stDownloadButton > button {
-        background: linear-gradient(145deg, #22c55e, #16a34a);
-        border: none;
-        border-radius: var(--border-radius-small);
-        color: white;
-        font-weight: 500;
-        padding: 14px 22px;
-        box-shadow:
-                6px 6px 12px var(--shadow-dark),
-                -6px -6px 12px var(--shadow-light);
-        transition: all 0.3s ease;
-        text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);
-    }
-
-    .stDownloadButton > button:hover {
-        transform: translateY(-1px);
-        box-shadow:
-                8px 8px 16px var(--shadow-dark),
-                -8px -8px 16px var(--shadow-light);
-    }
-
-    /* 사이드바 스타일링 */
-    .css-1d391kg {
-        background: var(--surface);
-        box-shadow:
-                12px 12px 24px var(--shadow-dark),
-                -12px -12px 24px var(--shadow-light);
-        border-radius: var(--border-radius);
-    }
-
-    /* 오디오 플레이어 */
-    audio {
-        width: 100%;
-        border-radius: var(--border-radius);
-        box-shadow:
-                4px 4px 8px var(--shadow-dark),
-                -4px -4px 8px var(--shadow-light);
-        margin: 15px 0;
-    }
-
-    /* 성공/에러 메시지 */
-    .stSuccess {
-        background: linear-gradient(145deg, #dcfce7, #f0fdf4);
-        border: 1px solid var(--success);
-        border-radius: var(--border-radius);
-        box-shadow:
-                6px 6px 12px var(--shadow-dark),
-                -6px -6px 12px var(--shadow-light);
-    }
-
-    .stError {
-        background: linear-gradient(145deg, #fecaca, #fee2e2);
-        border: 1px solid var(--error);
-        border-radius: var(--border-radius);
-        box-shadow:
-                6px 6px 12px var(--shadow-dark),
-                -6px -6px 12px var(--shadow-light);
-    }
-
-    .stWarning {
-        background: linear-gradient(145deg, #fef3c7, #fffbeb);
-        border: 1px solid var(--warning);
-        border-radius: var(--border-radius);
-        box-shadow:
-                6px 6px 12px var(--shadow-dark),
-                -6px -6px 12px var(--shadow-light);
-    }
-
-    .stInfo {
-        background: linear-gradient(145deg, #dbeafe, #eff6ff);
-        border: 1px solid var(--primary);
-        border-radius: var(--border-radius);
-        box-shadow:
-                6px 6px 12px var(--shadow-dark),
-                -6px -6px 12px var(--shadow-light);
-    }
-
-    /* Expander 스타일링 */
-    .streamlit-expanderHeader {
-        background: var(--surface);
-        border-radius: var(--border-radius);
-        box-shadow:
-                8px 8px 16px var(--shadow-dark),
-                -8px -8px 16px var(--shadow-light);
-        transition: all 0.3s ease;
-    }
-
-    .streamlit-expanderHeader:hover {
-        transform: translateY(-1px);
-        box-shadow:
-                12px 12px 24px var(--shadow-dark),
-                -12px -12px 24px var(--shadow-light);
-    }
-
-    /* 스피너 */
-    .stSpinner > div {
-        border-color: var(--accent);
-    }
-
-    /* 서비스 태그 */
-    .service-tag {
-        background: linear-gradient(145deg, #8b5cf6, #a78bfa);
-        color: white;
-        padding: 10px 18px;
-        border-radius: 20px;
-        font-size: 1em;
-        font-weight: 600;
-        display: inline-flex;
-        align-items: center;
-        gap: 8px;
-        margin-bottom: 15px;
-        box-shadow:
-                4px 4px 8px rgba(139, 92, 246, 0.3),
-                -2px -2px 4px rgba(255, 255, 255, 0.1);
-        text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);
-    }
-
-    .service-tag.openai-tag {
-        background: linear-gradient(145deg, #10b981, #34d399);
-        box-shadow:
-                4px 4px 8px rgba(16, 185, 129, 0.3),
-                -2px -2px 4px rgba(255, 255, 255, 0.1);
-    }
-
-    /* 서비스 그룹 카운트 */
-    .service-group-count {
-        background: linear-gradient(145deg, #8b5cf6, #a78bfa);
-        color: white;
-        padding: 4px 12px;
-        border-radius: 15px;
-        font-size: 0.85em;
-        font-weight: 500;
-        margin-left: auto;
-        box-shadow:
-                3px 3px 6px rgba(139, 92, 246, 0.3),
-                -1px -1px 2px rgba(255, 255, 255, 0.1);
-        text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);
-    }
-
-    .service-group-count.openai-count {
-        background: linear-gradient(145deg, #10b981, #34d399);
-        box-shadow:
-                3px 3px 6px rgba(16, 185, 129, 0.3),
-                -1px -1px 2px rgba(255, 255, 255, 0.1);
-    }
+# 생성 히스토리 저장소 (음성은 디스크에, 세션에는 핸들만 보관)
+@st.cache_resource
+def get_history_store():
+    return AudioHistoryStore(
+        get_config("HISTORY_DIR", os.path.join("output", "history")),
+        session_budget=int(float(get_config("HISTORY_SESSION_MB", 50)) * 1024 * 1024),
+        global_budget=int(float(get_config("HISTORY_GLOBAL_MB", 1024)) * 1024 * 1024),
+        stale_after=float(get_config("HISTORY_STALE_HOURS", 24)) * 3600
+    )
 
-    /* 서비스 아이콘 */
-    .service-icon {
-        font-size: 1.4em;
-        color: var(--accent-light);
-        text-shadow: 1px 1px 2px rgba(167, 139, 250, 0.3);
-    }
+history_store = get_history_store()
 
-    .openai-icon {
-        color: var(--openai) !important;
-        text-shadow: 1px 1px 2px rgba(16, 185, 129, 0.3);
-    }
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
+# 백그라운드 생성 작업 대기열 (모든 세션이 공유, 다시 실행/새로고침해도 작업은 계속 진행)
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(
+        workers=int(get_config("JOB_WORKERS", 4)),
+        max_depth=int(get_config("JOB_QUEUE_DEPTH", 100)),
+        max_per_session=int(get_config("JOB_MAX_PER_SESSION", 3))
+    )
 
-    .fade-in {
-        animation: fadeIn 0.5s ease-out;
-    }
+job_queue = get_job_queue()
+JOB_POLL_INTERVAL = float(get_config("JOB_POLL_INTERVAL", 1.0))
 
-    @keyframes softPulse {
-        0%, 100% {
-            box-shadow:
-                    12px 12px 24px var(--shadow-dark),
-                    -12px -12px 24px var(--shadow-light);
-        }
-        50% {
-            box-shadow:
-                    16px 16px 32px var(--shadow-dark),
-                    -16px -16px 32px var(--shadow-light);
+# Prometheus 지표 노출 (TTS_METRICS_PORT를 지정했을 때만, 프로세스당 한 번)
+@st.cache_resource
+def get_metrics_server(port):
+    return start_metrics_server(port)
+
+if get_config("TTS_METRICS_PORT"):
+    get_metrics_server(int(get_config("TTS_METRICS_PORT")))
+
+# 세션 상태 초기화 (주소의 ?job=으로 새로고침/재접속 전 세션의 작업과 히스토리를 이어받음)
+if 'session_id' not in st.session_state:
+    restored_job = job_queue.get(st.query_params["job"]) if "job" in st.query_params else None
+    if restored_job is not None:
+        st.session_state.session_id = restored_job["session_id"]
+        st.session_state.generated_audios = history_store.list(restored_job["session_id"])
+        st.session_state.total_generated = len(st.session_state.generated_audios)
+        # 이미 끝난 작업의 결과는 히스토리에 들어 있으므로 다시 세지 않음
+        st.session_state.counted_jobs = {
+            job_id for job_id in job_queue.session_jobs(restored_job["session_id"])
+            if job_queue.get(job_id)["finished"] is not None
         }
-    }
+    else:
+        st.session_state.session_id = uuid.uuid4().hex
+if 'generated_audios' not in st.session_state:
+    st.session_state.generated_audios = []
+if 'total_generated' not in st.session_state:
+    st.session_state.total_generated = 0
+if 'counted_jobs' not in st.session_state:
+    st.session_state.counted_jobs = set()
 
-    .stButton > button:not(:disabled):not(:active) {
-        animation: softPulse 3s ease-in-out infinite;
-    }
+# 원본 HTML의 neumorphism CSS 완전 적용 (static/에서 한 번만 읽어 캐시, fragment만 다시 실행될 때는 다시 보내지 않음)
+@st.cache_data
+def load_static(name):
+    with open(os.path.join(STATIC_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
 
-    /* 반응형 디자인 */
-    @media (max-width: 768px) {
-        .main-header h1 {
-            font-size: 2.8em;
-        }
-        
-        .main-header p {
-            font-size: 1.2em;
-        }
-        
-        .stat-card {
-            margin: 0.2rem;
-            min-width: 100px;
-        }
-        
-        .stat-number {
-            font-size: 1.8em;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>\n{load_static('style.css')}</style>", unsafe_allow_html=True)
 
 # 메인 헤더 (원본 HTML 스타일 완전 재현)
-st.markdown("""
-<div class="main-header neumorphism-card">
-    <h1><i class="fas fa-microphone-alt"></i> <span class="white-bg-black-text">SWING</span> AI Voice Studio</h1>
-    <p>더스윙 AI 음성 생성 스튜디오 + OpenAI TTS 🚀</p>
-    <div style="display: flex; justify-content: center; gap: 30px; flex-wrap: wrap; margin-top: 20px;">
-        <div class="stat-card">
-            <span class="stat-number">{}</span>
-            <div class="stat-label">생성된 음성</div>
-        </div>
-        <div class="stat-card">
-            <span class="stat-number">15</span>
-            <div class="stat-label">음성 옵션</div>
-        </div>
-        <div class="stat-card">
-            <span class="stat-number">∞</span>
-            <div class="stat-label">가능성</div>
-        </div>
-    </div>
-</div>
-""".format(st.session_state.total_generated), unsafe_allow_html=True)
+st.markdown(load_static("header.html").format(st.session_state.total_generated), unsafe_allow_html=True)
 
 # FontAwesome 아이콘 추가
 st.markdown("""
@@ -826,299 +157,520 @@ with st.sidebar:
         help="각 서비스별로 생성할 음성 개수"
     )
 
+    # 가장 빠른 서비스 모드 (음성보다 응답 속도가 중요할 때)
+    fastest_mode = st.checkbox(
+        "⚡ 가장 빠른 서비스 하나만",
+        help="선택한 서비스 중 먼저 성공한 결과 하나만 사용 • 장애 중인 서비스는 건너뜀"
+    )
+    if fastest_mode:
+        fastest_strategy = st.radio(
+            "시도 방식",
+            options=["ordered", "race"],
+            format_func=lambda x: {"ordered": "순서대로 (실패/지연시 다음)", "race": "동시에 경쟁"}[x],
+            horizontal=True
+        )
+
+    # 문장 단위 생성 (긴 대본에서 몇 문장만 고쳐 다시 생성할 때)
+    incremental = st.checkbox(
+        "✂️ 바뀐 문장만 다시 생성",
+        help="문장 단위로 나누어 생성하고 캐시 • 문장을 고치면 그 문장만 다시 요청 (문장 사이 억양이 조금 끊길 수 있음)"
+    )
+
+    # 커넥션 재사용 통계
+    with st.expander("📡 연결 통계"):
+        for provider, stats in tts_generator.connection_stats().items():
+            st.caption(
+                f"{provider}: 요청 {stats['requests']} • 새 연결 {stats['connections']} • "
+                f"재사용 {stats['reused']} ({stats['reuse_rate']:.0%})"
+            )
+        for provider, stats in tts_generator.scheduler_stats().items():
+            if stats['calls']:
+                st.caption(
+                    f"⏱️ {provider}: 재시도 {stats['retries']} • 429 {stats['throttled']} • "
+                    f"5xx {stats['server_errors']} • 동시 실행 한도 {stats['concurrency_limit']}"
+                )
+        for provider, stats in tts_generator.hedge_stats().items():
+            if stats['requests']:
+                st.caption(
+                    f"🎯 {provider}: 시간 초과 {stats['deadline_exceeded']} • 헤지 {stats['hedged']} "
+                    f"(승 {stats['hedge_wins']}, 한도로 생략 {stats['hedge_skipped']}) • 취소 {stats['cancelled']}"
+                )
+        for provider, stats in tts_generator.health_stats().items():
+            if stats['tripped']:
+                st.caption(f"🚧 {provider}: 연속 실패 {stats['consecutive_failures']}회 - 잠시 제외됨")
+        cache_stats = tts_generator.cache_stats()
+        if cache_stats:
+            st.caption(
+                f"💾 캐시: 히트 {cache_stats['memory_hits'] + cache_stats['disk_hits']} • "
+                f"미스 {cache_stats['misses']} ({cache_stats['hit_rate']:.0%}) • "
+                f"{cache_stats['disk_bytes'] / 1024 / 1024:.1f}MB"
+            )
+        flight_stats = tts_generator.single_flight_stats()
+        if flight_stats['coalesced']:
+            st.caption(
+                f"🔗 같은 요청 합침: {flight_stats['coalesced']} ({flight_stats['coalesce_rate']:.0%}) • "
+                f"진행 중 {flight_stats['in_flight']} • 대기 {flight_stats['waiting']} • "
+                f"최대 대기 {flight_stats['max_waiters']}"
+            )
+        for name, stats in tts_generator.router_stats().items():
+            if stats['routed']:
+                st.caption(
+                    f"🤖 {name}: 자동 선택 {stats['routed']} (대체 {stats['fallbacks']}) • "
+                    + " • ".join(f"~{bound}자 p90 {latency:.1f}초" for bound, latency in stats['p90'].items() if latency is not None)
+                )
+        for name, stats in tts_generator.catalog_stats().items():
+            if stats['errors'] or stats['refreshes']:
+                st.caption(
+                    f"📚 {name}: {stats['items']}개 • 갱신 {stats['refreshes']} • "
+                    f"변경 없음 {stats['not_modified']} • 오류 {stats['errors']}"
+                )
+
 # 메인 컨텐츠
 st.header(":primary[✍️ 텍스트 입력]")
 
 text_input = st.text_area(
     ":primary[변환할 텍스트를 입력하세요:]",
     height=150,
-    max_chars=4096,
-    help="최대 4096자까지 입력 가능합니다"
+    max_chars=MAX_TEXT_CHARS,
+    help=f"최대 {MAX_TEXT_CHARS}자까지 입력 가능합니다 (긴 텍스트는 문단/문장 단위로 나누어 생성)"
 )
 
 # 문자 수 표시
 if text_input:
     char_count = len(text_input)
-    if char_count > 3500:
-        st.warning(f":primary[⚠️ {char_count}/4096 characters - 거의 한계에 도달했습니다]")
+    if char_count > MAX_TEXT_CHARS * 0.9:
+        st.warning(f":primary[⚠️ {char_count}/{MAX_TEXT_CHARS} characters - 거의 한계에 도달했습니다]")
     else:
-        st.info(f":primary[📝 {char_count}/4096 characters]")
+        st.info(f":primary[📝 {char_count}/{MAX_TEXT_CHARS} characters]")
+
+# 서비스별 설정 (패널마다 fragment라서 슬라이더를 움직여도 해당 패널만 다시 실행, 전체 실행 때 설정값 반환)
+@st.fragment
+def google_settings_panel():
+    with st.expander(":primary[🌟 Google TTS 설정]", expanded=True):
+        google_lang = st.selectbox(
+            ":primary[언어]",
+            options=[lang["code"] for lang in tts_generator.google_languages],
+            format_func=lambda x: tts_generator.catalog.lookup("google_languages", x, {"name": x})["name"],
+            index=0
+        )
+        google_slow = st.checkbox(":primary[느린 속도]", help=":primary[언어 학습에 유용]")
+    return {
+        'language': google_lang,
+        'slow': google_slow
+    }
+
+@st.fragment
+def elevenlabs_settings_panel(api_key):
+    with st.expander("🧠 ElevenLabs 설정", expanded=True):
+        if not api_key:
+            st.warning("API 키를 입력해주세요")
+            return None
+
+        voice_options = {f"{voice['name']} ({voice['gender']})": voice['id'] for voice in tts_generator.elevenlabs_voices}
+        selected_voice = st.selectbox("음성 캐릭터", options=list(voice_options.keys()))
+        voice_id = voice_options[selected_voice]
+
+        model_options = dict({model['name']: model['id'] for model in tts_generator.elevenlabs_models}, **AUTO_MODEL_OPTION)
+        # 목록이 갱신되어 순서가 바뀌어도 다국어 모델을 기본 선택
+        model_ids = list(model_options.values())
+        default_model = model_ids.index("eleven_multilingual_v2") if "eleven_multilingual_v2" in model_ids else 0
+        selected_model = st.selectbox("AI 모델", options=list(model_options.keys()), index=default_model)
+        model_id = model_options[selected_model]
+
+        stability = st.slider("Stability (안정성)", 0.0, 1.0, 0.5, 0.1, help="낮음=더 표현력, 높음=더 안정적")
+        similarity = st.slider("Similarity (유사성)", 0.0, 1.0, 0.5, 0.1, help="원본 음성 특성 유지 정도")
+        style = st.slider("Style (감정 표현)", 0.0, 1.0, 0.0, 0.1, help="0=자연스럽게, 1=극도로 감정적")
+        speaker_boost = st.checkbox("Speaker Boost", value=True, help="음성 품질 향상")
+    return {
+        'voice_id': voice_id,
+        'model_id': model_id,
+        'stability': stability,
+        'similarity_boost': similarity,
+        'style': style,
+        'use_speaker_boost': speaker_boost
+    }
+
+@st.fragment
+def openai_settings_panel(api_key):
+    with st.expander("🚀 OpenAI TTS 설정", expanded=True):
+        if not api_key:
+            st.warning("API 키를 입력해주세요")
+            return None
+
+        voice_options = {f"{voice['name']} - {voice['description']}": voice['id'] for voice in tts_generator.openai_voices}
+        selected_openai_voice = st.selectbox("AI 음성", options=list(voice_options.keys()))
+        openai_voice_id = voice_options[selected_openai_voice]
+
+        model_options = dict({model['name']: model['id'] for model in tts_generator.openai_models}, **AUTO_MODEL_OPTION)
+        selected_openai_model = st.selectbox("AI 모델", options=list(model_options.keys()))
+        openai_model_id = model_options[selected_openai_model]
+
+        openai_speed = st.slider("음성 속도", 0.25, 4.0, 1.0, 0.25, help="0.25x=매우 느림, 1.0x=보통, 4.0x=매우 빠름")
+
+        format_options = {format_item['name']: format_item['id'] for format_item in tts_generator.openai_formats}
+        selected_format = st.selectbox("오디오 포맷", options=list(format_options.keys()))
+        audio_format = format_options[selected_format]
+    return {
+        'voice': openai_voice_id,
+        'model': openai_model_id,
+        'speed': openai_speed,
+        'response_format': audio_format
+    }
 
-# 서비스별 설정
 col1, col2, col3 = st.columns(3)
 
-# Google TTS 설정
+# 음성 생성 작업 목록 (순서가 곧 결과 표시 순서)
+settings_by_provider = {}
 if use_google:
     with col1:
-        with st.expander(":primary[🌟 Google TTS 설정]", expanded=True):
-            google_lang = st.selectbox(
-                ":primary[언어]",
-                options=[lang["code"] for lang in tts_generator.google_languages],
-                format_func=lambda x: next(lang["name"] for lang in tts_generator.google_languages if lang["code"] == x),
-                index=0
-            )
-            google_slow = st.checkbox(":primary[느린 속도]", help=":primary[언어 학습에 유용]")
-
-# ElevenLabs 설정
+        settings_by_provider["google"] = google_settings_panel()
 if use_elevenlabs:
     with col2:
-        with st.expander("🧠 ElevenLabs 설정", expanded=True):
-            if elevenlabs_key:
-                voice_options = {f"{voice['name']} ({voice['gender']})": voice['id'] for voice in tts_generator.elevenlabs_voices}
-                selected_voice = st.selectbox("음성 캐릭터", options=list(voice_options.keys()))
-                voice_id = voice_options[selected_voice]
-
-                model_options = {model['name']: model['id'] for model in tts_generator.elevenlabs_models}
-                selected_model = st.selectbox("AI 모델", options=list(model_options.keys()), index=2)
-                model_id = model_options[selected_model]
-
-                stability = st.slider("Stability (안정성)", 0.0, 1.0, 0.5, 0.1, help="낮음=더 표현력, 높음=더 안정적")
-                similarity = st.slider("Similarity (유사성)", 0.0, 1.0, 0.5, 0.1, help="원본 음성 특성 유지 정도")
-                style = st.slider("Style (감정 표현)", 0.0, 1.0, 0.0, 0.1, help="0=자연스럽게, 1=극도로 감정적")
-                speaker_boost = st.checkbox("Speaker Boost", value=True, help="음성 품질 향상")
-            else:
-                st.warning("API 키를 입력해주세요")
-
-# OpenAI TTS 설정
+        elevenlabs_settings = elevenlabs_settings_panel(elevenlabs_key)
+    if elevenlabs_settings is not None:
+        settings_by_provider["elevenlabs"] = elevenlabs_settings
 if use_openai:
     with col3:
-        with st.expander("🚀 OpenAI TTS 설정", expanded=True):
-            if openai_key:
-                voice_options = {f"{voice['name']} - {voice['description']}": voice['id'] for voice in tts_generator.openai_voices}
-                selected_openai_voice = st.selectbox("AI 음성", options=list(voice_options.keys()))
-                openai_voice_id = voice_options[selected_openai_voice]
-
-                model_options = {model['name']: model['id'] for model in tts_generator.openai_models}
-                selected_openai_model = st.selectbox("AI 모델", options=list(model_options.keys()))
-                openai_model_id = model_options[selected_openai_model]
+        openai_settings = openai_settings_panel(openai_key)
+    if openai_settings is not None:
+        settings_by_provider["openai"] = openai_settings
+
+def zip_download_button(label, handles, key):
+    """히스토리 핸들 목록을 ZIP 하나(manifest.json 포함)로 내려받는 버튼
+
+    ZIP은 버튼을 눌렀을 때 디스크의 음성 파일을 조각 단위로 읽어 임시 파일에 만든다.
+    음성 크기 합계가 ZIP_MAX_MB를 넘으면 버튼을 비활성화한다.
+    """
+    entries = [
+        {
+            "name": handle["filename"],
+            "audio_id": handle["id"],
+            "created": handle["created"],
+            "meta": {k: handle.get(k) for k in ("service", "format", "duration", "settings")}
+        }
+        for handle in handles
+    ]
+
+    def build():
+        # 그사이 용량 한도로 정리된 항목은 manifest에 missing으로 기록
+        files = (dict(entry, path=history_store.path(entry["audio_id"])) for entry in entries)
+        spool = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES)
+        for chunk in iter_zip(files, {"created": time.strftime("%Y-%m-%dT%H:%M:%S%z")}):
+            spool.write(chunk)
+        spool.seek(0)
+        # download_button은 BufferedReader/RawIOBase 형태의 파일만 받으므로 감싸서 넘김
+        return io.BufferedReader(spool)
+
+    total_mb = sum(handle.get("size", 0) for handle in handles) / 1024 / 1024
+    too_large = total_mb > ZIP_MAX_MB
+    st.download_button(
+        label,
+        data=build,
+        file_name=time.strftime("tts_%Y%m%d_%H%M%S.zip"),
+        mime="application/zip",
+        key=key,
+        disabled=too_large
+    )
+    if too_large:
+        st.caption(f"⚠️ ZIP은 {ZIP_MAX_MB:g}MB까지 내려받을 수 있습니다 (현재 {total_mb:.1f}MB) • 파일별로 내려받으세요")
+
+# 생성 결과 표시 (fragment라서 다운로드 버튼을 눌러도 이 영역만 다시 실행)
+@st.fragment
+def results_panel(successful_results, failed_results):
+    if successful_results:
+        # 결과 표시
+        st.header("🎧 생성된 음성 파일들")
+        if len(successful_results) > 1:
+            zip_download_button(
+                f"📦 모두 다운로드 (ZIP, {len(successful_results)}개)",
+                successful_results,
+                key=f"results_zip_{successful_results[0]['id']}"
+            )
 
-                openai_speed = st.slider("음성 속도", 0.25, 4.0, 1.0, 0.25, help="0.25x=매우 느림, 1.0x=보통, 4.0x=매우 빠름")
+        # 서비스별로 그룹핑
+        google_results = [r for r in successful_results if 'Google' in r['service']]
+        elevenlabs_results = [r for r in successful_results if 'ElevenLabs' in r['service']]
+        openai_results = [r for r in successful_results if 'OpenAI' in r['service']]
+
+        # Google TTS 결과
+        if google_results:
+            st.markdown("""
+            <div class="service-card">
+                <h3><i class="fab fa-google"></i> Google TTS <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; font-weight: 500; margin-left: 10px; box-shadow: 3px 3px 6px rgba(139, 92, 246, 0.3), -1px -1px 2px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">{}/{}</span></h3>
+            </div>
+            """.format(len(google_results), len(google_results)), unsafe_allow_html=True)
+
+            for i, result in enumerate(google_results):
+                with st.container():
+                    st.markdown(f"""
+                    <div class="result-card fade-in">
+                        <div style="margin-bottom: 20px;">
+                            <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 10px 18px; border-radius: 20px; font-size: 1em; font-weight: 600; display: inline-flex; align-items: center; gap: 8px; margin-bottom: 15px; box-shadow: 4px 4px 8px rgba(139, 92, 246, 0.3), -2px -2px 4px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">
+                                <i class="fab fa-google"></i>
+                                {result['service']}
+                            </span>
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                    # 오디오 플레이어
+                    st.audio(result['audio_data'], format='audio/mp3')
+
+                    # 다운로드 버튼
+                    st.download_button(
+                        "📥 다운로드",
+                        data=result['audio_data'],
+                        file_name=result['filename'],
+                        mime="audio/mp3",
+                        key=f"google_download_{i}"
+                    )
+
+        # ElevenLabs 결과
+        if elevenlabs_results:
+            st.markdown("""
+            <div class="service-card">
+                <h3><i class="fas fa-brain"></i> ElevenLabs AI <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; font-weight: 500; margin-left: 10px; box-shadow: 3px 3px 6px rgba(139, 92, 246, 0.3), -1px -1px 2px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">{}/{}</span></h3>
+            </div>
+            """.format(len(elevenlabs_results), len(elevenlabs_results)), unsafe_allow_html=True)
+
+            for i, result in enumerate(elevenlabs_results):
+                with st.container():
+                    st.markdown(f"""
+                    <div class="result-card fade-in">
+                        <div style="margin-bottom: 20px;">
+                            <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 10px 18px; border-radius: 20px; font-size: 1em; font-weight: 600; display: inline-flex; align-items: center; gap: 8px; margin-bottom: 15px; box-shadow: 4px 4px 8px rgba(139, 92, 246, 0.3), -2px -2px 4px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">
+                                <i class="fas fa-brain"></i>
+                                {result['service']}
+                            </span>
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                    # 오디오 플레이어
+                    st.audio(result['audio_data'], format='audio/mp3')
+
+                    # 다운로드 버튼
+                    st.download_button(
+                        "📥 다운로드",
+                        data=result['audio_data'],
+                        file_name=result['filename'],
+                        mime="audio/mp3",
+                        key=f"elevenlabs_download_{i}"
+                    )
+
+        # OpenAI 결과
+        if openai_results:
+            st.markdown("""
+            <div class="service-card openai-card">
+                <h3><i class="fas fa-robot" style="color: var(--openai);"></i> OpenAI TTS 🚀 <span style="background: linear-gradient(145deg, #10b981, #34d399); color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; font-weight: 500; margin-left: 10px; box-shadow: 3px 3px 6px rgba(16, 185, 129, 0.3), -1px -1px 2px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">{}/{}</span></h3>
+            </div>
+            """.format(len(openai_results), len(openai_results)), unsafe_allow_html=True)
+
+            for i, result in enumerate(openai_results):
+                with st.container():
+                    st.markdown(f"""
+                    <div class="result-card fade-in">
+                        <div style="margin-bottom: 20px;">
+                            <span style="background: linear-gradient(145deg, #10b981, #34d399); color: white; padding: 10px 18px; border-radius: 20px; font-size: 1em; font-weight: 600; display: inline-flex; align-items: center; gap: 8px; margin-bottom: 15px; box-shadow: 4px 4px 8px rgba(16, 185, 129, 0.3), -2px -2px 4px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">
+                                <i class="fas fa-robot"></i>
+                                {result['service']}
+                            </span>
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
 
-                format_options = {format_item['name']: format_item['id'] for format_item in tts_generator.openai_formats}
-                selected_format = st.selectbox("오디오 포맷", options=list(format_options.keys()))
-                audio_format = format_options[selected_format]
+                    # 오디오 플레이어 (포맷에 따라)
+                    audio_format = result.get('settings', {}).get('response_format', 'mp3')
+                    if audio_format == 'mp3':
+                        st.audio(result['audio_data'], format='audio/mp3')
+                    elif audio_format == 'ogg' or audio_format == 'opus':
+                        st.audio(result['audio_data'], format='audio/ogg')
+                    else:
+                        st.audio(result['audio_data'])
+
+                    # 다운로드 버튼
+                    st.download_button(
+                        "📥 다운로드",
+                        data=result['audio_data'],
+                        file_name=result['filename'],
+                        mime=f"audio/{audio_format}",
+                        key=f"openai_download_{i}"
+                    )
+
+    # 실패한 결과 표시 (원본 스타일 적용)
+    if failed_results:
+        st.markdown('<h3 style="color: var(--text); text-align: center; margin: 2rem 0;"><i class="fas fa-exclamation-triangle"></i> 생성 실패</h3>', unsafe_allow_html=True)
+        for result in failed_results:
+            st.markdown(f"""
+            <div class="result-card error-card fade-in">
+                <div style="display: flex; align-items: center; gap: 12px; font-weight: 500;">
+                    <i class="fas fa-exclamation-triangle"></i>
+                    <strong>{result['service']}</strong> 생성 실패: {result['error']}
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+def generation_message(result, incremental):
+    """작업 진행 메시지 (문장 단위 생성이면 재사용한 문장 수 포함)"""
+    message = f"✅ {result['service']} ({result['metrics']['total']:.1f}초"
+    if incremental:
+        message += f" • 문장 {result['metrics'].get('cached_chunks', 0)}/{result.get('chunks', 1)}개 재사용"
+    return message + ")"
+
+def run_generation(text, settings_by_provider, generation_count, fastest_strategy, incremental, session_id, report, cancelled):
+    """백그라운드 작업: 음성을 생성해 성공한 것은 히스토리 저장소에 넣고 (핸들 또는 실패 결과) 목록 반환
+
+    워커 스레드에서 실행되므로 Streamlit 함수는 호출하지 않고 report()로만 진행 상황을 알린다.
+    """
+    # 생성 전체를 하나의 트레이스 스팬으로 기록 (OpenTelemetry가 설치된 경우)
+    with span("tts.generate", **{
+        "tts.chars": len(text),
+        "tts.providers": ",".join(settings_by_provider),
+        "tts.fastest": fastest_strategy is not None,
+        "tts.incremental": incremental
+    }) as generate_span:
+        if fastest_strategy is not None:
+            # 가장 먼저 성공한 서비스 하나의 결과만 사용
+            report(0, 1)
+            result = tts_generator.generate_fastest(text, settings_by_provider, mode=fastest_strategy, incremental=incremental)
+            if result['success']:
+                report(1, 1, f"✅ {result['service']} ({result['metrics']['total']:.1f}초 • 시도: {', '.join(result['failover']['tried'])})")
             else:
-                st.warning("API 키를 입력해주세요")
-
-# 생성 버튼
+                report(1, 1, f"❌ {result['error']}")
+            results = [result]
+        else:
+            jobs = tts_generator.build_jobs(settings_by_provider, generation_count)
+
+            # 음성 생성 프로세스 (서비스별 병렬 실행, 완료되는 대로 진행 상황 기록)
+            results = [None] * len(jobs)
+            report(0, len(jobs))
+            for done, (index, result) in enumerate(tts_generator.generate_many(text, jobs, incremental), start=1):
+                results[index] = result
+                if result['success']:
+                    report(done, len(jobs), generation_message(result, incremental))
+                else:
+                    report(done, len(jobs), f"❌ {result['service']}: {result['error']}")
+                if cancelled.is_set():
+                    break
+            results = [r for r in results if r is not None]
+        if generate_span is not None:
+            generate_span.set_attribute("tts.succeeded", sum(1 for r in results if r['success']))
+
+    # 음성은 디스크에 두고 작업 결과에는 핸들만 보관
+    return [
+        dict(history_store.add(session_id, result), success=True) if result['success']
+        else {k: v for k, v in result.items() if k != "settings"}
+        for result in results
+    ]
+
+# 생성 버튼 (생성은 백그라운드 작업으로 넘기고 작업 id를 주소에 남김)
 st.divider()
 if st.button("🎵 AI 음성 생성하기", type="primary", use_container_width=True):
     if not text_input.strip():
         st.error("⚠️ 텍스트를 입력해주세요!")
     elif not (use_google or use_elevenlabs or use_openai):
         st.error("⚠️ AI 서비스를 하나 이상 선택해주세요!")
-    elif len(text_input) > 4096:
-        st.error("⚠️ 텍스트가 너무 깁니다. 4096자 이하로 입력해주세요")
+    elif len(text_input) > MAX_TEXT_CHARS:
+        st.error(f"⚠️ 텍스트가 너무 깁니다. {MAX_TEXT_CHARS}자 이하로 입력해주세요")
+    else:
+        work_args = (
+            text_input,
+            settings_by_provider,
+            generation_count,
+            fastest_strategy if fastest_mode else None,
+            incremental,
+            st.session_state.session_id
+        )
+        try:
+            st.query_params["job"] = job_queue.submit(
+                st.session_state.session_id,
+                lambda report, cancelled: run_generation(*work_args, report, cancelled),
+                label="⚡ 가장 빠른 서비스로 생성" if fastest_mode else "🎤 AI 음성 생성"
+            )
+        except QueueFullError as e:
+            st.error(f"⚠️ {e}")
+
+# 진행 중인 작업 (fragment가 주기적으로 상태를 확인하고, 끝나면 전체를 다시 실행해 결과 표시)
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def job_progress_panel(job_id):
+    job = job_queue.get(job_id)
+    if job is None or job["status"] not in ("queued", "running"):
+        st.rerun()
+    with st.status(f"{job['label']} 중...", expanded=True):
+        if job["status"] == "queued":
+            st.write(f"⏳ 대기 중 (앞에 {job['position']}개)")
+        elif job["total"]:
+            st.progress(job["done"] / job["total"], text=f"{job['done']}/{job['total']} 완료")
+        for message in job["messages"]:
+            st.write(message)
+    if st.button("⏹️ 생성 취소", key=f"cancel_job_{job_id}"):
+        job_queue.cancel(job_id)
+
+def job_results(job):
+    """끝난 작업의 결과를 히스토리 저장소에서 읽어 (성공, 실패) 목록으로"""
+    successful_results = []
+    failed_results = []
+    for item in job["results"] or []:
+        if not item["success"]:
+            failed_results.append(item)
+            continue
+        audio_data = history_store.read(item["id"])
+        if audio_data is not None:
+            successful_results.append(dict(item, audio_data=audio_data, settings=dict(item["settings"], response_format=item["format"])))
+    return successful_results, failed_results
+
+current_job = job_queue.get(st.query_params["job"]) if "job" in st.query_params else None
+if current_job is not None and current_job["session_id"] == st.session_state.session_id:
+    if current_job["status"] in ("queued", "running"):
+        job_progress_panel(current_job["id"])
     else:
-        # 음성 생성 프로세스
-        with st.spinner("🎤 AI 음성 생성 중..."):
-            results = []
-
-            # Google TTS 생성
-            if use_google:
-                google_settings = {
-                    'language': google_lang,
-                    'slow': google_slow
-                }
-                result = tts_generator.generate_google_tts(text_input, google_settings)
-                results.append(result)
-
-            # ElevenLabs TTS 생성 (여러 개)
-            if use_elevenlabs and elevenlabs_key:
-                for i in range(generation_count):
-                    # 여러 개 생성시 다른 음성 사용
-                    current_voice_id = voice_id
-                    if generation_count > 1:
-                        voice_index = i % len(tts_generator.elevenlabs_voices)
-                        current_voice_id = tts_generator.elevenlabs_voices[voice_index]['id']
-
-                    elevenlabs_settings = {
-                        'voice_id': current_voice_id,
-                        'model_id': model_id,
-                        'stability': stability,
-                        'similarity_boost': similarity,
-                        'style': style,
-                        'use_speaker_boost': speaker_boost
-                    }
-                    result = tts_generator.generate_elevenlabs_tts(text_input, elevenlabs_settings)
-                    results.append(result)
-
-            # OpenAI TTS 생성 (여러 개)
-            if use_openai and openai_key:
-                for i in range(generation_count):
-                    # 여러 개 생성시 다른 음성 사용
-                    current_voice_id = openai_voice_id
-                    if generation_count > 1:
-                        voice_index = i % len(tts_generator.openai_voices)
-                        current_voice_id = tts_generator.openai_voices[voice_index]['id']
-
-                    openai_settings = {
-                        'voice': current_voice_id,
-                        'model': openai_model_id,
-                        'speed': openai_speed,
-                        'response_format': audio_format
-                    }
-                    result = tts_generator.generate_openai_tts(text_input, openai_settings)
-                    results.append(result)
-
-        # 결과 처리
-        successful_results = [r for r in results if r['success']]
-        failed_results = [r for r in results if not r['success']]
+        successful_results, failed_results = job_results(current_job)
+        if current_job["id"] not in st.session_state.counted_jobs:
+            st.session_state.counted_jobs.add(current_job["id"])
+            st.session_state.total_generated += len(successful_results)
 
+        if current_job["status"] == "failed":
+            st.error(f"⚠️ 생성 작업 실패: {current_job['error']}")
+        elif current_job["status"] == "cancelled":
+            st.warning("⏹️ 생성 작업이 취소되었습니다")
         if successful_results:
             st.success(f"🎉 {len(successful_results)}개의 AI 음성이 성공적으로 생성되었습니다!")
-
-            # 세션 상태 업데이트
-            st.session_state.generated_audios.extend(successful_results)
-            st.session_state.total_generated += len(successful_results)
-
-            # 결과 표시
-            st.header("🎧 생성된 음성 파일들")
-
-            # 서비스별로 그룹핑
-            google_results = [r for r in successful_results if 'Google' in r['service']]
-            elevenlabs_results = [r for r in successful_results if 'ElevenLabs' in r['service']]
-            openai_results = [r for r in successful_results if 'OpenAI' in r['service']]
-
-            # Google TTS 결과
-            if google_results:
-                st.markdown("""
-                <div class="service-card">
-                    <h3><i class="fab fa-google"></i> Google TTS <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; font-weight: 500; margin-left: 10px; box-shadow: 3px 3px 6px rgba(139, 92, 246, 0.3), -1px -1px 2px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">{}/{}</span></h3>
-                </div>
-                """.format(len(google_results), len(google_results)), unsafe_allow_html=True)
-
-                for i, result in enumerate(google_results):
-                    with st.container():
-                        st.markdown(f"""
-                        <div class="result-card fade-in">
-                            <div style="margin-bottom: 20px;">
-                                <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 10px 18px; border-radius: 20px; font-size: 1em; font-weight: 600; display: inline-flex; align-items: center; gap: 8px; margin-bottom: 15px; box-shadow: 4px 4px 8px rgba(139, 92, 246, 0.3), -2px -2px 4px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">
-                                    <i class="fab fa-google"></i>
-                                    {result['service']}
-                                </span>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        # 오디오 플레이어
-                        st.audio(result['audio_data'], format='audio/mp3')
-
-                        # 다운로드 버튼
-                        st.download_button(
-                            "📥 다운로드",
-                            data=result['audio_data'],
-                            file_name=result['filename'],
-                            mime="audio/mp3",
-                            key=f"google_download_{i}"
-                        )
-
-            # ElevenLabs 결과
-            if elevenlabs_results:
-                st.markdown("""
-                <div class="service-card">
-                    <h3><i class="fas fa-brain"></i> ElevenLabs AI <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; font-weight: 500; margin-left: 10px; box-shadow: 3px 3px 6px rgba(139, 92, 246, 0.3), -1px -1px 2px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">{}/{}</span></h3>
-                </div>
-                """.format(len(elevenlabs_results), len(elevenlabs_results)), unsafe_allow_html=True)
-
-                for i, result in enumerate(elevenlabs_results):
-                    with st.container():
-                        st.markdown(f"""
-                        <div class="result-card fade-in">
-                            <div style="margin-bottom: 20px;">
-                                <span style="background: linear-gradient(145deg, #8b5cf6, #a78bfa); color: white; padding: 10px 18px; border-radius: 20px; font-size: 1em; font-weight: 600; display: inline-flex; align-items: center; gap: 8px; margin-bottom: 15px; box-shadow: 4px 4px 8px rgba(139, 92, 246, 0.3), -2px -2px 4px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">
-                                    <i class="fas fa-brain"></i>
-                                    {result['service']}
-                                </span>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        # 오디오 플레이어
-                        st.audio(result['audio_data'], format='audio/mp3')
-
-                        # 다운로드 버튼
-                        st.download_button(
-                            "📥 다운로드",
-                            data=result['audio_data'],
-                            file_name=result['filename'],
-                            mime="audio/mp3",
-                            key=f"elevenlabs_download_{i}"
-                        )
-
-            # OpenAI 결과
-            if openai_results:
-                st.markdown("""
-                <div class="service-card openai-card">
-                    <h3><i class="fas fa-robot" style="color: var(--openai);"></i> OpenAI TTS 🚀 <span style="background: linear-gradient(145deg, #10b981, #34d399); color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; font-weight: 500; margin-left: 10px; box-shadow: 3px 3px 6px rgba(16, 185, 129, 0.3), -1px -1px 2px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">{}/{}</span></h3>
-                </div>
-                """.format(len(openai_results), len(openai_results)), unsafe_allow_html=True)
-
-                for i, result in enumerate(openai_results):
-                    with st.container():
-                        st.markdown(f"""
-                        <div class="result-card fade-in">
-                            <div style="margin-bottom: 20px;">
-                                <span style="background: linear-gradient(145deg, #10b981, #34d399); color: white; padding: 10px 18px; border-radius: 20px; font-size: 1em; font-weight: 600; display: inline-flex; align-items: center; gap: 8px; margin-bottom: 15px; box-shadow: 4px 4px 8px rgba(16, 185, 129, 0.3), -2px -2px 4px rgba(255, 255, 255, 0.1); text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.2);">
-                                    <i class="fas fa-robot"></i>
-                                    {result['service']}
-                                </span>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        # 오디오 플레이어 (포맷에 따라)
-                        audio_format = result.get('settings', {}).get('response_format', 'mp3')
-                        if audio_format == 'mp3':
-                            st.audio(result['audio_data'], format='audio/mp3')
-                        elif audio_format == 'ogg' or audio_format == 'opus':
-                            st.audio(result['audio_data'], format='audio/ogg')
-                        else:
-                            st.audio(result['audio_data'])
-
-                        # 다운로드 버튼
-                        st.download_button(
-                            "📥 다운로드",
-                            data=result['audio_data'],
-                            file_name=result['filename'],
-                            mime=f"audio/{audio_format}",
-                            key=f"openai_download_{i}"
-                        )
-
-        # 실패한 결과 표시 (원본 스타일 적용)
-        if failed_results:
-            st.markdown('<h3 style="color: var(--text); text-align: center; margin: 2rem 0;"><i class="fas fa-exclamation-triangle"></i> 생성 실패</h3>', unsafe_allow_html=True)
-            for result in failed_results:
-                st.markdown(f"""
-                <div class="result-card error-card fade-in">
-                    <div style="display: flex; align-items: center; gap: 12px; font-weight: 500;">
-                        <i class="fas fa-exclamation-triangle"></i>
-                        <strong>{result['service']}</strong> 생성 실패: {result['error']}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-# 히스토리 표시
-if st.session_state.generated_audios:
-    st.divider()
-    with st.expander(f"📜 생성 히스토리 ({len(st.session_state.generated_audios)}개)", expanded=False):
-        for i, audio in enumerate(reversed(st.session_state.generated_audios[-10:])):  # 최근 10개만
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write(f"🎵 {audio['service']}")
-                st.audio(audio['audio_data'])
-            with col2:
-                st.download_button(
-                    "📥",
-                    data=audio['audio_data'],
-                    file_name=audio['filename'],
-                    mime="audio/mp3",
-                    key=f"history_download_{i}"
-                )
-
-# 정리 버튼
-if st.session_state.generated_audios:
-    if st.button("🗑️ 히스토리 모두 지우기", type="secondary"):
-        st.session_state.generated_audios = []
-        st.success("✅ 히스토리가 모두 지워졌습니다!")
-        st.rerun()
\ No newline at end of file
+        results_panel(successful_results, failed_results)
+
+# 히스토리 표시 (fragment라서 재생/다운로드를 해도 히스토리 영역만 다시 실행)
+@st.fragment
+def history_panel():
+    # 백그라운드 작업이 저장한 항목을 포함하고, 용량 한도로 정리된 항목은 제외
+    st.session_state.generated_audios = history_store.list(st.session_state.session_id)
+    if st.session_state.generated_audios:
+        st.divider()
+        with st.expander(f"📜 생성 히스토리 ({len(st.session_state.generated_audios)}개)", expanded=False):
+            zip_download_button("📦 히스토리 모두 다운로드 (ZIP)", st.session_state.generated_audios, key="history_zip")
+            for i, audio in enumerate(reversed(st.session_state.generated_audios[-10:])):  # 최근 10개만
+                audio_data = history_store.read(audio['id'])
+                if audio_data is None:
+                    continue
+                mime = AUDIO_MIME_TYPES.get(audio['format'], "audio/mpeg")
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    duration = f" • {audio['duration']:.1f}초" if audio['duration'] else ""
+                    st.write(f"🎵 {audio['service']} ({audio['size'] / 1024:.0f}KB{duration})")
+                    st.audio(audio_data, format=mime)
+                with col2:
+                    st.download_button(
+                        "📥",
+                        data=audio_data,
+                        file_name=audio['filename'],
+                        mime=mime,
+                        key=f"history_download_{audio['id']}"
+                    )
+
+    # 정리 버튼
+    if st.session_state.generated_audios:
+        if st.button("🗑️ 히스토리 모두 지우기", type="secondary"):
+            history_store.clear(st.session_state.session_id)
+            st.session_state.generated_audios = []
+            st.success("✅ 히스토리가 모두 지워졌습니다!")
+            st.rerun()
+
+history_panel()
@@ -0,0 +1,515 @@
+"""asyncio 기반 음성 생성 엔진
+
+TTSGenerator의 설정(서비스 주소, 글자 수 제한, 캐시, 속도 제한, 장애 감지, 지표)을 그대로 쓰면서
+HTTP 요청은 aiohttp 커넥션 풀 하나로 보낸다. 요청마다 스레드를 쓰지 않으므로 프로세스 하나에서
+수백 개의 생성을 동시에 진행할 수 있다. 인스턴스 하나는 이벤트 루프 하나에서만 사용한다.
+
+    async with AsyncTTSGenerator(create_tts_generator()) as engine:
+        results = await engine.generate_batch([("openai", text, settings), ("google", text, {})])
+
+진행 중인 생성은 작업(Task)을 취소하면 연결을 닫고 바로 중단되며, 일괄 생성을 취소하면 남은 생성도 모두 취소된다.
+"""
+import asyncio
+import base64
+import time
+
+import aiohttp
+
+import mp3_frames
+from hedging import AttemptControl
+from provider_scheduler import is_retryable, parse_retry_after
+from single_flight import AsyncSingleFlight
+from text_chunker import split_text
+from tts_generator import (
+    CONCATENABLE_FORMATS,
+    GOOGLE_AUDIO_PATTERN,
+    GOOGLE_TTS_PATH,
+    TTSStreamError,
+    coalesced_result,
+    elevenlabs_error_message,
+    openai_error_message
+)
+
+
+async def _gather_all(aws):
+    """모두 끝날 때까지 기다려 순서대로 반환 (하나라도 예외가 나거나 취소되면 나머지도 취소)"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _failure_details(response):
+    return {
+        "status_code": response.status,
+        "retry_after": parse_retry_after(response.headers.get("Retry-After"))
+    }
+
+
+# 스케줄러의 동시 실행 자리가 빌 때까지 확인하는 간격 (초, 처음 값에서 최대값까지 두 배씩 늘림)
+SLOT_POLL_INTERVAL = 0.005
+SLOT_POLL_MAX_INTERVAL = 0.05
+
+
+class AsyncTTSGenerator:
+    def __init__(self, generator, pool_size=100):
+        self.generator = generator
+        self.pool_size = pool_size
+
+        self.generators = {
+            "google": self.generate_google_tts,
+            "elevenlabs": self.generate_elevenlabs_tts,
+            "openai": self.generate_openai_tts
+        }
+        self.stream_openers = {
+            "google": self._open_google_stream,
+            "elevenlabs": self._open_elevenlabs_stream,
+            "openai": self._open_openai_stream
+        }
+        self.single_flight = AsyncSingleFlight()
+
+        self._session = None
+        self._loop = None
+
+    def _http(self):
+        """현재 이벤트 루프의 aiohttp 세션 (처음 호출할 때 커넥션 풀과 함께 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None:
+            connect_timeout, read_timeout = self.generator.sessions.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+            )
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("AsyncTTSGenerator는 처음 사용한 이벤트 루프에서만 사용할 수 있습니다")
+        return self._session
+
+    async def close(self):
+        """커넥션 풀 종료"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._loop = None
+
+    async def __aenter__(self):
+        self._http()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _read_body(self, response, control):
+        """응답 본문을 조각 단위로 읽음 (첫 바이트 시각 기록)"""
+        buffer = bytearray()
+        async for chunk in response.content.iter_chunked(self.generator.stream_chunk_size):
+            if control is not None:
+                control.mark_first_byte()
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    async def _error_message(self, provider, response):
+        if provider == "elevenlabs":
+            return elevenlabs_error_message(response.status)
+        try:
+            error_data = await response.json(content_type=None)
+        except Exception:
+            error_data = None
+        return openai_error_message(response.status, error_data)
+
+    async def _post_audio(self, provider, url, data, headers, info, settings, control):
+        """음성 API 호출 한 번 (TTSGenerator.generate_*와 같은 형태의 결과 딕셔너리)"""
+        service = self.generator.service_names[provider]
+        try:
+            async with self._http().post(url, json=data, headers=headers) as response:
+                if response.status != 200:
+                    return {
+                        "success": False,
+                        "error": await self._error_message(provider, response),
+                        "service": service,
+                        **_failure_details(response)
+                    }
+                audio_data = await self._read_body(response, control)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {"success": False, "error": f"연결 오류: {str(e)}", "service": service, "retryable": True}
+        return {
+            "success": True,
+            "audio_data": audio_data,
+            "service": info["service"],
+            "settings": settings,
+            "filename": info["filename"]
+        }
+
+    async def _fetch_google_segment(self, prepared, control):
+        """gTTS가 만든 요청 하나를 보내고 디코딩된 오디오 반환 (실패하면 TTSStreamError)"""
+        headers = {name: value for name, value in prepared.headers.items() if name.lower() != "content-length"}
+        try:
+            async with self._http().post(self.generator.base_urls["google"] + GOOGLE_TTS_PATH,
+                                         data=prepared.body, headers=headers) as response:
+                if response.status != 200:
+                    raise TTSStreamError("Google TTS", f"{response.status} ({response.reason}) from TTS API",
+                                         **_failure_details(response))
+                body = await self._read_body(response, control)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TTSStreamError("Google TTS", f"연결 오류: {str(e)}", retryable=True)
+
+        audio = bytearray()
+        for line in body.decode("utf-8").splitlines():
+            if "jQ1olc" in line:
+                audio_search = GOOGLE_AUDIO_PATTERN.search(line)
+                if not audio_search:
+                    raise TTSStreamError("Google TTS", "구글 TTS 응답에서 음성을 찾지 못했습니다")
+                audio.extend(base64.b64decode(audio_search.group(1).encode("ascii")))
+        return bytes(audio)
+
+    async def _iter_google(self, tts, control):
+        """~100자 조각 요청을 google_segment_concurrency개까지 동시에 보내고 원래 순서대로 반환"""
+        semaphore = asyncio.Semaphore(self.generator.google_segment_concurrency)
+
+        async def fetch(prepared):
+            async with semaphore:
+                return await self._fetch_google_segment(prepared, control)
+
+        tasks = [asyncio.ensure_future(fetch(prepared)) for prepared in tts._prepare_requests()]
+        try:
+            for index, task in enumerate(tasks):
+                audio = await task
+                # 두 번째 조각부터는 하나의 MP3 스트림으로 이어지도록 헤더 프레임 제거
+                yield audio if index == 0 else mp3_frames.strip_headers(audio)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def generate_google_tts(self, text, settings, control=None):
+        """구글 TTS로 음성 생성"""
+        try:
+            tts, info = self.generator._google_request(text, settings)
+            audio_data = b"".join([piece async for piece in self._iter_google(tts, control)])
+        except TTSStreamError as e:
+            return e.as_result()
+        except Exception as e:
+            return {"success": False, "error": str(e), "service": "Google TTS"}
+        return {
+            "success": True,
+            "audio_data": audio_data,
+            "service": info["service"],
+            "settings": settings,
+            "filename": info["filename"]
+        }
+
+    async def generate_elevenlabs_tts(self, text, settings, control=None):
+        """일레븐랩스 TTS로 음성 생성"""
+        if not self.generator.elevenlabs_api_key:
+            return {"success": False, "error": "ElevenLabs API 키가 설정되지 않았습니다", "service": "ElevenLabs"}
+        url, data, info = self.generator._elevenlabs_request(text, settings)
+        return await self._post_audio("elevenlabs", url, data, self.generator.elevenlabs_headers, info, settings, control)
+
+    async def generate_openai_tts(self, text, settings, control=None):
+        """OpenAI TTS로 음성 생성"""
+        if not self.generator.openai_api_key:
+            return {"success": False, "error": "OpenAI API 키가 설정되지 않았습니다", "service": "OpenAI TTS"}
+        url, data, info = self.generator._openai_request(text, settings)
+        return await self._post_audio("openai", url, data, self.generator.openai_headers, info, settings, control)
+
+    async def _acquire_slot(self, provider):
+        """스케줄러의 AIMD 동시 실행 자리를 기다려 차지 (스레드를 막지 않도록 try_acquire_slot을 반복 확인)"""
+        scheduler = self.generator.scheduler
+        interval = SLOT_POLL_INTERVAL
+        while not scheduler.try_acquire_slot(provider):
+            await asyncio.sleep(interval)
+            interval = min(SLOT_POLL_MAX_INTERVAL, interval * 2)
+
+    async def _scheduled(self, provider, chars, attempt):
+        """attempt()를 서비스 속도 제한/동시 실행 수 안에서 실행하고 429/5xx/연결 오류면 재시도
+
+        반환값: (결과, 재시도 횟수). 토큰 버킷, AIMD 동시 실행 한도, 재시도 판단과 Retry-After 대기는
+        모두 TTSGenerator의 스케줄러와 공유하므로 동기/비동기 호출을 합쳐 같은 한도를 지킨다.
+        """
+        scheduler = self.generator.scheduler
+        self._http()
+        retries = 0
+        while True:
+            wait = scheduler.slot_delay(provider, chars)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._acquire_slot(provider)
+            result = None
+            try:
+                result = await attempt()
+            finally:
+                # 취소되었으면 result가 None (한도는 줄이지 않고 자리만 반환)
+                scheduler.release(provider, result)
+            delay = scheduler.retry_delay(provider, retries, result)
+            if delay is None:
+                return result, retries
+            retries += 1
+            await asyncio.sleep(delay)
+
+    async def _synthesize(self, provider, text, settings):
+        started = time.perf_counter()
+        deadline = self.generator.hedger.deadline
+        control = AttemptControl()
+        retries = 0
+
+        async def attempt():
+            control.started_at = time.monotonic()
+            control.first_byte_at = None
+            return await self.generators[provider](text, settings, control)
+
+        try:
+            # 마감 시간은 재시도를 포함한 요청 전체에 적용
+            result, retries = await asyncio.wait_for(self._scheduled(provider, len(text), attempt), timeout=deadline)
+        except asyncio.TimeoutError:
+            result = {
+                "success": False,
+                "error": f"응답 시간 초과 ({deadline:.0f}초)",
+                "service": self.generator.service_names[provider],
+                "deadline_exceeded": True
+            }
+
+        result = dict(result, metrics={
+            "total": time.perf_counter() - started,
+            "ttfb": control.ttfb,
+            "chars": len(text),
+            "bytes": len(result.get("audio_data") or b""),
+            "retries": retries,
+            "cache_hit": False
+        })
+        # 429/5xx/연결 오류/시간 초과만 서비스 장애로 봄 (잘못된 입력으로 인한 4xx는 제외)
+        if result["success"] or is_retryable(result) or result.get("deadline_exceeded"):
+            self.generator.health.record(provider, result["success"])
+            self.generator.record_model_latency(provider, text, settings, result)
+        if self.generator.cache is not None and result["success"]:
+            meta = {k: v for k, v in result.items() if k not in ("audio_data", "settings", "metrics")}
+            await asyncio.to_thread(
+                self.generator.cache.put,
+                self.generator.cache_key(provider, text, settings), result["audio_data"], meta
+            )
+        return result
+
+    async def _generate_uncached(self, provider, text, settings):
+        # 이 루프에서 같은 음성을 동시에 요청하면 서비스 호출 한 번의 결과를 함께 받음
+        result, coalesced = await self.single_flight.do(
+            self.generator.cache_key(provider, text, settings),
+            lambda: self._synthesize(provider, text, settings)
+        )
+        return coalesced_result(result, coalesced)
+
+    async def _get_cached(self, provider, text, settings):
+        # 디스크 캐시 읽기가 이벤트 루프를 막지 않도록 스레드에서 조회
+        if self.generator.cache is None:
+            return None
+        return await asyncio.to_thread(self.generator.get_cached, provider, text, settings)
+
+    async def _generate_chunk(self, provider, text, settings):
+        """조각 하나 생성 (캐시 우선, 실패시 지수 백오프로 재시도)"""
+        cached = await self._get_cached(provider, text, settings)
+        if cached is not None:
+            return cached
+        retries = 0
+        for attempt in range(self.generator.chunk_retries + 1):
+            result = await self._generate_uncached(provider, text, settings)
+            retries += result["metrics"]["retries"] + (1 if attempt else 0)
+            if result["success"] or not is_retryable(result):
+                break
+            if attempt < self.generator.chunk_retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        result["metrics"]["retries"] = retries
+        return result
+
+    async def generate(self, provider, text, settings):
+        """서비스 이름으로 음성 생성 (캐시 우선)"""
+        settings = self.generator.route_model(provider, text, settings)
+        result = await self._get_cached(provider, text, settings)
+        if result is None:
+            result = await self._generate_uncached(provider, text, settings)
+        self.generator.metrics.record(provider, result)
+        return result
+
+    async def generate_long(self, provider, text, settings, incremental=False):
+        """긴 텍스트는 조각으로 나누어 동시에 생성한 뒤 순서대로 이어 붙여 하나의 결과로 반환
+
+        incremental이면 문장 단위로 나누어 캐시에 없는 문장만 생성한다 (TTSGenerator.split_chunks 참고).
+        """
+        started = time.perf_counter()
+        service = self.generator.service_names[provider]
+        settings = self.generator.route_model(provider, text, settings)
+        chunks = self.generator.split_chunks(provider, text, settings, incremental)
+        audio_format = settings.get('response_format', 'mp3')
+        if not chunks:
+            result = {"success": False, "error": "텍스트가 비어 있습니다", "service": service}
+        elif len(chunks) > 1 and audio_format not in CONCATENABLE_FORMATS:
+            result = {
+                "success": False,
+                "error": f"{audio_format.upper()} 포맷은 긴 텍스트 생성을 지원하지 않습니다",
+                "service": service
+            }
+        else:
+            chunk_results = await _gather_all(self._generate_chunk(provider, chunk, settings) for chunk in chunks)
+            result = self.generator._assemble(provider, text, settings, chunk_results, started)
+        self.generator.metrics.record(provider, result)
+        return result
+
+    async def generate_batch(self, items):
+        """(서비스, 텍스트, 설정) 목록을 동시에 생성하고 같은 순서의 결과 목록 반환 (asyncio.gather와 같음)"""
+        return await _gather_all(self.generate_long(provider, text, settings) for provider, text, settings in items)
+
+    async def generate_many(self, text, jobs, incremental=False):
+        """같은 텍스트를 (서비스, 설정) 목록으로 동시에 생성 (TTSGenerator.build_jobs 결과를 그대로 사용)"""
+        return await _gather_all(self.generate_long(provider, text, settings, incremental) for provider, settings in jobs)
+
+    async def iter_completed(self, items):
+        """(서비스, 텍스트, 설정) 목록을 동시에 생성하고 끝나는 순서대로 (순번, 결과) 반환"""
+        tasks = {
+            asyncio.ensure_future(self.generate_long(provider, text, settings)): index
+            for index, (provider, text, settings) in enumerate(items)
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield tasks[task], task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _open_response(self, provider, url, data, headers):
+        """스트리밍 응답을 열고 상태 코드 확인 (실패하면 TTSStreamError)"""
+        service = self.generator.service_names[provider]
+        try:
+            response = await self._http().post(url, json=data, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TTSStreamError(service, f"연결 오류: {str(e)}", retryable=True)
+        if response.status != 200:
+            error_msg = await self._error_message(provider, response)
+            response.release()
+            raise TTSStreamError(service, error_msg, **_failure_details(response))
+        return response
+
+    async def _iter_response(self, service, response):
+        try:
+            async for chunk in response.content.iter_chunked(self.generator.stream_chunk_size):
+                if chunk:
+                    yield chunk
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TTSStreamError(service, f"연결 오류: {str(e)}")
+        finally:
+            response.release()
+
+    async def _open_google_stream(self, text, settings):
+        tts, info = self.generator._google_request(text, settings)
+        return info, self._iter_google(tts, None)
+
+    async def _open_elevenlabs_stream(self, text, settings):
+        if not self.generator.elevenlabs_api_key:
+            raise TTSStreamError("ElevenLabs", "ElevenLabs API 키가 설정되지 않았습니다")
+        url, data, info = self.generator._elevenlabs_request(text, settings, stream=True)
+        response = await self._open_response("elevenlabs", url, data, self.generator.elevenlabs_headers)
+        return info, self._iter_response("ElevenLabs", response)
+
+    async def _open_openai_stream(self, text, settings):
+        if not self.generator.openai_api_key:
+            raise TTSStreamError("OpenAI TTS", "OpenAI API 키가 설정되지 않았습니다")
+        url, data, info = self.generator._openai_request(text, settings)
+        response = await self._open_response("openai", url, data, self.generator.openai_headers)
+        return info, self._iter_response("OpenAI TTS", response)
+
+    async def open_stream(self, provider, text, settings):
+        """스트리밍 생성 시작: 응답 상태까지 확인한 뒤 (정보, 오디오 조각 비동기 반복자) 반환
+
+        첫 조각은 서비스 스트리밍 응답을 그대로 흘려보내고, 긴 텍스트의 나머지 조각은
+        그동안 동시에 생성해 두었다가 순서대로 이어서 내보낸다.
+        """
+        service = self.generator.service_names[provider]
+        settings = self.generator.route_model(provider, text, settings)
+        chunks = split_text(text, self.generator.char_limits[provider])
+        if not chunks:
+            raise TTSStreamError(service, "텍스트가 비어 있습니다")
+        audio_format = settings.get('response_format', 'mp3')
+        if len(chunks) > 1 and audio_format not in CONCATENABLE_FORMATS:
+            raise TTSStreamError(service, f"{audio_format.upper()} 포맷은 긴 텍스트 생성을 지원하지 않습니다")
+
+        started = time.perf_counter()
+        rest = [asyncio.ensure_future(self._generate_chunk(provider, chunk, settings)) for chunk in chunks[1:]]
+
+        cached = await self._get_cached(provider, chunks[0], settings)
+        stream_metrics = {"chars": len(text), "retries": 0, "cache_hit": cached is not None}
+        if cached is not None:
+            info = {"service": cached["service"], "filename": cached["filename"]}
+
+            async def first_cached():
+                yield cached["audio_data"]
+
+            first = first_cached()
+        else:
+            async def open_first():
+                try:
+                    return {"success": True, "stream": await self.stream_openers[provider](chunks[0], settings)}
+                except TTSStreamError as e:
+                    return dict(e.as_result(), exception=e)
+
+            try:
+                # 스트림은 응답 헤더를 받을 때까지만 서비스 동시 실행 슬롯을 차지
+                opened, stream_metrics["retries"] = await self._scheduled(provider, len(chunks[0]), open_first)
+            except BaseException:
+                for task in rest:
+                    task.cancel()
+                raise
+            if not opened["success"]:
+                for task in rest:
+                    task.cancel()
+                self.generator.metrics.record(provider, dict(
+                    opened, metrics=dict(stream_metrics, total=time.perf_counter() - started)))
+                raise opened["exception"]
+            info, first = opened["stream"]
+
+        async def iterate():
+            size = 0
+            success = False
+            try:
+                received = []
+                async for piece in first:
+                    if size == 0:
+                        stream_metrics["ttfb"] = time.perf_counter() - started
+                    size += len(piece)
+                    received.append(piece)
+                    yield piece
+                # 끝까지 받은 첫 조각은 캐시에 저장
+                if cached is None and self.generator.cache is not None:
+                    await asyncio.to_thread(
+                        self.generator.cache.put,
+                        self.generator.cache_key(provider, chunks[0], settings), b"".join(received), dict(info)
+                    )
+
+                for task in rest:
+                    result = await task
+                    if not result["success"]:
+                        raise TTSStreamError(service, result["error"])
+                    audio = result["audio_data"]
+                    if audio_format == "mp3":
+                        audio = mp3_frames.strip_headers(audio)
+                    size += len(audio)
+                    yield audio
+                success = True
+            finally:
+                await first.aclose()
+                for task in rest:
+                    task.cancel()
+                self.generator.metrics.record(provider, {
+                    "success": success,
+                    "metrics": dict(stream_metrics, total=time.perf_counter() - started, bytes=size)
+                })
+
+        return info, iterate()
+
+    async def stream(self, provider, text, settings):
+        """오디오 조각을 도착하는 대로 반환하는 비동기 제너레이터"""
+        _, chunks = await self.open_stream(provider, text, settings)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
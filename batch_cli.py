@@ -0,0 +1,247 @@
+"""CSV/JSONL 프롬프트 목록을 일괄 음성 합성하는 명령줄 도구
+
+    python batch_cli.py prompts.csv -o output/batch --workers 8 --concurrency openai=6
+
+입력 행: id, text, provider(google/elevenlabs/openai), settings(JSON)
+출력: <id>.<확장자> 음성 파일 + manifest.jsonl (재실행시 완료된 id는 건너뜀) + summary.json
+id가 겹치거나 파일 이름으로 바꿨을 때 겹치는 입력은 거부하고, 텍스트가 빈 행은 실패로 기록한다.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tts_generator import env_config, create_tts_generator
+
+PROVIDERS = ("google", "elevenlabs", "openai")
+
+# 서비스별 동시 요청 수 설정 이름
+CONCURRENCY_CONFIG_NAMES = {
+    "google": "GOOGLE_TTS_CONCURRENCY",
+    "elevenlabs": "ELEVENLABS_CONCURRENCY",
+    "openai": "OPENAI_CONCURRENCY"
+}
+
+MANIFEST_NAME = "manifest.jsonl"
+SUMMARY_NAME = "summary.json"
+
+
+def read_rows(path, default_provider):
+    """CSV 또는 JSONL 파일에서 작업 행 읽기"""
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            raw_rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            raw_rows = list(csv.DictReader(f))
+
+    rows = []
+    for number, raw in enumerate(raw_rows, start=1):
+        if not isinstance(raw, dict):
+            raise ValueError(f"{number}번째 행: JSON 객체가 아닙니다")
+        settings = raw.get("settings") or {}
+        if isinstance(settings, str):
+            try:
+                settings = json.loads(settings) if settings.strip() else {}
+            except ValueError:
+                raise ValueError(f"{number}번째 행: settings가 올바른 JSON이 아닙니다") from None
+        if not isinstance(settings, dict):
+            raise ValueError(f"{number}번째 행: settings는 JSON 객체여야 합니다")
+        text = raw.get("text") or ""
+        provider = raw.get("provider") or default_provider
+        if not isinstance(text, str):
+            raise ValueError(f"{number}번째 행: text는 문자열이어야 합니다")
+        if not isinstance(provider, str):
+            raise ValueError(f"{number}번째 행: provider는 문자열이어야 합니다")
+        row = {
+            "row": number,
+            "id": str(raw.get("id") or number),
+            "text": text.strip(),
+            "provider": provider.strip().lower(),
+            "settings": settings
+        }
+        if row["provider"] not in PROVIDERS:
+            raise ValueError(f"{number}번째 행: 지원하지 않는 서비스 '{row['provider']}'")
+        rows.append(row)
+    check_ids(rows)
+    return rows
+
+
+def check_ids(rows):
+    """같은 id, 또는 파일 이름으로 바꾸면 같아지는 id가 있으면 ValueError (출력 파일을 덮어쓰지 않도록)"""
+    seen = {}
+    for row in rows:
+        # 대소문자를 구분하지 않는 파일 시스템(macOS/Windows)에서도 겹치지 않도록 비교
+        key = safe_filename(row["id"]).casefold()
+        first = seen.setdefault(key, row)
+        if first is row:
+            continue
+        if first["id"] == row["id"]:
+            raise ValueError(f"{row['row']}번째 행: id '{row['id']}'가 {first['row']}번째 행과 같습니다")
+        raise ValueError(
+            f"{row['row']}번째 행: id '{row['id']}'의 파일 이름이 {first['row']}번째 행 id '{first['id']}'와 같아집니다"
+        )
+
+
+def load_completed(output_dir):
+    """manifest.jsonl에서 이미 성공한 id 목록"""
+    completed = set()
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 중단된 실행이 남긴 잘린 줄
+                continue
+            if entry.get("status") == "ok" and os.path.exists(os.path.join(output_dir, entry["file"])):
+                completed.add(entry["id"])
+    return completed
+
+
+def safe_filename(row_id):
+    return re.sub(r"[^0-9A-Za-z._-]", "_", row_id)[:100]
+
+
+def percentile(values, q):
+    """최근접 순위 방식 백분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def synthesize(tts_generator, row):
+    started = time.perf_counter()
+    result = tts_generator.generate_long(row["provider"], row["text"], row["settings"])
+    return result, time.perf_counter() - started
+
+
+def run(args):
+    rows = read_rows(args.input, args.provider)
+    os.makedirs(args.output, exist_ok=True)
+
+    completed = load_completed(args.output)
+    remaining = [row for row in rows if row["id"] not in completed]
+    pending = [row for row in remaining if row["text"]]
+    empty = [row for row in remaining if not row["text"]]
+    skipped = len(rows) - len(remaining)
+
+    overrides = {}
+    for item in args.concurrency:
+        provider, _, value = item.partition("=")
+        if provider not in CONCURRENCY_CONFIG_NAMES or not value.isdigit():
+            raise ValueError(f"--concurrency 형식 오류: {item} (예: openai=6)")
+        overrides[CONCURRENCY_CONFIG_NAMES[provider]] = value
+
+    tts_generator = create_tts_generator(lambda name, default=None: overrides.get(name, env_config(name, default)))
+
+    print(f"총 {len(rows)}개 중 {skipped}개 건너뜀, {len(pending)}개 생성 시작", file=sys.stderr)
+
+    latencies = {provider: [] for provider in PROVIDERS}
+    ok = failed = 0
+    chars = 0
+    started = time.perf_counter()
+
+    with open(os.path.join(args.output, MANIFEST_NAME), "a", encoding="utf-8") as manifest, \
+            ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for row in empty:
+            error = f"{row['row']}번째 행: 텍스트가 비어 있습니다"
+            entry = {"id": row["id"], "row": row["row"], "provider": row["provider"], "status": "error", "error": error}
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            print(f"❌ {error} (id {row['id']})", file=sys.stderr)
+            failed += 1
+        manifest.flush()
+
+        futures = {executor.submit(synthesize, tts_generator, row): row for row in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            row = futures[future]
+            try:
+                result, latency = future.result()
+            except Exception as e:
+                # 예상하지 못한 오류도 이 행의 실패로 기록하고 나머지 행은 계속 처리
+                result, latency = {"success": False, "error": f"{type(e).__name__}: {e}"}, 0.0
+            entry = {
+                "id": row["id"],
+                "row": row["row"],
+                "provider": row["provider"],
+                "chars": len(row["text"]),
+                "latency": round(latency, 4),
+                "settings": row["settings"]
+            }
+
+            if result["success"]:
+                extension = os.path.splitext(result["filename"])[1] or ".mp3"
+                filename = safe_filename(row["id"]) + extension
+                with open(os.path.join(args.output, filename), "wb") as f:
+                    f.write(result["audio_data"])
+                entry.update(status="ok", file=filename, bytes=len(result["audio_data"]), cached=result.get("cached", False))
+                latencies[row["provider"]].append(latency)
+                chars += len(row["text"])
+                ok += 1
+            else:
+                entry.update(status="error", error=result["error"])
+                failed += 1
+
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+            if done % args.progress_every == 0 or done == len(pending):
+                print(f"[{done}/{len(pending)}] 성공 {ok} • 실패 {failed}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "total": len(rows),
+        "skipped": skipped,
+        "succeeded": ok,
+        "failed": failed,
+        "elapsed": round(elapsed, 3),
+        "items_per_sec": round(ok / elapsed, 3) if elapsed > 0 else 0.0,
+        "chars_per_sec": round(chars / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency": {
+            provider: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99)
+            }
+            for provider, values in latencies.items() if values
+        }
+    }
+    with open(os.path.join(args.output, SUMMARY_NAME), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"\n✅ 성공 {ok} • ❌ 실패 {failed} • ⏭️ 건너뜀 {skipped} ({elapsed:.1f}초)")
+    print(f"처리량: {summary['items_per_sec']} items/s • {summary['chars_per_sec']} chars/s")
+    for provider, stats in summary["latency"].items():
+        print(f"{provider}: n={stats['count']} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s p99={stats['p99']:.3f}s")
+    return 0 if failed == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV/JSONL 일괄 음성 합성")
+    parser.add_argument("input", help="입력 파일 (.csv 또는 .jsonl)")
+    parser.add_argument("-o", "--output", default=os.path.join("output", "batch"), help="출력 디렉터리")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="동시에 처리할 행 수")
+    parser.add_argument("-c", "--concurrency", action="append", default=[], metavar="PROVIDER=N",
+                        help="서비스별 동시 요청 수 (예: openai=6, 여러 번 지정 가능)")
+    parser.add_argument("-p", "--provider", default="google", choices=PROVIDERS, help="provider 열이 비었을 때 사용할 서비스")
+    parser.add_argument("--progress-every", type=int, default=10, help="진행 상황 출력 간격 (행 수)")
+    args = parser.parse_args(argv)
+
+    try:
+        return run(args)
+    except (OSError, ValueError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""가짜 서비스 서버(mock_providers.py)를 상대로 한 TTSGenerator 처리량/지연 시간 벤치마크
+
+    python benchmarks/bench_tts.py -o bench.json
+    python benchmarks/bench_tts.py --lengths 200,5000 --mixes openai,all --concurrency 1,8 --compare bench.json
+
+텍스트 길이 × 생성 개수 × 서비스 조합 × 동시 요청 수 × 요청 경로(generator/stream/flask)마다
+p50/p95/p99 지연 시간, 첫 바이트 시간, 요청/초, 바이트/초, 최대 RSS를 JSON으로 출력한다.
+generator 경로는 Streamlit 생성 버튼과 같은 build_jobs + generate_many 호출이다.
+시나리오마다 새 프로세스에서 실행하므로 최대 RSS와 그 증가량은 해당 시나리오만의 값이고,
+가짜 서버의 지연 시간/실패 주입은 --seed로 시나리오마다 같은 순서로 재현된다.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from batch_cli import percentile  # noqa: E402
+from mock_providers import MockConfig, MockProviderServer  # noqa: E402
+from tts_generator import create_tts_generator  # noqa: E402
+
+PROVIDER_MIXES = {
+    "google": ["google"],
+    "elevenlabs": ["elevenlabs"],
+    "openai": ["openai"],
+    "all": ["google", "elevenlabs", "openai"]
+}
+PATHS = ("generator", "stream", "flask")
+
+SAMPLE_SENTENCES = [
+    "오늘은 날씨가 맑고 바람이 조금 불겠습니다.",
+    "The quick brown fox jumps over the lazy dog.",
+    "음성 합성 서비스의 응답 시간을 측정하고 있습니다.",
+    "Benchmarks should be reproducible across runs and machines."
+]
+
+
+def make_text(length, seed):
+    """seed마다 다른 (캐시에 걸리지 않는) length자 텍스트"""
+    text = f"[{seed}] "
+    for sentence in itertools.cycle(SAMPLE_SENTENCES):
+        if len(text) >= length:
+            break
+        text += sentence + " "
+    return text[:length]
+
+
+def default_settings(provider):
+    return {
+        "google": {"language": "ko"},
+        "elevenlabs": {},
+        "openai": {"response_format": "mp3"}
+    }[provider]
+
+
+def peak_rss_mb():
+    """프로세스 시작 후 최대 RSS (리눅스는 KB, macOS는 바이트 단위로 보고됨)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_generator(base_url, provider_concurrency, workdir):
+    """가짜 서버를 쓰는 TTSGenerator (캐시/공유 저장소/음성 목록 파일은 모두 workdir 아래에)"""
+    config = {
+        "GOOGLE_TTS_BASE_URL": base_url,
+        "ELEVENLABS_BASE_URL": base_url,
+        "OPENAI_BASE_URL": base_url,
+        "ELEVENLABS_API_KEY": "mock",
+        "OPENAI_API_KEY": "mock",
+        "SYNTHESIS_CACHE_DIR": os.path.join(workdir, "cache"),
+        "SHARED_STORE_DIR": os.path.join(workdir, "shared"),
+        "VOICE_CATALOG_PATH": os.path.join(workdir, "voice_catalog.json"),
+        "GOOGLE_TTS_CONCURRENCY": provider_concurrency,
+        "ELEVENLABS_CONCURRENCY": provider_concurrency,
+        "OPENAI_CONCURRENCY": provider_concurrency
+    }
+    generator = create_tts_generator(lambda name, default=None: config.get(name, default))
+    # 매 요청 텍스트가 달라 캐시는 디스크 쓰기 비용만 더하므로 끔
+    generator.cache = None
+    return generator
+
+
+def request_generator(generator, text, providers, count):
+    """build_jobs + generate_many (Streamlit 생성 버튼과 같은 경로)"""
+    jobs = generator.build_jobs({p: default_settings(p) for p in providers}, count)
+    started = time.perf_counter()
+    first = None
+    size = 0
+    ok = True
+    for _, result in generator.generate_many(text, jobs):
+        if first is None:
+            first = time.perf_counter() - started
+        ok = ok and result["success"]
+        size += len(result.get("audio_data", b""))
+    return ok, time.perf_counter() - started, first, size
+
+
+def request_stream(generator, text, provider):
+    """open_stream: 첫 오디오 조각까지의 시간 측정"""
+    started = time.perf_counter()
+    first = None
+    size = 0
+    try:
+        _, chunks = generator.open_stream(provider, text, default_settings(provider))
+        for piece in chunks:
+            if first is None:
+                first = time.perf_counter() - started
+            size += len(piece)
+    except Exception:
+        return False, time.perf_counter() - started, first, size
+    return True, time.perf_counter() - started, first, size
+
+
+def request_flask(client, text, providers, count):
+    """/generate 응답 후 생성된 파일을 /download로 모두 받음"""
+    started = time.perf_counter()
+    response = client.post("/generate", json={
+        "text": text,
+        "services": providers,
+        "count": count,
+        "settings": {p: default_settings(p) for p in providers}
+    })
+    first = time.perf_counter() - started
+    if response.status_code != 200:
+        return False, first, first, 0
+    results = response.get_json()["results"]
+    ok = all(r["success"] for r in results)
+    size = 0
+    for result in results:
+        if result["success"]:
+            download = client.get(f"/download/{result['file_id']}")
+            # 200이 아닌 다운로드 (404 등)는 오류로 셈
+            ok = ok and download.status_code == 200
+            if download.status_code == 200:
+                size += len(download.data)
+    return ok, time.perf_counter() - started, first, size
+
+
+def summarize(values):
+    """p50/p95/p99 (초, 값이 없으면 None)"""
+    return {
+        f"p{q}": round(value, 4) if value is not None else None
+        for q, value in ((q, percentile(values, q)) for q in (50, 95, 99))
+    }
+
+
+def run_scenario(scenario, generator, client, requests_per_scenario, rss_before):
+    providers = PROVIDER_MIXES[scenario["mix"]]
+
+    def one(seed):
+        text = make_text(scenario["length"], seed)
+        if scenario["path"] == "generator":
+            return request_generator(generator, text, providers, scenario["count"])
+        if scenario["path"] == "stream":
+            return request_stream(generator, text, providers[seed % len(providers)])
+        return request_flask(client, text, providers, scenario["count"])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=scenario["concurrency"]) as executor:
+        samples = list(executor.map(one, range(requests_per_scenario)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for ok, latency, _, _ in samples if ok]
+    ttfbs = [first for ok, _, first, _ in samples if ok and first is not None]
+    total_bytes = sum(size for _, _, _, size in samples)
+    stats = dict(scenario)
+    stats.update(
+        requests=len(samples),
+        errors=sum(1 for ok, _, _, _ in samples if not ok),
+        elapsed=round(elapsed, 4),
+        rps=round(len(samples) / elapsed, 3),
+        bytes_per_sec=round(total_bytes / elapsed, 1),
+        latency=summarize(latencies),
+        ttfb=summarize(ttfbs),
+        peak_rss_mb=peak_rss_mb(),
+        rss_increase_mb=round(peak_rss_mb() - rss_before, 1),
+        retries=sum(s["retries"] for s in generator.scheduler_stats().values()),
+        connections=sum(s["connections"] for s in generator.connection_stats().values())
+    )
+    return stats
+
+
+def scenario_main(spec):
+    """(자식 프로세스) 시나리오 하나를 실행하고 결과 JSON을 표준 출력으로"""
+    workdir = tempfile.mkdtemp(prefix="tts-bench-")
+    # server.py는 import할 때 환경변수로 TTSGenerator와 공유 저장소를 만들므로 먼저 임시 디렉터리와
+    # 가짜 서버 주소를 지정
+    os.environ.update(OUTPUT_DIR=workdir, SYNTHESIS_CACHE_DIR=os.path.join(workdir, "cache"),
+                      SHARED_STORE_DIR=os.path.join(workdir, "shared"),
+                      VOICE_CATALOG_PATH=os.path.join(workdir, "voice_catalog.json"),
+                      ELEVENLABS_API_KEY="mock", OPENAI_API_KEY="mock")
+    for name in ("GOOGLE_TTS_BASE_URL", "ELEVENLABS_BASE_URL", "OPENAI_BASE_URL"):
+        os.environ[name] = spec["base_url"]
+
+    scenario = spec["scenario"]
+    generator = build_generator(spec["base_url"], spec["provider_concurrency"], workdir)
+    client = None
+    try:
+        if scenario["path"] == "flask":
+            import server
+            server.tts_generator.close()
+            server.tts_generator = generator
+            client = server.app.test_client()
+        stats = run_scenario(scenario, generator, client, spec["requests"], peak_rss_mb())
+    finally:
+        generator.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0
+
+
+def run_isolated(scenario, base_url, args):
+    """시나리오를 새 파이썬 프로세스에서 실행 (최대 RSS가 앞 시나리오의 영향을 받지 않도록)"""
+    spec = {
+        "scenario": scenario,
+        "base_url": base_url,
+        "requests": args.requests,
+        "provider_concurrency": args.provider_concurrency
+    }
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-scenario", json.dumps(spec)],
+                            stdout=subprocess.PIPE, check=True, text=True).stdout
+    return json.loads(output)
+
+
+def scenario_key(scenario):
+    return "/".join(str(scenario[k]) for k in ("path", "mix", "length", "count", "concurrency"))
+
+
+def compare(results, baseline_path, threshold):
+    """기준 결과보다 p95 지연 시간이 늘거나 요청/초가 줄어든 시나리오 목록"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {scenario_key(s): s for s in json.load(f)["scenarios"]}
+    regressions = []
+    for current in results:
+        before = baseline.get(scenario_key(current))
+        if before is None:
+            continue
+        old_p95, new_p95 = before["latency"]["p95"], current["latency"]["p95"]
+        if old_p95 and new_p95 and new_p95 > old_p95 * (1 + threshold):
+            regressions.append(f"{scenario_key(current)}: p95 {old_p95:.3f}s → {new_p95:.3f}s")
+        if before["rps"] and current["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{scenario_key(current)}: rps {before['rps']} → {current['rps']}")
+    return regressions
+
+
+def split_list(value, cast=str):
+    return [cast(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TTSGenerator 처리량/지연 시간 벤치마크")
+    parser.add_argument("-o", "--output", help="결과 JSON 파일 (없으면 표준 출력)")
+    parser.add_argument("--lengths", default="200,5000", help="텍스트 길이 목록 (글자 수)")
+    parser.add_argument("--counts", default="1,3", help="generation_count 목록")
+    parser.add_argument("--mixes", default="google,openai,all", help=f"서비스 조합 목록 ({', '.join(PROVIDER_MIXES)})")
+    parser.add_argument("--concurrency", default="1,8", help="동시 요청 수 목록")
+    parser.add_argument("--paths", default=",".join(PATHS), help=f"요청 경로 목록 ({', '.join(PATHS)})")
+    parser.add_argument("--requests", type=int, default=20, help="시나리오당 요청 수")
+    parser.add_argument("--provider-concurrency", type=int, default=4, help="서비스별 동시 요청 수 설정")
+    parser.add_argument("--latency", default="lognormal:80,0.4", help="가짜 서버 지연 시간 분포 (mock_providers.py 형식)")
+    parser.add_argument("--chunk-interval", type=float, default=0.005, help="가짜 서버 스트리밍 조각 간격 (초)")
+    parser.add_argument("--bytes-per-char", type=int, default=200, help="가짜 서버 글자당 음성 크기 (바이트)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="가짜 서버 429 비율")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="가짜 서버 500 비율")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON (성능 저하가 있으면 종료 코드 1)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="성능 저하로 볼 변화 비율")
+    parser.add_argument("--seed", type=int, default=0, help="가짜 서버 난수 시드 (시나리오마다 다시 설정)")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scenario:
+        return scenario_main(json.loads(args.run_scenario))
+
+    mixes = split_list(args.mixes)
+    paths = split_list(args.paths)
+    unknown = [m for m in mixes if m not in PROVIDER_MIXES] + [p for p in paths if p not in PATHS]
+    if unknown:
+        print(f"오류: 알 수 없는 값 {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    mock_config = MockConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=0.1,
+        chunk_interval=args.chunk_interval,
+        bytes_per_char=args.bytes_per_char,
+        seed=args.seed
+    )
+    mock = MockProviderServer(config=mock_config).start()
+
+    results = []
+    matrix = itertools.product(paths, mixes, split_list(args.lengths, int), split_list(args.counts, int),
+                               split_list(args.concurrency, int))
+    for path, mix, length, count, concurrency in matrix:
+        if path == "stream" and count != split_list(args.counts, int)[0]:
+            # 스트리밍은 서비스 하나씩 요청하므로 생성 개수와 무관
+            continue
+        scenario = {"path": path, "mix": mix, "length": length, "count": count, "concurrency": concurrency}
+        # 시나리오 순서와 관계없이 같은 지연 시간/실패 순서가 나오도록 시나리오마다 시드를 다시 설정
+        mock_config.random.seed(args.seed)
+        stats = run_isolated(scenario, mock.base_url, args)
+        results.append(stats)
+        print(f"{scenario_key(scenario)}: p95 {stats['latency']['p95'] or 0:.3f}s • "
+              f"{stats['rps']} req/s • 오류 {stats['errors']}", file=sys.stderr)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": {k: v for k, v in vars(mock_config).items() if k not in ("sample_latency", "random")},
+        "requests_per_scenario": args.requests,
+        "provider_concurrency": args.provider_concurrency,
+        "mock_stats": mock.stats(),
+        "scenarios": results
+    }
+    mock.stop()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print(f"⚠️ 성능 저하: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import threading
+import time
+
+
+class ProviderHealth:
+    """서비스별 서킷 브레이커: 연속 실패가 쌓이면 잠시 제외했다가 쿨다운 후 다시 시도"""
+
+    def __init__(self, failure_threshold=3, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def available(self, provider):
+        """지금 요청을 보내도 되는 서비스인지 (쿨다운이 끝나면 한 번 더 시도 허용)"""
+        with self._lock:
+            opened_at = self._opened_at.get(provider)
+            return opened_at is None or time.monotonic() - opened_at >= self.cooldown
+
+    def record(self, provider, success):
+        """요청 결과 기록"""
+        with self._lock:
+            if success:
+                self._failures[provider] = 0
+                self._opened_at.pop(provider, None)
+                return
+            self._failures[provider] = self._failures.get(provider, 0) + 1
+            if self._failures[provider] >= self.failure_threshold:
+                # 쿨다운 후 재시도도 실패하면 다시 쿨다운 시작
+                self._opened_at[provider] = time.monotonic()
+
+    def stats(self):
+        """서비스별 연속 실패 횟수와 제외 여부"""
+        with self._lock:
+            providers = set(self._failures) | set(self._opened_at)
+            now = time.monotonic()
+            return {
+                provider: {
+                    "consecutive_failures": self._failures.get(provider, 0),
+                    "tripped": provider in self._opened_at and now - self._opened_at[provider] < self.cooldown
+                }
+                for provider in providers
+            }
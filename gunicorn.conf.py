@@ -0,0 +1,15 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn.conf.py server:app
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# 워커마다 TTSGenerator(스레드 풀, 커넥션 풀)를 따로 만들기 위해 preload 하지 않음
+preload_app = False
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# 긴 텍스트 생성은 수십 초가 걸릴 수 있음
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 300))
+keepalive = 5
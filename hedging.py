@@ -0,0 +1,173 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class AttemptControl:
+    """요청 시도 하나의 취소 신호와 첫 바이트 수신 시각"""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.started_at = time.monotonic()
+        self.first_byte_at = None
+
+    def mark_first_byte(self):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+
+    @property
+    def ttfb(self):
+        return self.first_byte_at - self.started_at if self.first_byte_at is not None else None
+
+
+class RequestHedger:
+    """요청별 마감 시간과 헤지(복제) 요청 관리
+
+    첫 시도가 지금까지 관측된 첫 바이트 지연의 p95가 지나도록 바이트를 받지 못하면
+    같은 요청을 한 번 더 보내고, 먼저 성공한 결과를 쓴 뒤 나머지는 취소한다.
+    복제 요청도 속도 제한을 지키도록 run()의 hedge_slot으로 자리를 얻지 못하면 보내지 않는다.
+    """
+
+    def __init__(self, deadline=120.0, hedge=False, hedge_quantile=95, min_samples=20, window=200, max_workers=16):
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-attempt")
+        self._ttfb = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "hedge_skipped": 0,
+            "cancelled": 0,
+            "deadline_exceeded": 0
+        })
+
+    def _count(self, provider, name):
+        with self._lock:
+            self._counters[provider][name] += 1
+
+    def _percentile(self, provider, q):
+        with self._lock:
+            samples = sorted(self._ttfb[provider])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[max(0, math.ceil(q / 100 * len(samples)) - 1)]
+
+    def hedge_delay(self, provider):
+        """복제 요청을 보낼 때까지 기다릴 시간 (표본이 부족하면 None)"""
+        return self._percentile(provider, self.hedge_quantile) if self.hedge else None
+
+    def run(self, provider, service, attempt, deadline_at=None, hedge_slot=None, release=None):
+        """attempt(control)을 마감 시간 안에 실행하고 결과 딕셔너리 반환
+
+        hedge_slot()은 복제 요청을 보내기 직전에 불리며, 보낼 수 없으면 None을, 보낼 수 있으면
+        복제 요청이 끝난 뒤 그 결과로 부를 release(result) 함수를 반환한다.
+        release(result)는 첫 시도가 실제로 끝났을 때 작업 스레드에서 불린다 (진 시도나 마감 시간을
+        넘겨 취소된 시도가 run()이 돌아온 뒤에도 연결을 쓰는 동안은 자리를 계속 차지).
+        """
+        self._count(provider, "requests")
+        if deadline_at is None:
+            deadline_at = time.monotonic() + self.deadline
+
+        attempts = []
+
+        def launch(release=None):
+            control = AttemptControl()
+            if release is None:
+                attempts.append((control, self._executor.submit(attempt, control)))
+                return
+
+            def released(control):
+                result = None
+                try:
+                    result = attempt(control)
+                    return result
+                finally:
+                    release(result)
+            attempts.append((control, self._executor.submit(released, control)))
+
+        launch(release)
+        delay = self.hedge_delay(provider)
+        hedge_at = attempts[0][0].started_at + delay if delay is not None else None
+
+        winner = None
+        last_failure = None
+        examined = set()
+        while True:
+            now = time.monotonic()
+            if now >= deadline_at:
+                break
+            if hedge_at is not None and len(attempts) == 1 and now >= hedge_at:
+                # 첫 시도가 아직 바이트를 받지 못했을 때만 복제 요청
+                if attempts[0][0].first_byte_at is None and not attempts[0][1].done():
+                    release = hedge_slot() if hedge_slot is not None else None
+                    if hedge_slot is not None and release is None:
+                        # 속도 제한/동시 실행 한도에 여유가 없으면 복제 요청을 보내지 않음
+                        self._count(provider, "hedge_skipped")
+                    else:
+                        launch(release)
+                        self._count(provider, "hedged")
+                hedge_at = None
+
+            timeout = deadline_at - now
+            if hedge_at is not None:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            pending = [future for _, future in attempts if future not in examined]
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                examined.add(future)
+                result = future.result()
+                if result["success"]:
+                    winner = next(i for i, (_, f) in enumerate(attempts) if f is future)
+                    break
+                last_failure = result
+            if winner is not None or len(examined) == len(attempts):
+                break
+
+        # 진 시도와 마감 시간을 넘긴 시도는 다음 조각을 읽을 때 중단
+        for index, (control, future) in enumerate(attempts):
+            if index != winner and not future.done():
+                control.cancelled.set()
+                self._count(provider, "cancelled")
+
+        if winner is not None:
+            control, future = attempts[winner]
+            if winner > 0:
+                self._count(provider, "hedge_wins")
+            if control.ttfb is not None:
+                with self._lock:
+                    self._ttfb[provider].append(control.ttfb)
+            return future.result()
+
+        if last_failure is not None and len(examined) == len(attempts):
+            return last_failure
+
+        self._count(provider, "deadline_exceeded")
+        return {
+            "success": False,
+            "error": f"응답 시간 초과 ({self.deadline:.0f}초)",
+            "service": service,
+            "deadline_exceeded": True
+        }
+
+    def stats(self):
+        """서비스별 요청/헤지/취소/마감 초과 횟수와 첫 바이트 지연 백분위수"""
+        with self._lock:
+            providers = set(self._counters) | set(self._ttfb)
+            stats = {provider: dict(self._counters[provider]) for provider in providers}
+        for provider in providers:
+            stats[provider]["ttfb_p95"] = self._percentile(provider, 95)
+            stats[provider]["ttfb_p99"] = self._percentile(provider, 99)
+            stats[provider]["hedge_delay"] = self.hedge_delay(provider)
+        return stats
+
+    def close(self):
+        """시도용 스레드 풀 종료 (대기 중인 시도는 취소)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,188 @@
+import atexit
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+
+import mp3_frames
+
+# 디렉터리 주인 프로세스가 살아 있는지는 fcntl 잠금으로 확인 (없는 플랫폼에서는 다른 프로세스 디렉터리를 지우지 않음)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 프로세스가 살아 있는 동안 잠가 두는 파일 (주인 호스트/pid 기록)
+OWNER_FILE = ".owner"
+
+
+class AudioHistoryStore:
+    """생성 히스토리 음성을 디스크에 보관하고 세션에는 가벼운 핸들만 넘겨주는 저장소
+
+    세션별/전체 바이트 예산을 넘으면 가장 오래 사용하지 않은 항목부터 삭제한다.
+    root를 여러 프로세스/레플리카가 함께 써도 되도록 프로세스마다 proc-* 하위 디렉터리를 쓰고,
+    그 안의 .owner 파일을 프로세스가 끝날 때까지 잠가 둔다.
+    """
+
+    def __init__(self, root, session_budget=50 * 1024 * 1024, global_budget=1024 * 1024 * 1024,
+                 stale_after=24 * 3600):
+        self.base = root
+        self.root = os.path.join(root, f"proc-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+
+        self._entries = OrderedDict()
+        self._session_bytes = defaultdict(int)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        # 세션은 프로세스가 끝나면 사라지므로 이 프로세스의 디렉터리는 종료할 때 정리하고,
+        # 비정상 종료로 남은 다른 프로세스의 디렉터리는 주인이 없고 stale_after 동안 쓰이지 않았을 때만 정리
+        self._remove_stale(stale_after)
+        os.makedirs(self.root, exist_ok=True)
+        self._owner = open(os.path.join(self.root, OWNER_FILE), "w")
+        if fcntl is not None:
+            fcntl.flock(self._owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._owner.write(f"{socket.gethostname()} {os.getpid()}\n")
+        self._owner.flush()
+        atexit.register(shutil.rmtree, self.root, True)
+
+    def _owner_alive(self, path):
+        """디렉터리 주인 프로세스가 아직 .owner를 잠그고 있는지 (확인할 수 없으면 살아 있다고 봄)"""
+        if fcntl is None:
+            return True
+        try:
+            with open(os.path.join(path, OWNER_FILE), "a") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return True
+                fcntl.flock(f, fcntl.LOCK_UN)
+                return False
+        except OSError:
+            # 그사이 디렉터리가 지워졌거나 열 수 없음 (지울 수 있는 만큼만 지움)
+            return False
+
+    def _remove_stale(self, stale_after):
+        try:
+            names = os.listdir(self.base)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.base, name)
+            try:
+                if (name.startswith("proc-") and now - os.path.getmtime(path) > stale_after
+                        and not self._owner_alive(path)):
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def _path(self, session_id, audio_id):
+        return os.path.join(self.root, session_id, f"{audio_id}.audio")
+
+    def add(self, session_id, result):
+        """생성 결과를 디스크에 저장하고 핸들(id, 서비스, 파일명, 크기, 재생 시간, 설정) 반환"""
+        audio_id = uuid.uuid4().hex
+        audio_data = result["audio_data"]
+        audio_format = result.get("settings", {}).get("response_format", "mp3")
+        handle = {
+            "id": audio_id,
+            "session_id": session_id,
+            "service": result["service"],
+            "filename": result["filename"],
+            "format": audio_format,
+            "size": len(audio_data),
+            "created": time.time(),
+            "duration": mp3_frames.duration(audio_data) if audio_format == "mp3" else None,
+            "settings": dict(result.get("settings", {}))
+        }
+
+        path = self._path(session_id, audio_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(audio_data)
+        # 사용 중인 프로세스 디렉터리가 오래된 것으로 정리되지 않도록 갱신
+        os.utime(self.root)
+
+        with self._lock:
+            self._entries[audio_id] = handle
+            self._session_bytes[session_id] += handle["size"]
+            self._total_bytes += handle["size"]
+            self._evict(session_id)
+        return dict(handle)
+
+    def _evict(self, session_id):
+        # 호출 측에서 self._lock 보유
+        if self._session_bytes[session_id] > self.session_budget:
+            for audio_id in [k for k, v in self._entries.items() if v["session_id"] == session_id]:
+                if self._session_bytes[session_id] <= self.session_budget:
+                    break
+                self._remove(audio_id)
+        while self._total_bytes > self.global_budget and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, audio_id):
+        handle = self._entries.pop(audio_id, None)
+        if handle is None:
+            return
+        self._session_bytes[handle["session_id"]] -= handle["size"]
+        self._total_bytes -= handle["size"]
+        if self._session_bytes[handle["session_id"]] <= 0:
+            del self._session_bytes[handle["session_id"]]
+        try:
+            os.remove(self._path(handle["session_id"], audio_id))
+        except OSError:
+            pass
+
+    def read(self, audio_id):
+        """저장된 음성 바이트, 이미 정리되었으면 None"""
+        with self._lock:
+            handle = self._entries.get(audio_id)
+            if handle is None:
+                return None
+            self._entries.move_to_end(audio_id)
+        try:
+            with open(self._path(handle["session_id"], audio_id), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def path(self, audio_id):
+        """저장된 음성 파일 경로, 이미 정리되었으면 None (읽는 쪽에서 조각 단위로 읽을 때 사용)"""
+        with self._lock:
+            handle = self._entries.get(audio_id)
+            if handle is None:
+                return None
+            self._entries.move_to_end(audio_id)
+        return self._path(handle["session_id"], audio_id)
+
+    def list(self, session_id):
+        """세션의 남아 있는 핸들 목록 (생성 순서)"""
+        with self._lock:
+            handles = [dict(h) for h in self._entries.values() if h["session_id"] == session_id]
+        return sorted(handles, key=lambda h: h["created"])
+
+    def contains(self, audio_id):
+        """아직 정리되지 않은 항목인지 확인"""
+        with self._lock:
+            return audio_id in self._entries
+
+    def clear(self, session_id):
+        """세션 히스토리 모두 삭제"""
+        with self._lock:
+            for audio_id in [k for k, v in self._entries.items() if v["session_id"] == session_id]:
+                self._remove(audio_id)
+        shutil.rmtree(os.path.join(self.root, session_id), ignore_errors=True)
+
+    def stats(self):
+        """전체 사용량"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "sessions": len(self._session_bytes),
+                "bytes": self._total_bytes
+            }
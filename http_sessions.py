@@ -0,0 +1,178 @@
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+# 현재 스레드에서 새로 연 연결의 DNS/TCP/TLS 시간 (요청을 보낸 스레드 기준)
+_timings = threading.local()
+
+
+def reset_connection_timings():
+    """현재 스레드의 연결 시간 기록을 0으로 초기화"""
+    _timings.values = {"dns": 0.0, "connect": 0.0, "tls": 0.0, "new_connections": 0}
+
+
+def connection_timings():
+    """reset_connection_timings() 이후 현재 스레드에서 새 연결에 쓴 시간 (재사용 연결은 0)"""
+    values = getattr(_timings, "values", None)
+    return dict(values) if values is not None else {"dns": 0.0, "connect": 0.0, "tls": 0.0, "new_connections": 0}
+
+
+def add_connection_timings(timings):
+    """다른 스레드에서 잰 연결 시간을 현재 스레드 기록에 더함"""
+    for name, value in timings.items():
+        _add_timing(name, value)
+
+
+def _add_timing(name, seconds):
+    values = getattr(_timings, "values", None)
+    if values is not None:
+        values[name] += seconds
+
+
+class _TimedConnectionMixin:
+    """DNS 조회를 직접 한 번 하고 IP로 연결해서 DNS/TCP/TLS 시간을 나누어 기록"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        _add_timing("dns", resolved - started)
+
+        # 이미 조회한 주소로 차례로 연결 시도 (인증서 확인/SNI는 self.host를 그대로 사용)
+        error = None
+        try:
+            for ip in dict.fromkeys(address[4][0] for address in addresses):
+                self._dns_host = ip
+                try:
+                    sock = super()._new_conn()
+                except NewConnectionError as e:
+                    error = e
+                    continue
+                _add_timing("connect", time.perf_counter() - resolved)
+                return sock
+        finally:
+            self._dns_host = host
+        raise error
+
+    def connect(self):
+        started = time.perf_counter()
+        before = connection_timings()
+        super().connect()
+        after = connection_timings()
+        _add_timing("new_connections", 1)
+        if isinstance(self, HTTPSConnection):
+            handshake = (after["dns"] - before["dns"]) + (after["connect"] - before["connect"])
+            _add_timing("tls", max(0.0, time.perf_counter() - started - handshake))
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """새 연결의 DNS/TCP/TLS 시간을 기록하는 어댑터"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool
+        }
+
+
+class ProviderSessions:
+    """서비스별 keep-alive 커넥션 풀 세션 관리"""
+
+    def __init__(self, base_urls, pool_size=10, connect_timeout=5.0, read_timeout=60.0):
+        self.base_urls = dict(base_urls)
+        self.timeout = (connect_timeout, read_timeout)
+        self.sessions = {}
+        self._adapters = {}
+        self._warmup_requests = {provider: 0 for provider in self.base_urls}
+        self._lock = threading.Lock()
+
+        for provider in self.base_urls:
+            # pool_size는 정수(전체 공통) 또는 {서비스: 크기} 딕셔너리
+            size = pool_size.get(provider, 10) if isinstance(pool_size, dict) else pool_size
+            adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(size)))
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self.sessions[provider] = session
+            self._adapters[provider] = adapter
+
+    def post(self, provider, url, **kwargs):
+        """서비스 세션으로 POST 요청 (타임아웃 기본 적용)"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.sessions[provider].post(url, **kwargs)
+
+    def get(self, provider, url, **kwargs):
+        """서비스 세션으로 GET 요청 (타임아웃 기본 적용)"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.sessions[provider].get(url, **kwargs)
+
+    def send(self, provider, prepared, **kwargs):
+        """미리 만든 요청(PreparedRequest)을 서비스 세션으로 전송 (타임아웃 기본 적용)"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.sessions[provider].send(prepared, **kwargs)
+
+    def warm_up(self):
+        """서비스별로 미리 연결을 열어 첫 요청의 TCP/TLS 핸드셰이크 비용 제거"""
+        for provider, base_url in self.base_urls.items():
+            try:
+                self.sessions[provider].head(base_url, timeout=self.timeout).close()
+                with self._lock:
+                    self._warmup_requests[provider] += 1
+            except requests.RequestException:
+                pass
+
+    def stats(self):
+        """서비스별 요청 수, 새 연결 수, 재사용률 (워밍업 요청 포함)"""
+        result = {}
+        for provider, adapter in self._adapters.items():
+            pools = adapter.poolmanager.pools
+            num_requests = 0
+            num_connections = 0
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    num_requests += pool.num_requests
+                    num_connections += pool.num_connections
+
+            reused = max(0, num_requests - num_connections)
+            result[provider] = {
+                "requests": num_requests,
+                "connections": num_connections,
+                "reused": reused,
+                "reuse_rate": reused / num_requests if num_requests > 0 else 0.0,
+                "warmup_requests": self._warmup_requests[provider]
+            }
+        return result
+
+    def close(self):
+        """모든 세션 종료"""
+        for session in self.sessions.values():
+            session.close()
@@ -0,0 +1,184 @@
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 찼거나 세션별 작업 수 한도를 넘어 작업을 받을 수 없음"""
+
+
+class JobQueue:
+    """스크립트 실행과 분리된 백그라운드 생성 작업 대기열
+
+    작업마다 id를 붙여 진행 상황과 결과를 보관하므로 화면을 다시 그리거나 새로고침해도
+    id로 다시 조회할 수 있다. 대기 중인 작업은 세션별로 돌아가며 꺼내서 한 세션이
+    작업을 많이 넣어도 다른 세션이 밀리지 않는다.
+    """
+
+    def __init__(self, workers=4, max_depth=100, max_per_session=3, keep_finished=3600.0):
+        self.max_depth = max_depth
+        self.max_per_session = max_per_session
+        self.keep_finished = keep_finished
+
+        self._jobs = {}
+        # 세션 id → 대기 중인 작업 id (세션 순서대로 돌아가며 하나씩 꺼냄)
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self._counter = itertools.count(1)
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"tts-job-{index}", daemon=True)
+            for index in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, session_id, work, label=""):
+        """작업 추가 후 id 반환
+
+        work(report, cancelled)는 워커 스레드에서 실행되며 결과 목록을 반환한다.
+        report(done, total, message=None)로 진행 상황을 알리고, cancelled(threading.Event)가
+        설정되면 가능한 빨리 멈춘다.
+        """
+        with self._condition:
+            self._expire()
+            queued = sum(len(jobs) for jobs in self._pending.values())
+            if queued >= self.max_depth:
+                raise QueueFullError(f"대기 중인 작업이 너무 많습니다 ({queued}개). 잠시 후 다시 시도해주세요")
+            active = sum(
+                1 for job in self._jobs.values()
+                if job["session_id"] == session_id and job["status"] in ("queued", "running")
+            )
+            if active >= self.max_per_session:
+                raise QueueFullError(f"진행 중인 작업이 이미 {active}개 있습니다. 끝난 뒤 다시 시도해주세요")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "number": next(self._counter),
+                "session_id": session_id,
+                "label": label,
+                "status": "queued",
+                "done": 0,
+                "total": 0,
+                "messages": [],
+                "results": None,
+                "error": None,
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "work": work,
+                "cancelled": threading.Event()
+            }
+            self._pending.setdefault(session_id, deque()).append(job_id)
+            self._condition.notify()
+            return job_id
+
+    def _next_job(self):
+        # 호출 측에서 self._condition 보유
+        session_id, jobs = next(iter(self._pending.items()))
+        job_id = jobs.popleft()
+        # 꺼낸 세션은 맨 뒤로 보내 다음에는 다른 세션의 작업을 먼저 실행
+        del self._pending[session_id]
+        if jobs:
+            self._pending[session_id] = jobs
+        return self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                job = self._next_job()
+                job["status"] = "running"
+                job["started"] = time.time()
+
+            def report(done, total, message=None, job=job):
+                with self._condition:
+                    job["done"] = done
+                    job["total"] = total
+                    if message:
+                        job["messages"].append(message)
+
+            try:
+                results = job["work"](report, job["cancelled"])
+                status, error = ("cancelled" if job["cancelled"].is_set() else "done"), None
+            except Exception as e:
+                results, status, error = None, "failed", str(e)
+
+            with self._condition:
+                job["results"] = results
+                job["status"] = status
+                job["error"] = error
+                job["finished"] = time.time()
+                # 끝난 작업은 결과만 남기고 작업 함수(캡처한 텍스트/설정)는 놓아줌
+                job["work"] = None
+
+    def _expire(self):
+        # 호출 측에서 self._condition 보유
+        now = time.time()
+        for job_id in [
+            k for k, job in self._jobs.items()
+            if job["finished"] is not None and now - job["finished"] > self.keep_finished
+        ]:
+            del self._jobs[job_id]
+
+    def _position(self, job):
+        # 호출 측에서 self._condition 보유 (앞에 남은 대기 작업 수, 세션을 돌아가며 꺼내는 순서 기준)
+        if job["status"] != "queued":
+            return 0
+        order = list(self._pending)
+        rounds = list(self._pending[job["session_id"]]).index(job["id"])
+        mine = order.index(job["session_id"])
+        ahead = 0
+        for index, session_id in enumerate(order):
+            count = len(self._pending[session_id])
+            ahead += min(count, rounds) + (1 if index < mine and count > rounds else 0)
+        return ahead
+
+    def get(self, job_id):
+        """작업 상태 스냅샷 (상태, 진행 수, 메시지, 대기 순번, 결과), 없거나 만료되었으면 None"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = {k: v for k, v in job.items() if k not in ("work", "cancelled")}
+            snapshot["messages"] = list(job["messages"])
+            snapshot["position"] = self._position(job)
+            return snapshot
+
+    def cancel(self, job_id):
+        """대기 중이면 바로 취소, 실행 중이면 취소 신호만 보냄"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job["finished"] is not None:
+                return False
+            job["cancelled"].set()
+            if job["status"] == "queued":
+                jobs = self._pending.get(job["session_id"])
+                jobs.remove(job_id)
+                if not jobs:
+                    del self._pending[job["session_id"]]
+                job["status"] = "cancelled"
+                job["finished"] = time.time()
+                job["work"] = None
+            return True
+
+    def session_jobs(self, session_id):
+        """세션의 작업 id 목록 (추가한 순서)"""
+        with self._condition:
+            jobs = [job for job in self._jobs.values() if job["session_id"] == session_id]
+        return [job["id"] for job in sorted(jobs, key=lambda job: job["number"])]
+
+    def stats(self):
+        """대기/실행 중인 작업 수, 대기 중인 세션 수, 워커 수"""
+        with self._condition:
+            statuses = [job["status"] for job in self._jobs.values()]
+            return {
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "finished": len(statuses) - statuses.count("queued") - statuses.count("running"),
+                "sessions": len(self._pending),
+                "workers": len(self._workers)
+            }
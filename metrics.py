@@ -0,0 +1,208 @@
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# OpenTelemetry는 설치되어 있을 때만 사용 (없으면 span()은 아무것도 하지 않음)
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 기본 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """단조 증가 카운터 (레이블별)"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(tuple(labels[name] for name in self.labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """누적 구간 히스토그램 (레이블별)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labels, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 내보낼 지표 모음"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        # TTSGenerator를 여러 개 만들어도 같은 이름의 지표는 하나만 유지
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, help, labels=()):
+        return self._get_or_create(Counter, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        """Prometheus 텍스트 노출 형식 (0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 전체에서 공유하는 기본 레지스트리
+REGISTRY = MetricsRegistry()
+
+
+class SynthesisMetrics:
+    """음성 생성 결과의 "metrics" 값을 Prometheus 지표로 누적"""
+
+    def __init__(self, registry=REGISTRY):
+        self.requests = registry.counter(
+            "tts_requests_total", "음성 생성 요청 수", ("provider", "status", "cache"))
+        self.retries = registry.counter(
+            "tts_retries_total", "서비스 호출 재시도 수", ("provider",))
+        self.chars = registry.counter(
+            "tts_request_chars_total", "요청한 글자 수", ("provider",))
+        self.bytes = registry.counter(
+            "tts_response_bytes_total", "받은 음성 바이트 수", ("provider",))
+        self.duration = registry.histogram(
+            "tts_request_duration_seconds", "음성 생성 전체 시간", ("provider",))
+        self.ttfb = registry.histogram(
+            "tts_ttfb_seconds", "요청부터 첫 음성 바이트까지 시간", ("provider",))
+        self.dns = registry.histogram(
+            "tts_dns_seconds", "새 연결의 DNS 조회 시간", ("provider",))
+        self.connect = registry.histogram(
+            "tts_connect_seconds", "새 연결의 TCP 연결 시간", ("provider",))
+        self.tls = registry.histogram(
+            "tts_tls_seconds", "새 연결의 TLS 핸드셰이크 시간", ("provider",))
+
+    def record(self, provider, result):
+        """결과 하나 기록 (metrics 값이 없으면 요청 수만 기록)"""
+        metrics = result.get("metrics") or {}
+        self.requests.inc(
+            provider=provider,
+            status="success" if result["success"] else "error",
+            cache="hit" if metrics.get("cache_hit") else ("coalesced" if metrics.get("coalesced") else "miss")
+        )
+        self.retries.inc(metrics.get("retries", 0), provider=provider)
+        self.chars.inc(metrics.get("chars", 0), provider=provider)
+        self.bytes.inc(metrics.get("bytes", 0), provider=provider)
+        if metrics.get("total") is not None:
+            self.duration.observe(metrics["total"], provider=provider)
+        if metrics.get("ttfb") is not None and not metrics.get("cache_hit") and not metrics.get("coalesced"):
+            self.ttfb.observe(metrics["ttfb"], provider=provider)
+        if metrics.get("new_connections"):
+            self.dns.observe(metrics["dns"], provider=provider)
+            self.connect.observe(metrics["connect"], provider=provider)
+            if metrics.get("tls"):
+                self.tls.observe(metrics["tls"], provider=provider)
+
+
+@contextmanager
+def span(name, **attributes):
+    """OpenTelemetry 스팬 (설치되지 않았으면 None)"""
+    if trace is None:
+        yield None
+        return
+    with trace.get_tracer("tts").start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def start_metrics_server(port, registry=REGISTRY, host="0.0.0.0"):
+    """/metrics를 제공하는 별도 HTTP 서버를 백그라운드 스레드로 실행 (Streamlit용)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
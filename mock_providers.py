@@ -0,0 +1,304 @@
+"""오프라인 부하 테스트용 가짜 TTS 서비스 서버
+
+    python mock_providers.py --port 8900 --latency lognormal:300,0.5 --throttle-rate 0.05 --error-rate 0.01
+
+ElevenLabs(/v1/text-to-speech/{voice_id}[/stream]), OpenAI(/v1/audio/speech),
+gTTS(/_/TranslateWebserverUi/data/batchexecute), 음성/모델 목록(/v1/voices, /v1/models) 프로토콜을 흉내 내며 무음 MP3 프레임을 돌려준다.
+TTSGenerator는 ELEVENLABS_BASE_URL / OPENAI_BASE_URL / GOOGLE_TTS_BASE_URL을 이 서버 주소로 지정해서 사용한다.
+"""
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# MPEG-1 Layer III 128kbps 44.1kHz 프레임 (헤더 + 무음 데이터)
+_FRAME_HEADER = b"\xff\xfb\x90\x64"
+_FRAME_SIZE = 417
+SILENT_FRAME = _FRAME_HEADER + b"\x00" * (_FRAME_SIZE - len(_FRAME_HEADER))
+
+ELEVENLABS_PATH = re.compile(r"^/v1/text-to-speech/[^/]+(/stream)?$")
+OPENAI_PATH = "/v1/audio/speech"
+GOOGLE_PATH = "/_/TranslateWebserverUi/data/batchexecute"
+
+# 목록 API 응답 (ETag가 같으면 304)
+_ELEVENLABS_VOICES = {"voices": [
+    {"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel", "labels": {"gender": "female", "accent": "american"}},
+    {"voice_id": "mock-voice", "name": "Mock", "labels": {"gender": "male", "accent": "korean"}}
+]}
+_ELEVENLABS_MODELS = [
+    {"model_id": "eleven_multilingual_v2", "name": "Eleven Multilingual v2", "can_do_text_to_speech": True},
+    {"model_id": "eleven_english_sts_v2", "name": "Eleven English v2 (STS)", "can_do_text_to_speech": False}
+]
+_OPENAI_MODELS = {"object": "list", "data": [
+    {"id": "tts-1", "object": "model"},
+    {"id": "tts-1-hd", "object": "model"},
+    {"id": "gpt-4o-mini", "object": "model"}
+]}
+
+
+def parse_latency(spec, rng=random):
+    """지연 시간 분포 문자열(밀리초)을 초 단위 샘플링 함수로 변환
+
+    fixed:200, uniform:100,400, exponential:200(평균), lognormal:200,0.5(중앙값, 시그마)
+    rng는 샘플링에 쓸 random.Random (기본은 random 모듈)
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v] if params else []
+    if kind == "fixed":
+        delay = values[0] / 1000 if values else 0.0
+        return lambda: delay
+    if kind == "uniform":
+        low, high = values[0] / 1000, values[1] / 1000
+        return lambda: rng.uniform(low, high)
+    if kind == "exponential":
+        mean = values[0] / 1000
+        return lambda: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    if kind == "lognormal":
+        median, sigma = values[0] / 1000, values[1]
+        return lambda: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"지원하지 않는 지연 시간 분포: {spec}")
+
+
+def silent_mp3(size):
+    """size 바이트 이상이 되도록 무음 MP3 프레임을 이어 붙임"""
+    return SILENT_FRAME * max(1, math.ceil(size / _FRAME_SIZE))
+
+
+class MockConfig:
+    """가짜 서버 동작 설정"""
+
+    def __init__(self, latency="fixed:0", error_rate=0.0, throttle_rate=0.0, retry_after=1.0,
+                 chunk_size=4096, chunk_interval=0.0, bytes_per_char=1000, payload_bytes=None, seed=None):
+        self.latency = latency
+        self.seed = seed
+        # 지연 시간/실패 주입에 쓰는 난수 (seed를 주면 같은 순서로 재현)
+        self.random = random.Random(seed)
+        self.sample_latency = parse_latency(latency, self.random)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.chunk_size = chunk_size
+        self.chunk_interval = chunk_interval
+        self.bytes_per_char = bytes_per_char
+        self.payload_bytes = payload_bytes
+
+    def payload(self, text):
+        """텍스트 길이에 비례하는 (또는 고정 크기) 음성 데이터"""
+        size = self.payload_bytes if self.payload_bytes is not None else len(text) * self.bytes_per_char
+        return silent_mp3(size)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockTTS/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _send_bytes(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data, headers=None):
+        self._send_bytes(status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+    def _send_chunked(self, body, content_type):
+        """chunk_interval 간격으로 chunk_size씩 나누어 전송"""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for offset in range(0, len(body), self.config.chunk_size):
+            if offset and self.config.chunk_interval:
+                time.sleep(self.config.chunk_interval)
+            piece = body[offset:offset + self.config.chunk_size]
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _inject_failure(self):
+        """설정된 확률로 429 또는 500 응답을 보내고 True 반환"""
+        roll = self.config.random.random()
+        if roll < self.config.throttle_rate:
+            self.server.count("throttled")
+            self._send_json(429, {"error": {"message": "Rate limit exceeded (mock)"}},
+                            {"Retry-After": f"{self.config.retry_after:g}"})
+            return True
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            self.server.count("errors")
+            self._send_json(500, {"error": {"message": "Internal server error (mock)"}})
+            return True
+        return False
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_listing(self, data):
+        """목록 응답 (If-None-Match가 현재 ETag와 같으면 304)"""
+        etag = '"%08x"' % zlib.crc32(json.dumps(data, sort_keys=True).encode("utf-8"))
+        self.server.count("listings")
+        if self.headers.get("If-None-Match") == etag:
+            self.server.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json(200, data, {"ETag": etag})
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/__stats":
+            self._send_json(200, self.server.stats())
+        elif path == "/v1/voices":
+            self._send_listing(_ELEVENLABS_VOICES)
+        elif path == "/v1/models":
+            # 두 서비스가 같은 경로를 쓰므로 인증 헤더로 구분
+            self._send_listing(_ELEVENLABS_MODELS if self.headers.get("xi-api-key") else _OPENAI_MODELS)
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        body = self._read_body()
+        self.server.count("requests")
+
+        if ELEVENLABS_PATH.match(self.path):
+            text = json.loads(body or b"{}").get("text", "")
+            kind = "elevenlabs"
+        elif self.path == OPENAI_PATH:
+            text = json.loads(body or b"{}").get("input", "")
+            kind = "openai"
+        elif self.path.split("?")[0] == GOOGLE_PATH:
+            # f.req=[[["jQ1olc","[\"텍스트\",\"ko\",null,\"null\"]",null,"generic"]]]
+            rpc = json.loads(parse_qs(body.decode("utf-8")).get("f.req", ["[[[]]]"])[0])
+            text = json.loads(rpc[0][0][1])[0] if rpc[0][0] else ""
+            kind = "google"
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        time.sleep(max(0.0, self.config.sample_latency()))
+        if self._inject_failure():
+            return
+        if not text:
+            self._send_json(400, {"error": {"message": "Empty text (mock)"}})
+            return
+
+        audio = self.config.payload(text)
+        self.server.count(kind)
+        self.server.count("bytes", len(audio))
+        if kind == "google":
+            # gTTS가 찾는 wrb.fr jQ1olc 줄 하나에 base64 오디오 전체를 담음
+            payload = json.dumps([base64.b64encode(audio).decode("ascii")], separators=(",", ":"))
+            line = json.dumps([["wrb.fr", "jQ1olc", payload, None, None, None, "generic"]], separators=(",", ":"))
+            self._send_bytes(200, f")]}}'\n\n{len(line)}\n{line}\n".encode("utf-8"), "application/json; charset=utf-8")
+        else:
+            self._send_chunked(audio, "audio/mpeg")
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    """가짜 ElevenLabs/OpenAI/Google TTS 서버 (start()로 백그라운드 실행)"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, config=None):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockConfig()
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def stats(self):
+        """요청/서비스별/실패 주입 횟수와 전송한 바이트 수"""
+        with self._lock:
+            return dict(self._counters)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-providers", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 부하 테스트용 가짜 TTS 서비스 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="첫 바이트까지 지연 시간 분포 (밀리초): fixed:200, uniform:100,400, exponential:200, lognormal:200,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 응답 비율 (0~1)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="429 응답 비율 (0~1)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 응답의 Retry-After (초)")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="스트리밍 조각 크기 (바이트)")
+    parser.add_argument("--chunk-interval", type=float, default=0.0, help="스트리밍 조각 사이 간격 (초)")
+    parser.add_argument("--bytes-per-char", type=int, default=1000, help="글자당 음성 데이터 크기 (바이트)")
+    parser.add_argument("--payload-bytes", type=int, help="텍스트 길이와 상관없이 고정된 음성 데이터 크기")
+    parser.add_argument("--seed", type=int, help="지연 시간/실패 주입 난수 시드 (지정하면 재현 가능)")
+    args = parser.parse_args(argv)
+
+    try:
+        config = MockConfig(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            retry_after=args.retry_after,
+            chunk_size=args.chunk_size,
+            chunk_interval=args.chunk_interval,
+            bytes_per_char=args.bytes_per_char,
+            payload_bytes=args.payload_bytes,
+            seed=args.seed
+        )
+    except (IndexError, ValueError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+
+    server = MockProviderServer(args.host, args.port, config)
+    print(f"가짜 TTS 서버 실행 중: {server.base_url}", file=sys.stderr)
+    print(f"  ELEVENLABS_BASE_URL={server.base_url} OPENAI_BASE_URL={server.base_url} "
+          f"GOOGLE_TTS_BASE_URL={server.base_url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import bisect
+import math
+import threading
+import time
+from collections import defaultdict, deque
+
+# 자동 선택 모델 id (설정에 이 값을 넣으면 요청마다 ModelRouter가 실제 모델을 고름)
+AUTO_MODEL = "auto"
+
+# 서비스별 자동 선택 후보 (품질이 높은 순, 마지막이 지연이 나빠졌을 때 쓰는 빠른 모델)
+DEFAULT_MODEL_TIERS = {
+    "openai": ("tts-1-hd", "tts-1"),
+    "elevenlabs": ("eleven_multilingual_v2", "eleven_turbo_v2")
+}
+
+# 글자 수 구간별 지연 시간 목표 (구간 상한 글자 수 → 초, 가장 큰 상한을 넘으면 마지막 목표)
+DEFAULT_LATENCY_TARGETS = {200: 3.0, 1000: 6.0, 5000: 15.0}
+
+
+def parse_latency_targets(value):
+    """"200:3,1000:6,5000:15" 형식의 설정값을 {글자 수: 초}로"""
+    targets = {}
+    for item in value.split(","):
+        if item.strip():
+            chars, seconds = item.split(":")
+            targets[int(chars)] = float(seconds)
+    return targets
+
+
+class ModelRouter:
+    """실제 요청의 지연 시간/오류율로 "auto" 모델을 고름
+
+    서비스/모델/글자 수 구간별로 최근 window초 동안의 생성 시간을 모아 두고, 요청마다 품질이 높은
+    모델부터 그 구간의 p90 지연이 목표 안이고 오류율이 max_error_rate 이하인 첫 모델을 고른다.
+    모두 맞추지 못하면 가장 빠른 모델을 쓴다. 표본이 min_samples보다 적은 모델은 일단 시도하므로,
+    느려져서 빠진 모델도 오래된 표본이 window 뒤에 사라지면 다시 시도된다.
+    """
+
+    def __init__(self, tiers=None, latency_targets=None, window=300.0, min_samples=5, max_error_rate=0.2,
+                 quantile=90, max_samples=200):
+        self.tiers = dict(DEFAULT_MODEL_TIERS, **(tiers or {}))
+        targets = latency_targets or DEFAULT_LATENCY_TARGETS
+        self.bounds = sorted(targets)
+        self.targets = [targets[bound] for bound in self.bounds]
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.quantile = quantile
+
+        # (서비스, 모델, 구간) → [(시각, 생성 시간)], (서비스, 모델) → [(시각, 성공 여부)]
+        self._latencies = defaultdict(lambda: deque(maxlen=max_samples))
+        self._outcomes = defaultdict(lambda: deque(maxlen=max_samples))
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"routed": 0, "fallbacks": 0})
+
+    def _bucket(self, chars):
+        return min(bisect.bisect_left(self.bounds, chars), len(self.bounds) - 1)
+
+    def _recent(self, samples, now):
+        # 호출 측에서 self._lock 보유 (window보다 오래된 표본은 버림)
+        while samples and now - samples[0][0] > self.window:
+            samples.popleft()
+        return [value for _, value in samples]
+
+    def _estimate(self, provider, model, bucket, now):
+        """(p90 지연, 오류율), 표본이 부족하면 해당 값은 None"""
+        latencies = sorted(self._recent(self._latencies[(provider, model, bucket)], now))
+        outcomes = self._recent(self._outcomes[(provider, model)], now)
+        latency = latencies[max(0, math.ceil(self.quantile / 100 * len(latencies)) - 1)] \
+            if len(latencies) >= self.min_samples else None
+        error_rate = outcomes.count(False) / len(outcomes) if len(outcomes) >= self.min_samples else None
+        return latency, error_rate
+
+    def choose(self, provider, chars):
+        """chars 글자 요청에 쓸 모델 (지연 목표와 오류율을 만족하는 가장 품질 높은 모델)"""
+        models = self.tiers[provider]
+        bucket = self._bucket(chars)
+        target = self.targets[bucket]
+        now = time.monotonic()
+        with self._lock:
+            for model in models:
+                latency, error_rate = self._estimate(provider, model, bucket, now)
+                if (latency is None or latency <= target) and (error_rate is None or error_rate <= self.max_error_rate):
+                    break
+            else:
+                model = models[-1]
+            self._counters[(provider, model)]["routed"] += 1
+            if model != models[0]:
+                self._counters[(provider, model)]["fallbacks"] += 1
+        return model
+
+    def record(self, provider, model, chars, latency, success):
+        """생성 결과 기록 (자동 선택 후보가 아닌 모델은 무시, 실패는 오류율에만 반영)"""
+        if model not in self.tiers.get(provider, ()):
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._outcomes[(provider, model)].append((now, success))
+            if success:
+                self._latencies[(provider, model, self._bucket(chars))].append((now, latency))
+
+    def stats(self):
+        """서비스/모델별 자동 선택 횟수, 대체 선택 횟수, 오류율, 글자 수 구간별 p90 지연"""
+        now = time.monotonic()
+        stats = {}
+        with self._lock:
+            for provider, models in self.tiers.items():
+                for model in models:
+                    counters = self._counters.get((provider, model), {"routed": 0, "fallbacks": 0})
+                    p90 = {}
+                    error_rate = None
+                    for bucket, bound in enumerate(self.bounds):
+                        latency, error_rate = self._estimate(provider, model, bucket, now)
+                        p90[bound] = latency
+                    stats[f"{provider}/{model}"] = dict(counters, error_rate=error_rate, p90=p90)
+        return stats
@@ -0,0 +1,210 @@
+"""MP3 프레임 헤더 분석 (디코딩 없이 이어 붙이기, 정확한 재생 시간, 탐색 표)
+
+구글/일레븐랩스/OpenAI가 기본으로 돌려주는 MPEG 1/2/2.5 Layer I~III 스트림을 프레임 단위로 읽는다.
+"""
+import bisect
+
+# 비트레이트 표 (kbps) - (MPEG1 여부, 레이어)별
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+
+# 샘플레이트 표 - 버전 비트(3=MPEG1, 2=MPEG2, 0=MPEG2.5)별
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000)
+}
+
+
+def skip_id3v2(data):
+    """앞쪽 ID3v2 태그(여러 개일 수 있음)를 건너뛴 오디오 시작 위치"""
+    offset = 0
+    while len(data) - offset >= 10 and bytes(data[offset:offset + 3]) == b"ID3":
+        size = (data[offset + 6] & 0x7F) << 21 | (data[offset + 7] & 0x7F) << 14 \
+            | (data[offset + 8] & 0x7F) << 7 | (data[offset + 9] & 0x7F)
+        # 푸터 플래그가 있으면 10바이트 더
+        offset += 10 + size + (10 if data[offset + 5] & 0x10 else 0)
+    return min(offset, len(data))
+
+
+def _trailing_tags_start(data, end):
+    """뒤쪽 ID3v1(TAG)/APEv2 태그를 제외한 끝 위치"""
+    if end - 128 >= 0 and bytes(data[end - 128:end - 125]) == b"TAG":
+        end -= 128
+    if end - 32 >= 0 and bytes(data[end - 32:end - 24]) == b"APETAGEX":
+        size = int.from_bytes(data[end - 20:end - 16], "little")
+        end = max(0, end - size - (32 if data[end - 9] & 0x80 else 0))
+    return end
+
+
+def parse_frame_header(data, offset):
+    """offset 위치의 프레임 헤더 (version, layer, bitrate, sample_rate, length, samples, mono), 아니면 None"""
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    # 예약된 값과 자유 비트레이트(0)는 지원하지 않음
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    return {
+        "version": version,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "length": length,
+        "samples": samples,
+        "mono": (b3 >> 6) == 0x03,
+        "crc": not (b1 & 0x01)
+    }
+
+
+def _is_info_frame(data, offset, header):
+    """Xing/Info/VBRI 헤더 프레임인지 (오디오가 없는 메타데이터 프레임)"""
+    if header["layer"] != 3:
+        return False
+    if header["version"] == 3:
+        side_info = 17 if header["mono"] else 32
+    else:
+        side_info = 9 if header["mono"] else 17
+    for position in (offset + 4 + side_info, offset + 6 + side_info):
+        if bytes(data[position:position + 4]) in (b"Xing", b"Info"):
+            return True
+    return bytes(data[offset + 36:offset + 40]) == b"VBRI"
+
+
+def _same_stream(a, b):
+    return a["version"] == b["version"] and a["layer"] == b["layer"] and a["sample_rate"] == b["sample_rate"]
+
+
+def _find_first_frame(data, offset, end):
+    """다음 프레임도 이어서 맞는 첫 프레임 위치와 헤더 (잘못된 동기 바이트를 걸러냄)"""
+    while offset + 4 <= end:
+        header = parse_frame_header(data, offset)
+        if header is not None:
+            following = offset + header["length"]
+            if following == end:
+                return offset, header
+            next_header = parse_frame_header(data, following) if following + 4 <= end else None
+            if next_header is not None and _same_stream(header, next_header):
+                return offset, header
+        offset += 1
+    return None, None
+
+
+def scan(audio_data, seek_interval=1.0):
+    """MP3 데이터를 한 번 훑어 프레임 정보 반환, MP3가 아니면 None
+
+    반환값: audio_start/audio_end(Xing 프레임과 태그를 뺀 오디오 프레임 범위), frames, duration(초),
+    sample_rate, bitrate(평균 bps), seek_table([(초, 바이트 위치)], seek_interval 간격)
+    """
+    data = memoryview(audio_data)
+    end = _trailing_tags_start(data, len(data))
+    offset, first = _find_first_frame(data, skip_id3v2(data), end)
+    if first is None:
+        return None
+
+    if _is_info_frame(data, offset, first):
+        offset += first["length"]
+    audio_start = offset
+
+    frames = 0
+    samples = 0
+    audio_bytes = 0
+    seek_table = []
+    next_seek = 0.0
+    while offset + 4 <= end:
+        header = parse_frame_header(data, offset)
+        if header is None or not _same_stream(header, first):
+            # 깨진 구간은 다음 프레임까지 건너뜀
+            resync, header = _find_first_frame(data, offset + 1, end)
+            if resync is None:
+                break
+            offset = resync
+        if offset + header["length"] > end:
+            # 잘린 마지막 프레임은 제외
+            break
+        elapsed = samples / first["sample_rate"]
+        if elapsed >= next_seek:
+            seek_table.append((elapsed, offset))
+            next_seek += seek_interval
+        frames += 1
+        samples += header["samples"]
+        audio_bytes += header["length"]
+        offset += header["length"]
+
+    duration = samples / first["sample_rate"]
+    return {
+        "audio_start": audio_start,
+        "audio_end": offset,
+        "frames": frames,
+        "duration": duration,
+        "sample_rate": first["sample_rate"],
+        "bitrate": int(audio_bytes * 8 / duration) if duration else 0,
+        "seek_table": seek_table
+    }
+
+
+def duration(audio_data):
+    """정확한 재생 시간(초), MP3가 아니면 None"""
+    info = scan(audio_data, seek_interval=float("inf"))
+    return info["duration"] if info is not None else None
+
+
+def seek_offset(info, seconds):
+    """scan() 결과의 탐색 표로 seconds 위치를 포함하는 프레임의 바이트 위치"""
+    if not info["seek_table"]:
+        return info["audio_start"]
+    index = bisect.bisect_right([t for t, _ in info["seek_table"]], seconds) - 1
+    return info["seek_table"][max(0, index)][1]
+
+
+def strip_headers(audio_data):
+    """ID3 태그와 Xing/Info/VBRI 프레임을 뺀 오디오 프레임만 (MP3가 아니면 그대로)"""
+    info = scan(audio_data, seek_interval=float("inf"))
+    if info is None:
+        return bytes(audio_data)
+    return bytes(memoryview(audio_data)[info["audio_start"]:info["audio_end"]])
+
+
+def concat(parts):
+    """MP3 조각들을 프레임 단위로 이어 붙임 (재인코딩 없음)
+
+    첫 조각의 ID3v2 태그만 남기고, 조각마다 붙은 Xing/Info 프레임(전체 길이가 틀리게 됨)과
+    뒤쪽 태그, 잘린 프레임은 뺀다. MP3로 읽히지 않는 조각은 그대로 붙인다.
+    """
+    pieces = []
+    for index, part in enumerate(parts):
+        data = memoryview(part)
+        info = scan(data, seek_interval=float("inf"))
+        if info is None:
+            pieces.append(data)
+            continue
+        if index == 0:
+            id3_end = skip_id3v2(data)
+            if id3_end:
+                pieces.append(data[:id3_end])
+        pieces.append(data[info["audio_start"]:info["audio_end"]])
+    return b"".join(pieces)
@@ -0,0 +1,274 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환, 없으면 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(result):
+    """재시도하면 성공할 수 있는 실패인지 (429, 5xx, 연결 오류)"""
+    if result["success"]:
+        return False
+    status_code = result.get("status_code")
+    if status_code is None:
+        return result.get("retryable", False)
+    return status_code == 429 or status_code >= 500
+
+
+class TokenBucket:
+    """초당 rate만큼 채워지는 토큰 버킷 (rate가 0이면 제한 없음)"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """토큰을 예약하고 기다려야 할 시간(초) 반환 (부족하면 빚을 지고 그만큼 대기)"""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def try_take(self, amount=1):
+        """토큰이 바로 있으면 가져가고 True, 부족하면 빚을 지지 않고 False"""
+        if not self.rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < amount:
+                return False
+            self._tokens -= amount
+            return True
+
+    def refund(self, amount=1):
+        """try_take로 가져간 토큰을 쓰지 않았을 때 되돌림"""
+        if not self.rate:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class AdaptiveLimit:
+    """AIMD 동시 실행 한도: 성공하면 천천히 늘리고, 429/5xx면 절반으로 줄임"""
+
+    def __init__(self, maximum, minimum=1, decrease_interval=1.0):
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.decrease_interval = decrease_interval
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def try_acquire(self):
+        """기다리지 않고 자리가 있을 때만 차지하고 True"""
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, throttled=False):
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # 동시에 실패한 요청들 때문에 연달아 줄어들지 않도록 간격을 둠
+                if now - self._last_decrease >= self.decrease_interval:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class ProviderScheduler:
+    """모든 서비스 호출을 거치는 스케줄러
+
+    서비스별 토큰 버킷(요청/초, 글자/분)으로 속도를 맞추고, AIMD로 동시 실행 수를 조절하며,
+    429/5xx는 Retry-After 또는 지터 지수 백오프 후 재시도한다.
+    """
+
+    def __init__(self, limits, max_retries=3, base_backoff=0.5, max_backoff=30.0):
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._requests = {}
+        self._chars = {}
+        self._concurrency = {}
+        self._blocked_until = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+        for provider, limit in limits.items():
+            chars_per_min = limit.get("chars_per_min") or 0
+            self._requests[provider] = TokenBucket(limit.get("rps") or 0)
+            self._chars[provider] = TokenBucket(chars_per_min / 60, capacity=chars_per_min)
+            self._concurrency[provider] = AdaptiveLimit(limit.get("max_concurrency", 4))
+            self._blocked_until[provider] = 0.0
+            self._stats[provider] = {
+                "calls": 0,
+                "retries": 0,
+                "throttled": 0,
+                "server_errors": 0,
+                "waited": 0.0
+            }
+
+    def _count(self, provider, name, amount=1):
+        with self._lock:
+            self._stats[provider][name] += amount
+
+    def slot_delay(self, provider, chars):
+        """요청을 보내기 전에 기다려야 할 시간 (Retry-After로 막힌 시간 + 토큰 버킷 대기, 토큰은 예약됨)"""
+        with self._lock:
+            blocked = max(0.0, self._blocked_until[provider] - time.monotonic())
+        wait = max(blocked, self._requests[provider].reserve(1), self._chars[provider].reserve(chars))
+        if wait > 0:
+            self._count(provider, "waited", wait)
+        return wait
+
+    def try_acquire(self, provider, chars):
+        """기다리지 않고 바로 보낼 수 있을 때만 토큰과 동시 실행 자리를 차지하고 True
+
+        헤지처럼 건너뛰어도 되는 요청용이며, True를 받았으면 호출이 끝난 뒤 release()를 불러야 한다.
+        """
+        with self._lock:
+            if self._blocked_until[provider] > time.monotonic():
+                return False
+        if not self._requests[provider].try_take(1):
+            return False
+        if not self._chars[provider].try_take(chars):
+            self._requests[provider].refund(1)
+            return False
+        if not self._concurrency[provider].try_acquire():
+            self._requests[provider].refund(1)
+            self._chars[provider].refund(chars)
+            return False
+        return True
+
+    def try_acquire_slot(self, provider):
+        """기다리지 않고 동시 실행 자리만 차지하고 True (토큰은 slot_delay로 따로 예약, 비동기 엔진용)"""
+        return self._concurrency[provider].try_acquire()
+
+    def release(self, provider, result):
+        """try_acquire/try_acquire_slot으로 차지한 동시 실행 자리 반환 (429/5xx 결과면 동시 실행 한도를 줄임)"""
+        status_code = result.get("status_code") if result else None
+        throttled = status_code == 429 or (status_code is not None and status_code >= 500)
+        self._concurrency[provider].release(throttled=throttled)
+
+    def backoff(self, attempt):
+        """지터를 넣은 지수 백오프 시간 (full jitter)"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def retry_delay(self, provider, attempt, result, deadline_at=None):
+        """호출 결과를 집계하고 다시 시도하기 전에 기다릴 시간 반환 (재시도하지 않으면 None)"""
+        self._count(provider, "calls")
+        status_code = result.get("status_code")
+        if status_code == 429:
+            self._count(provider, "throttled")
+        elif status_code is not None and status_code >= 500:
+            self._count(provider, "server_errors")
+
+        if not is_retryable(result) or attempt == self.max_retries:
+            return None
+
+        retry_after = result.get("retry_after")
+        if retry_after is not None:
+            # 같은 서비스의 다른 요청도 Retry-After 동안 대기
+            with self._lock:
+                self._blocked_until[provider] = max(self._blocked_until[provider], time.monotonic() + retry_after)
+            delay = retry_after + random.uniform(0, self.base_backoff)
+        else:
+            delay = self.backoff(attempt)
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            return None
+        self._count(provider, "retries")
+        return delay
+
+    def _releaser(self, provider):
+        """동시 실행 자리를 한 번만 반환하는 release(result) 함수"""
+        released = []
+        lock = threading.Lock()
+
+        def release(result):
+            with lock:
+                if released:
+                    return
+                released.append(True)
+            self.release(provider, result)
+        return release
+
+    def call(self, provider, chars, fn, deadline_at=None, detach=False):
+        """fn()을 속도 제한 안에서 실행하고 429/5xx/연결 오류면 재시도
+
+        fn은 결과 딕셔너리를 반환하며, 실패시 status_code와 retry_after를 담을 수 있다.
+        deadline_at(time.monotonic 기준)을 넘기게 되는 재시도는 하지 않는다.
+        detach=True면 fn(release)로 부르고 동시 실행 자리를 fn에 넘긴다. fn은 실제 요청이 끝났을 때
+        (fn이 먼저 돌아온 뒤 다른 스레드에서라도) release(결과)를 한 번 불러야 한다.
+        """
+        limit = self._concurrency[provider]
+        for attempt in range(self.max_retries + 1):
+            wait = self.slot_delay(provider, chars)
+            if wait > 0:
+                time.sleep(wait)
+            limit.acquire()
+            if detach:
+                release = self._releaser(provider)
+                try:
+                    result = fn(release)
+                except BaseException:
+                    release(None)
+                    raise
+            else:
+                throttled = False
+                try:
+                    result = fn()
+                    status_code = result.get("status_code")
+                    throttled = status_code == 429 or (status_code is not None and status_code >= 500)
+                finally:
+                    limit.release(throttled=throttled)
+
+            delay = self.retry_delay(provider, attempt, result, deadline_at)
+            if delay is None:
+                return result
+            time.sleep(delay)
+        return result
+
+    def stats(self):
+        """서비스별 호출/재시도/제한 횟수와 현재 동시 실행 한도"""
+        with self._lock:
+            stats = {provider: dict(values) for provider, values in self._stats.items()}
+        for provider, limit in self._concurrency.items():
+            stats[provider]["concurrency_limit"] = int(limit.limit)
+            stats[provider]["in_flight"] = limit.in_flight
+            stats[provider]["waited"] = round(stats[provider]["waited"], 3)
+        return stats
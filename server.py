@@ -0,0 +1,245 @@
+import json
+import os
+import re
+import time
+
+from flask import Flask, Response, abort, jsonify, render_template, request, send_file, stream_with_context
+
+from metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, span
+from shared_store import SharedStore
+from tts_generator import AUDIO_MIME_TYPES, TTSStreamError, create_tts_generator
+from zip_export import iter_zip
+
+# 생성된 음성 파일 저장 위치
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
+
+# 입력 가능한 최대 글자 수
+MAX_TEXT_CHARS = int(os.getenv("MAX_TEXT_CHARS", 100000))
+
+# 한 번에 요청 가능한 서비스별 최대 생성 개수
+MAX_GENERATION_COUNT = int(os.getenv("MAX_GENERATION_COUNT", 10))
+
+# 한 번에 ZIP으로 내려받을 수 있는 최대 파일 수
+MAX_ZIP_FILES = int(os.getenv("MAX_ZIP_FILES", 200))
+
+SERVICES = ("google", "elevenlabs", "openai")
+FILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+app = Flask(__name__)
+tts_generator = create_tts_generator()
+
+# 생성된 음성은 노드 공유 저장소에 두어 어느 워커/레플리카에서든 내려받을 수 있게 함
+# (합성 캐시와 같은 저장소라서 같은 음성은 한 번만 저장됨)
+shared_store = getattr(tts_generator.cache, "shared", None) or SharedStore(os.path.join(OUTPUT_DIR, "shared"))
+
+
+def save_result(result):
+    """생성된 음성을 공유 저장소에 저장하고 file_id 반환"""
+    audio_format = result.get("settings", {}).get("response_format", "mp3")
+    meta = {
+        "service": result["service"],
+        "filename": result["filename"],
+        "mimetype": AUDIO_MIME_TYPES.get(audio_format, "audio/mpeg"),
+        "settings": result.get("settings", {})
+    }
+    return shared_store.publish(result["audio_data"], meta)
+
+
+def load_meta(file_id):
+    """저장된 음성 파일 경로와 메타데이터"""
+    found = shared_store.open_file(file_id) if FILE_ID_PATTERN.match(file_id) else None
+    if found is None:
+        abort(404)
+    return found
+
+
+def parse_generate_request(data):
+    """/generate 요청 검증 후 (텍스트, 서비스별 설정, 생성 개수) 반환, 잘못된 요청이면 (None, 오류 메시지)"""
+    if not isinstance(data, dict):
+        return None, "요청 형식이 올바르지 않습니다"
+    text = data.get("text") or ""
+    services = data.get("services") or []
+    settings = data.get("settings") or {}
+    if not isinstance(text, str) or not isinstance(services, list):
+        return None, "요청 형식이 올바르지 않습니다"
+    if not isinstance(settings, dict):
+        return None, "설정 형식이 올바르지 않습니다"
+    text = text.strip()
+    services = [s for s in services if s in SERVICES]
+
+    if not text:
+        return None, "텍스트를 입력해주세요"
+    if not services:
+        return None, "AI 서비스를 하나 이상 선택해주세요"
+    if len(text) > MAX_TEXT_CHARS:
+        return None, f"텍스트가 너무 깁니다. {MAX_TEXT_CHARS}자 이하로 입력해주세요"
+
+    try:
+        count = int(data.get("count") or 1)
+    except (TypeError, ValueError):
+        return None, "생성 개수가 올바르지 않습니다"
+    count = max(1, min(count, MAX_GENERATION_COUNT))
+
+    settings_by_provider = {}
+    for service in services:
+        service_settings = settings.get(service) or {}
+        if not isinstance(service_settings, dict):
+            return None, f"{service} 설정 형식이 올바르지 않습니다"
+        service_settings = dict(service_settings)
+        service_settings.pop("count", None)
+        settings_by_provider[service] = service_settings
+    return (text, settings_by_provider, count), None
+
+
+@app.route("/")
+def index():
+    return render_template("index.html", max_text_chars=MAX_TEXT_CHARS)
+
+
+@app.route("/generate", methods=["POST"])
+def generate():
+    """음성 생성 후 파일로 저장하고 결과 목록 반환"""
+    data = request.get_json(silent=True) or {}
+    parsed, error = parse_generate_request(data)
+    if error:
+        return jsonify({"error": error}), 400
+    text, settings_by_provider, count = parsed
+
+    # incremental: 문장 단위로 생성/캐시해서 고친 문장만 다시 생성
+    incremental = bool(data.get("incremental"))
+    attributes = {"tts.chars": len(text), "tts.providers": ",".join(settings_by_provider), "tts.count": count}
+    with span("tts.generate", **attributes) as generate_span:
+        # fastest: "ordered" 또는 "race"면 가장 먼저 성공한 서비스 하나만 생성
+        if data.get("fastest") in ("ordered", "race"):
+            results = [tts_generator.generate_fastest(
+                text, settings_by_provider, mode=data["fastest"], incremental=incremental
+            )]
+        else:
+            jobs = tts_generator.build_jobs(settings_by_provider, count)
+            results = [None] * len(jobs)
+            for index, result in tts_generator.generate_many(text, jobs, incremental):
+                results[index] = result
+        if generate_span is not None:
+            generate_span.set_attribute("tts.succeeded", sum(1 for r in results if r["success"]))
+
+    response = []
+    for result in results:
+        if result["success"]:
+            response.append({
+                "success": True,
+                "service": result["service"],
+                "filename": result["filename"],
+                "file_id": save_result(result),
+                "cached": result.get("cached", False),
+                "metrics": result.get("metrics")
+            })
+        else:
+            response.append({
+                "success": False,
+                "service": result["service"],
+                "error": result["error"]
+            })
+    return jsonify({"results": response})
+
+
+@app.route("/stream", methods=["GET", "POST"])
+def stream():
+    """첫 오디오 조각이 도착하는 즉시 클라이언트로 전달하는 스트리밍 생성"""
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict) or not isinstance(data.get("text") or "", str):
+            return jsonify({"error": "요청 형식이 올바르지 않습니다"}), 400
+        provider, text, settings = data.get("service"), (data.get("text") or "").strip(), data.get("settings") or {}
+    else:
+        provider, text = request.args.get("service"), (request.args.get("text") or "").strip()
+        try:
+            settings = json.loads(request.args.get("settings") or "{}")
+        except ValueError:
+            return jsonify({"error": "설정 형식이 올바르지 않습니다"}), 400
+    if not isinstance(settings, dict):
+        return jsonify({"error": "설정 형식이 올바르지 않습니다"}), 400
+
+    if provider not in SERVICES:
+        return jsonify({"error": "지원하지 않는 서비스입니다"}), 400
+    if not text:
+        return jsonify({"error": "텍스트를 입력해주세요"}), 400
+    if len(text) > MAX_TEXT_CHARS:
+        return jsonify({"error": f"텍스트가 너무 깁니다. {MAX_TEXT_CHARS}자 이하로 입력해주세요"}), 400
+
+    try:
+        info, chunks = tts_generator.open_stream(provider, text, settings)
+    except TTSStreamError as e:
+        return jsonify({"error": e.error, "service": e.service}), 502
+
+    audio_format = settings.get("response_format", "mp3")
+    return Response(
+        stream_with_context(chunks),
+        mimetype=AUDIO_MIME_TYPES.get(audio_format, "audio/mpeg"),
+        headers={"Content-Disposition": f'inline; filename="{info["filename"]}"'}
+    )
+
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus 지표 (gunicorn 워커마다 따로 집계됨)"""
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route("/download/<file_id>")
+def download(file_id):
+    audio_path, meta = load_meta(file_id)
+    return send_file(audio_path, mimetype=meta["mimetype"], as_attachment=True, download_name=meta["filename"])
+
+
+@app.route("/download-all")
+def download_all():
+    """?ids=id1,id2,...의 음성 파일을 ZIP 하나로 묶어 만드는 대로 전송 (manifest.json 포함)"""
+    file_ids = [file_id for file_id in (request.args.get("ids") or "").split(",") if file_id]
+    if not file_ids:
+        return jsonify({"error": "내려받을 파일을 지정해주세요"}), 400
+    if len(file_ids) > MAX_ZIP_FILES:
+        return jsonify({"error": f"한 번에 {MAX_ZIP_FILES}개까지 내려받을 수 있습니다"}), 400
+
+    def entries():
+        # 파일마다 필요할 때 조회 (정리된 파일은 manifest에 missing으로 기록)
+        for file_id in file_ids:
+            found = shared_store.open_file(file_id) if FILE_ID_PATTERN.match(file_id) else None
+            if found is None:
+                yield {"name": f"{file_id}.mp3", "path": None, "meta": {"file_id": file_id}}
+                continue
+            audio_path, meta = found
+            yield {
+                "name": meta["filename"],
+                "path": audio_path,
+                "meta": {"file_id": file_id, "service": meta["service"], "settings": meta.get("settings", {})}
+            }
+
+    archive_name = time.strftime("tts_%Y%m%d_%H%M%S.zip")
+    return Response(
+        stream_with_context(iter_zip(entries(), {"created": time.strftime("%Y-%m-%dT%H:%M:%S%z")})),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{archive_name}"'}
+    )
+
+
+@app.route("/play/<file_id>")
+def play(file_id):
+    audio_path, meta = load_meta(file_id)
+    return send_file(audio_path, mimetype=meta["mimetype"], conditional=True)
+
+
+@app.route("/cleanup", methods=["POST"])
+def cleanup():
+    """요청한 쪽이 받은 음성 파일만 삭제 ({"file_ids": [...]}, 나머지는 TTL/용량 제한으로 정리)"""
+    data = request.get_json(silent=True)
+    file_ids = data.get("file_ids") if isinstance(data, dict) else None
+    if not isinstance(file_ids, list) or not all(isinstance(file_id, str) for file_id in file_ids):
+        return jsonify({"error": "file_ids 목록이 필요합니다"}), 400
+    if len(file_ids) > MAX_ZIP_FILES:
+        return jsonify({"error": f"한 번에 {MAX_ZIP_FILES}개까지 정리할 수 있습니다"}), 400
+    removed = shared_store.remove_files(file_id for file_id in file_ids if FILE_ID_PATTERN.match(file_id))
+    return jsonify({"message": f"{removed}개의 파일이 정리되었습니다"})
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), threaded=True)
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used);
+CREATE TABLE IF NOT EXISTS syntheses (
+    cache_key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS syntheses_digest ON syntheses (digest);
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_digest ON files (digest);
+"""
+
+# 읽을 때마다 쓰지 않도록 마지막 사용 시각은 이 간격(초)보다 오래되었을 때만 갱신
+_TOUCH_INTERVAL = 60.0
+
+
+class SharedStore:
+    """같은 노드의 모든 워커/레플리카가 함께 쓰는 음성 저장소
+
+    음성은 내용의 SHA-256 이름으로 blobs/ 아래에 한 번만 저장하고(임시 파일 → os.replace),
+    SQLite(WAL) 색인에 합성 캐시 키와 다운로드 file_id를 기록한다. 같은 합성을 여러 워커가
+    동시에 저장해도 INSERT OR IGNORE로 먼저 쓴 쪽만 남는다.
+    """
+
+    def __init__(self, root, max_bytes=2 * 1024 * 1024 * 1024, ttl=7 * 24 * 3600):
+        # 반환하는 음성 경로를 작업 디렉터리와 관계없이 쓸 수 있도록 절대 경로로 보관
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = os.path.join(self.root, "index.db")
+
+        self._local = threading.local()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "deduplicated": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+
+    def _db(self):
+        """스레드별 SQLite 연결 (자동 커밋, 쓰기는 BEGIN IMMEDIATE로 묶음)"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}.audio")
+
+    def _write_blob(self, digest, audio_data):
+        """음성 파일이 없으면 저장 (색인 쓰기 트랜잭션 안에서 호출, 삭제와 겹치지 않음)"""
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            self._count("deduplicated")
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_data)
+            # 다른 워커에게는 완성된 파일만 보임
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _insert(self, table, key_column, key, audio_data, meta):
+        """음성 파일과 색인을 함께 저장하고 새로 쓴 행 수 반환
+
+        삭제(_delete_blobs)도 같은 쓰기 잠금 안에서 색인과 파일을 함께 지우므로, 잠금을 잡은 뒤
+        파일을 확인/저장하면 색인이 없는 파일을 가리키는 일이 없다. 만료된 항목은 새 값으로 바꾼다.
+        키 행을 먼저 쓰고 그 행이 이겼을 때만 음성을 저장하므로 아무도 가리키지 않는 음성은 남지 않는다.
+        """
+        digest = hashlib.sha256(audio_data).hexdigest()
+        now = time.time()
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            previous = db.execute(f"SELECT digest FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+            inserted = db.execute(
+                f"INSERT INTO {table} ({key_column}, digest, meta, created) VALUES (?, ?, ?, ?) "
+                f"ON CONFLICT({key_column}) DO UPDATE SET digest = excluded.digest, meta = excluded.meta, "
+                f"created = excluded.created WHERE {table}.created < ?",
+                (key, digest, json.dumps(meta, ensure_ascii=False), now, now - self.ttl)
+            ).rowcount
+            if inserted:
+                self._write_blob(digest, audio_data)
+                db.execute(
+                    "INSERT INTO blobs (digest, size, created, last_used) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(digest) DO UPDATE SET last_used = excluded.last_used",
+                    (digest, len(audio_data), now, now)
+                )
+                # 만료된 항목을 바꿨으면 이전 음성을 아무도 쓰지 않을 때 함께 삭제
+                if previous is not None and previous[0] != digest:
+                    self._delete_blobs(db, self._unreferenced(db, [previous[0]]))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def _unreferenced(self, db, digests):
+        # 합성 캐시와 다운로드 어디에서도 가리키지 않는 음성만
+        return [
+            digest for digest in digests
+            if db.execute(
+                "SELECT 1 FROM syntheses WHERE digest = ? UNION ALL SELECT 1 FROM files WHERE digest = ? LIMIT 1",
+                (digest, digest)
+            ).fetchone() is None
+        ]
+
+    def _touch(self, digest):
+        now = time.time()
+        try:
+            self._db().execute(
+                "UPDATE blobs SET last_used = ? WHERE digest = ? AND last_used < ?",
+                (now, digest, now - _TOUCH_INTERVAL)
+            )
+        except sqlite3.OperationalError:
+            # 다른 워커가 쓰는 중이면 LRU 갱신은 건너뜀
+            pass
+
+    def get(self, key):
+        """합성 캐시 조회, 없거나 만료되면 None (SynthesisCache 디스크 항목과 같은 형태)"""
+        row = self._db().execute(
+            "SELECT digest, meta, created FROM syntheses WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        digest, meta, created = row
+        if time.time() - created > self.ttl:
+            # 만료된 항목은 지워서 다음 저장 때 새로 쓰이게 함
+            self._drop_synthesis(key, digest, created)
+            self._count("misses")
+            return None
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                audio_data = f.read()
+        except OSError:
+            # 다른 워커가 정리한 음성을 가리키는 항목은 지워서 다시 저장될 수 있게 함
+            self._drop_synthesis(key, digest)
+            self._count("misses")
+            return None
+        self._touch(digest)
+        self._count("hits")
+        return {"audio_data": audio_data, "meta": json.loads(meta), "created_at": created}
+
+    def _drop_synthesis(self, key, digest, created=None):
+        """합성 캐시 항목 삭제 (그사이 다른 워커가 새로 쓴 항목은 남김), 더 쓰이지 않는 음성도 함께 삭제"""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if created is None:
+                db.execute("DELETE FROM syntheses WHERE cache_key = ? AND digest = ?", (key, digest))
+            else:
+                db.execute("DELETE FROM syntheses WHERE cache_key = ? AND created = ?", (key, created))
+            self._delete_blobs(db, self._unreferenced(db, [digest]))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def put(self, key, audio_data, meta):
+        """합성 결과 저장 (이미 다른 워커가 저장한 키면 그대로 둠)"""
+        if self._insert("syntheses", "cache_key", key, audio_data, meta):
+            self._count("writes")
+        else:
+            self._count("deduplicated")
+        self._evict()
+
+    def publish(self, audio_data, meta):
+        """다운로드용 음성 저장 후 file_id 반환 (어느 워커에서든 open_file로 조회 가능)"""
+        file_id = uuid.uuid4().hex
+        self._insert("files", "file_id", file_id, audio_data, meta)
+        self._count("writes")
+        self._evict()
+        return file_id
+
+    def open_file(self, file_id):
+        """file_id의 (음성 파일 경로, 메타데이터), 없으면 None"""
+        row = self._db().execute("SELECT digest, meta FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        if row is None:
+            return None
+        path = self._blob_path(row[0])
+        if not os.path.exists(path):
+            return None
+        self._touch(row[0])
+        return path, json.loads(row[1])
+
+    def _delete_blobs(self, db, digests):
+        # 호출 측의 쓰기 트랜잭션 안에서 색인과 파일을 함께 지움
+        # (읽는 중인 워커는 열린 파일을 끝까지 읽을 수 있음)
+        for digest in digests:
+            db.execute("DELETE FROM syntheses WHERE digest = ?", (digest,))
+            db.execute("DELETE FROM files WHERE digest = ?", (digest,))
+            db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """용량을 넘으면 가장 오래 사용하지 않은 음성부터 삭제"""
+        db = self._db()
+        if db.execute("SELECT total(size) FROM blobs").fetchone()[0] <= self.max_bytes:
+            return
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # 잠금을 잡은 뒤 다시 계산 (그사이 다른 워커가 정리했을 수 있음)
+            total = db.execute("SELECT total(size) FROM blobs").fetchone()[0]
+            victims = []
+            for digest, size in db.execute("SELECT digest, size FROM blobs ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                victims.append(digest)
+                total -= size
+            self._delete_blobs(db, victims)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self._count("evictions", len(victims))
+
+    def remove_files(self, file_ids):
+        """지정한 다운로드용 음성만 삭제 (다른 file_id나 합성 캐시가 함께 쓰는 음성은 남김), 삭제한 file_id 수 반환"""
+        file_ids = list(file_ids)
+        if not file_ids:
+            return 0
+        placeholders = ",".join("?" * len(file_ids))
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            digests = {
+                row[0] for row in db.execute(
+                    f"SELECT digest FROM files WHERE file_id IN ({placeholders})", file_ids
+                ).fetchall()
+            }
+            removed = db.execute(f"DELETE FROM files WHERE file_id IN ({placeholders})", file_ids).rowcount
+            self._delete_blobs(db, self._unreferenced(db, digests))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return removed
+
+    def stats(self):
+        """이 프로세스의 히트/미스/중복 제거 횟수와 저장소 전체 사용량"""
+        db = self._db()
+        with self._lock:
+            stats = dict(self._counters)
+        stats["blobs"], stats["bytes"] = db.execute("SELECT count(*), total(size) FROM blobs").fetchone()
+        stats["bytes"] = int(stats["bytes"])
+        stats["syntheses"] = db.execute("SELECT count(*) FROM syntheses").fetchone()[0]
+        stats["files"] = db.execute("SELECT count(*) FROM files").fetchone()[0]
+        return stats
@@ -0,0 +1,119 @@
+"""진행 중인 같은 요청 합치기 (single-flight)
+
+먼저 온 호출(리더)만 실제로 실행하고, 실행 중에 같은 키로 들어온 호출은 기다렸다가
+같은 결과(또는 같은 예외)를 받는다. 끝난 뒤에 들어온 호출은 다시 실행한다.
+"""
+import asyncio
+import threading
+
+
+class _Counters:
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def join(self, call):
+        # 기다리는 호출 추가 (호출 측에서 잠금 보유)
+        call["waiters"] += 1
+        self.coalesced += 1
+        self.max_waiters = max(self.max_waiters, call["waiters"])
+
+    def snapshot(self, calls):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / self.calls if self.calls else 0.0,
+            "in_flight": len(calls),
+            "waiting": sum(call["waiters"] for call in calls.values()),
+            "max_waiters": self.max_waiters
+        }
+
+
+class SingleFlight:
+    """스레드용: 같은 키로 동시에 들어온 fn() 호출을 하나로 합침"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    def do(self, key, fn):
+        """(결과, 다른 호출의 결과를 받았는지) 반환"""
+        with self._lock:
+            self._counters.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "waiters": 0, "result": None, "error": None}
+                self._counters.executions += 1
+            else:
+                self._counters.join(call)
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+
+        try:
+            call["result"] = fn()
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+        return call["result"], False
+
+    def stats(self):
+        """호출/실행/합쳐진 호출 수, 합쳐진 비율, 진행 중인 키와 기다리는 호출 수"""
+        with self._lock:
+            return self._counters.snapshot(self._calls)
+
+
+class AsyncSingleFlight:
+    """asyncio용: 같은 키로 동시에 들어온 await fn() 호출을 하나로 합침
+
+    실행은 별도 작업(Task)으로 하므로 호출 하나가 취소되어도 나머지는 계속 기다리고,
+    기다리는 호출이 모두 취소되었을 때만 실행도 취소한다. 이벤트 루프 하나에서만 사용한다.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._counters = _Counters()
+
+    async def do(self, key, fn):
+        """(결과, 다른 호출의 결과를 받았는지) 반환"""
+        self._counters.calls += 1
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = {"task": task, "waiters": 0, "callers": 1}
+            self._counters.executions += 1
+            task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self._counters.join(call)
+            call["callers"] += 1
+
+        try:
+            return await asyncio.shield(call["task"]), not leader
+        except asyncio.CancelledError:
+            call["callers"] -= 1
+            if call["callers"] == 0:
+                # 취소된 실행에 새 호출이 붙지 않도록 바로 뺌
+                self._forget(key, call)
+                call["task"].cancel()
+            raise
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self):
+        """호출/실행/합쳐진 호출 수, 합쳐진 비율, 진행 중인 키와 기다리는 호출 수"""
+        return self._counters.snapshot(self._calls)
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# 캐시 키에서 제외할 설정 (음성 결과에 영향을 주지 않는 값)
+IGNORED_SETTINGS = {"count"}
+
+
+def normalize_settings(settings):
+    """캐시 키용 설정 정규화 (키 정렬, 실수 반올림, 불필요한 값 제거)"""
+    normalized = {}
+    for key, value in sorted((settings or {}).items()):
+        if key in IGNORED_SETTINGS or value is None:
+            continue
+        if isinstance(value, bool):
+            normalized[key] = value
+        elif isinstance(value, (int, float)):
+            normalized[key] = round(float(value), 4)
+        elif isinstance(value, str):
+            normalized[key] = value.strip()
+        else:
+            normalized[key] = value
+    return normalized
+
+
+def make_cache_key(provider, model, voice, settings, text):
+    """(서비스, 모델, 음성, 설정, 텍스트)의 SHA-256 해시"""
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "voice": voice,
+            "settings": normalize_settings(settings),
+            "text": text
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SynthesisCache:
+    """메모리 LRU + 디스크 2단계 음성 합성 캐시
+
+    shared(SharedStore)를 주면 디스크 단계 대신 같은 노드의 모든 워커가 함께 쓰는 저장소를 사용한다.
+    """
+
+    def __init__(self, cache_dir, memory_max_bytes=64 * 1024 * 1024, disk_max_bytes=1024 * 1024 * 1024, ttl=7 * 24 * 3600,
+                 shared=None):
+        self.cache_dir = cache_dir
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+        self.shared = shared
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expired": 0
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._disk_bytes = sum(os.path.getsize(path) for path in self._disk_files())
+
+    def _paths(self, key):
+        directory = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(directory, f"{key}.audio"), os.path.join(directory, f"{key}.json")
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith((".audio", ".json")):
+                    yield os.path.join(root, name)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key):
+        """캐시 조회 (메모리 → 디스크), 없거나 만료되면 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry["created_at"] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return entry
+                self._remove_memory(key)
+                self._counters["expired"] += 1
+
+        if self.shared is not None:
+            return self._get_shared(key)
+
+        audio_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if now - meta["created_at"] > self.ttl:
+                self._remove_disk(key)
+                self._count("expired")
+                self._count("misses")
+                return None
+            with open(audio_path, "rb") as f:
+                audio_data = f.read()
+            # 디스크 LRU 순서 갱신
+            os.utime(audio_path)
+        except (OSError, ValueError, KeyError):
+            self._count("misses")
+            return None
+
+        entry = {"audio_data": audio_data, "meta": meta["meta"], "created_at": meta["created_at"]}
+        with self._lock:
+            self._store_memory(key, entry)
+            self._counters["disk_hits"] += 1
+        return entry
+
+    def _get_shared(self, key):
+        try:
+            entry = self.shared.get(key)
+        except sqlite3.Error:
+            entry = None
+        if entry is None:
+            self._count("misses")
+            return None
+        with self._lock:
+            self._store_memory(key, entry)
+            self._counters["disk_hits"] += 1
+        return entry
+
+    def put(self, key, audio_data, meta):
+        """메모리와 디스크(또는 공유 저장소)에 저장"""
+        entry = {"audio_data": audio_data, "meta": meta, "created_at": time.time()}
+        with self._lock:
+            self._store_memory(key, entry)
+            self._counters["writes"] += 1
+
+        if self.shared is not None:
+            try:
+                self.shared.put(key, audio_data, meta)
+            except (OSError, sqlite3.Error):
+                pass
+            return
+
+        audio_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+        try:
+            previous = sum(os.path.getsize(p) for p in (audio_path, meta_path) if os.path.exists(p))
+            written = self._atomic_write(audio_path, audio_data)
+            written += self._atomic_write(
+                meta_path,
+                json.dumps({"meta": meta, "created_at": entry["created_at"]}, ensure_ascii=False).encode("utf-8")
+            )
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes += written - previous
+        self._evict_disk()
+
+    def _atomic_write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(data)
+
+    def _store_memory(self, key, entry):
+        # 호출 측에서 self._lock 보유
+        if key in self._memory:
+            self._remove_memory(key)
+        size = len(entry["audio_data"])
+        if size > self.memory_max_bytes:
+            return
+        self._memory[key] = entry
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            oldest = next(iter(self._memory))
+            self._remove_memory(oldest)
+            self._counters["evictions"] += 1
+
+    def _remove_memory(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry["audio_data"])
+
+    def _remove_disk(self, key):
+        removed = 0
+        for path in self._paths(key):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                removed += size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes -= removed
+
+    def _evict_disk(self):
+        """디스크 용량 초과시 가장 오래 사용하지 않은 항목부터 삭제"""
+        if self._disk_bytes <= self.disk_max_bytes:
+            return
+        entries = []
+        for path in self._disk_files():
+            if path.endswith(".audio"):
+                try:
+                    entries.append((os.path.getmtime(path), os.path.basename(path)[:-len(".audio")]))
+                except OSError:
+                    pass
+        for _, key in sorted(entries):
+            if self._disk_bytes <= self.disk_max_bytes:
+                break
+            self._remove_disk(key)
+            self._count("evictions")
+
+    def stats(self):
+        """히트/미스 카운터와 사용량"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_bytes"] = self._memory_bytes
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_bytes"] = self._disk_bytes
+        if self.shared is not None:
+            try:
+                stats["disk_bytes"] = self.shared.stats()["bytes"]
+            except sqlite3.Error:
+                pass
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for path in list(self._disk_files()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = 0
@@ -0,0 +1,119 @@
+import re
+import unicodedata
+
+# 문단 구분 (빈 줄)
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# 문장 구분 (문장부호 뒤 공백 또는 줄바꿈)
+SENTENCE_BREAK = re.compile(r'(?<=[.!?。！？…])\s+|\n+')
+
+# 문장이 너무 길 때 쓰는 보조 구분 (쉼표, 세미콜론 등)
+CLAUSE_BREAK = re.compile(r'(?<=[,;:，、])\s+')
+
+# 문장 단위 조각에서 이보다 짧은 문장(목록 번호, 짧은 감탄사 등)은 다음 문장과 합침
+MIN_SEGMENT_CHARS = 8
+
+
+def split_paragraphs(text):
+    """빈 줄 기준 문단 목록"""
+    return [p.strip() for p in PARAGRAPH_BREAK.split(text) if p.strip()]
+
+
+def split_sentences(text):
+    """문장부호/줄바꿈 기준 문장 목록"""
+    return [s.strip() for s in SENTENCE_BREAK.split(text) if s and s.strip()]
+
+
+def _split_hard(text, max_chars):
+    """공백 기준으로 자르고, 그래도 긴 단어는 글자 수로 자름"""
+    pieces = []
+    current = ""
+    for word in text.split():
+        while len(word) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if not word:
+            continue
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _pack(units, max_chars, separator):
+    """작은 조각들을 max_chars를 넘지 않도록 순서대로 묶음"""
+    chunks = []
+    current = ""
+    for unit in units:
+        if current and len(current) + len(separator) + len(unit) > max_chars:
+            chunks.append(current)
+            current = unit
+        else:
+            current = f"{current}{separator}{unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_sentence(sentence, max_chars):
+    if len(sentence) <= max_chars:
+        return [sentence]
+    units = []
+    for clause in CLAUSE_BREAK.split(sentence):
+        units.extend([clause] if len(clause) <= max_chars else _split_hard(clause, max_chars))
+    return _pack(units, max_chars, " ")
+
+
+def _split_paragraph(paragraph, max_chars):
+    if len(paragraph) <= max_chars:
+        return [paragraph]
+    units = []
+    for sentence in split_sentences(paragraph):
+        units.extend(_split_sentence(sentence, max_chars))
+    return _pack(units, max_chars, " ")
+
+
+def split_text(text, max_chars):
+    """문단 → 문장 → 구절 → 단어 순으로 나누어 max_chars 이하 조각 목록 반환"""
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    units = []
+    for paragraph in split_paragraphs(text):
+        units.extend(_split_paragraph(paragraph, max_chars))
+    return _pack(units, max_chars, "\n\n")
+
+
+def normalize_sentence(sentence):
+    """공백과 한글 조합형(NFC)을 정규화 (띄어쓰기/줄바꿈만 바뀐 문장은 같은 문장으로 봄)"""
+    return " ".join(unicodedata.normalize("NFC", sentence).split())
+
+
+def split_segments(text, max_chars, min_chars=MIN_SEGMENT_CHARS):
+    """정규화한 문장 단위 조각 목록 (긴 문장은 구절 → 단어 순으로 max_chars 이하로 나눔)
+
+    split_text와 달리 조각을 글자 수 제한까지 묶지 않으므로, 문장 하나를 고치면
+    그 문장의 조각만 바뀌고 나머지 조각은 그대로 유지된다.
+    """
+    segments = []
+    for paragraph in split_paragraphs(text):
+        pending = ""
+        for sentence in split_sentences(paragraph):
+            sentence = normalize_sentence(sentence)
+            if pending:
+                sentence, pending = f"{pending} {sentence}", ""
+            if len(sentence) < min_chars:
+                pending = sentence
+                continue
+            segments.extend(_split_sentence(sentence, max_chars))
+        if pending:
+            segments.extend(_split_sentence(pending, max_chars))
+    return segments
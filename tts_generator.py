@@ -0,0 +1,1239 @@
+import base64
+import itertools
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from io import BytesIO
+
+import requests
+from gtts import gTTS, gTTSError
+
+import mp3_frames
+
+from failover import ProviderHealth
+from hedging import RequestHedger
+from http_sessions import ProviderSessions, add_connection_timings, connection_timings, reset_connection_timings
+from metrics import SynthesisMetrics
+from model_router import AUTO_MODEL, DEFAULT_LATENCY_TARGETS, ModelRouter, parse_latency_targets
+from provider_scheduler import ProviderScheduler, is_retryable, parse_retry_after
+from shared_store import SharedStore
+from single_flight import SingleFlight
+from synthesis_cache import SynthesisCache, make_cache_key
+from text_chunker import split_segments, split_text
+from voice_catalog import VoiceCatalog
+
+# 서비스별 동시 요청 수 기본값
+DEFAULT_CONCURRENCY = {
+    "google": 2,
+    "elevenlabs": 3,
+    "openai": 4
+}
+
+# 서비스별 1회 요청 최대 글자 수 기본값 (넘으면 문단/문장 단위로 나누어 생성)
+DEFAULT_CHAR_LIMITS = {
+    "google": 5000,
+    "elevenlabs": 5000,
+    "openai": 4096
+}
+
+# 서비스별 모델 설정 키 ("auto"면 ModelRouter가 요청마다 고름)
+MODEL_SETTING_KEYS = {"openai": "model", "elevenlabs": "model_id"}
+
+# 조각을 이어 붙일 수 있는 오디오 포맷
+CONCATENABLE_FORMATS = {"mp3", "aac", "opus"}
+
+# 오디오 포맷별 MIME 타입
+AUDIO_MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac"
+}
+
+# 가장 빠른 서비스 모드의 기본 시도 순서
+DEFAULT_FAILOVER_ORDER = ("openai", "elevenlabs", "google")
+
+# 서비스 API 주소 (설정으로 바꾸면 mock_providers.py 같은 가짜 서버로 보낼 수 있음)
+PROVIDER_BASE_URLS = {
+    "google": "https://translate.google.com",
+    "elevenlabs": "https://api.elevenlabs.io",
+    "openai": "https://api.openai.com"
+}
+
+# 일레븐랩스 음성 기본 목록 (API 키가 있으면 /v1/voices로 갱신)
+DEFAULT_ELEVENLABS_VOICES = [
+    {"id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel", "gender": "female", "accent": "American"},
+    {"id": "AZnzlk1XvdvUeBnXmlld", "name": "Domi", "gender": "female", "accent": "American"},
+    {"id": "EXAVITQu4vr4xnSDxMaL", "name": "Bella", "gender": "female", "accent": "American"},
+    {"id": "ErXwobaYiN019PkySvjV", "name": "Antoni", "gender": "male", "accent": "American"},
+    {"id": "MF3mGyEYCl7XYWbV9V6O", "name": "Elli", "gender": "female", "accent": "American"},
+    {"id": "TxGEqnHWrfWFTfGW9XjX", "name": "Josh", "gender": "male", "accent": "American"},
+    {"id": "VR6AewLTigWG4xSOukaG", "name": "Arnold", "gender": "male", "accent": "American"},
+    {"id": "pNInz6obpgDQGcFmaJgB", "name": "Adam", "gender": "male", "accent": "American"},
+    {"id": "yoZ06aMxZJJ28mfd3POQ", "name": "Sam", "gender": "male", "accent": "American"}
+]
+
+# OpenAI TTS 음성 목록 (목록 API가 없어 고정)
+OPENAI_VOICES = [
+    {"id": "alloy", "name": "Alloy", "description": "균형 잡힌 중성적 음성"},
+    {"id": "echo", "name": "Echo", "description": "남성적이고 깊은 음성"},
+    {"id": "fable", "name": "Fable", "description": "따뜻하고 친근한 음성"},
+    {"id": "onyx", "name": "Onyx", "description": "강렬하고 카리스마 있는 음성"},
+    {"id": "nova", "name": "Nova", "description": "활기차고 현대적인 음성"},
+    {"id": "shimmer", "name": "Shimmer", "description": "부드럽고 우아한 음성"}
+]
+
+# OpenAI TTS 모델 기본 목록 (API 키가 있으면 /v1/models로 갱신)
+DEFAULT_OPENAI_MODELS = [
+    {"id": "tts-1", "name": "TTS-1 (빠름)", "description": "빠른 처리, 기본 품질"},
+    {"id": "tts-1-hd", "name": "TTS-1-HD (고품질)", "description": "높은 품질, 약간 느림"}
+]
+
+# OpenAI TTS 오디오 포맷
+OPENAI_FORMATS = [
+    {"id": "mp3", "name": "MP3", "description": "호환성 최고"},
+    {"id": "opus", "name": "OPUS", "description": "인터넷 스트리밍 최적화"},
+    {"id": "aac", "name": "AAC", "description": "Apple 기기 최적화"},
+    {"id": "flac", "name": "FLAC", "description": "무손실 압축"}
+]
+
+# 일레븐랩스 모델 기본 목록 (API 키가 있으면 /v1/models로 갱신)
+DEFAULT_ELEVENLABS_MODELS = [
+    {"id": "eleven_monolingual_v1", "name": "English v1"},
+    {"id": "eleven_multilingual_v1", "name": "Multilingual v1"},
+    {"id": "eleven_multilingual_v2", "name": "Multilingual v2"},
+    {"id": "eleven_turbo_v2", "name": "Turbo v2 (Fast)"}
+]
+
+# 구글 TTS 언어 목록
+GOOGLE_LANGUAGES = [
+    {"code": "ko", "name": "🇰🇷 한국어"},
+    {"code": "en", "name": "🇺🇸 English"},
+    {"code": "ja", "name": "🇯🇵 日本語"},
+    {"code": "zh", "name": "🇨🇳 中文"},
+    {"code": "es", "name": "🇪🇸 Español"},
+    {"code": "fr", "name": "🇫🇷 Français"},
+    {"code": "de", "name": "🇩🇪 Deutsch"},
+    {"code": "it", "name": "🇮🇹 Italiano"},
+    {"code": "pt", "name": "🇵🇹 Português"},
+    {"code": "ru", "name": "🇷🇺 Русский"}
+]
+
+# gTTS가 사용하는 구글 번역 음성 API 경로와 응답에서 오디오를 꺼내는 패턴
+GOOGLE_TTS_PATH = "/_/TranslateWebserverUi/data/batchexecute"
+GOOGLE_AUDIO_PATTERN = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+def _merge_catalog(fetched, defaults):
+    """서비스에서 받은 목록에 기본 목록의 표시 정보(한국어 이름/설명)를 덧붙임"""
+    known = {item["id"]: item for item in defaults}
+    return [dict(item, **known.get(item["id"], {})) for item in fetched]
+
+
+def elevenlabs_error_message(status_code):
+    """일레븐랩스 실패 응답 상태 코드별 안내 메시지"""
+    error_msg = f"API Error: {status_code}"
+    if status_code == 401:
+        error_msg += " - API 키를 확인해주세요"
+    elif status_code == 429:
+        error_msg += " - 사용량 한도를 초과했습니다"
+    elif status_code == 422:
+        error_msg += " - 텍스트가 너무 길거나 잘못된 설정입니다"
+    return error_msg
+
+
+def openai_error_message(status_code, error_data=None):
+    """OpenAI 실패 응답 메시지 (응답 JSON에 있는 오류 설명 포함)"""
+    error_msg = f"OpenAI API Error: {status_code}"
+    if isinstance(error_data, dict) and isinstance(error_data.get('error'), dict):
+        error_msg += f" - {error_data['error'].get('message', 'Unknown error')}"
+    return error_msg
+
+
+def coalesced_result(result, coalesced):
+    """합쳐진 요청들이 함께 받은 결과를 요청마다 따로 복사 (다른 요청의 지표를 고치지 않도록)"""
+    metrics = dict(result.get("metrics") or {})
+    if coalesced:
+        metrics["coalesced"] = True
+        return dict(result, coalesced=True, metrics=metrics)
+    return dict(result, metrics=metrics)
+
+
+def env_config(name, default=None):
+    """환경변수 → 기본값 순으로 설정값 조회"""
+    return os.getenv(name, default)
+
+
+class TTSStreamError(Exception):
+    """스트리밍 생성 실패 (응답을 보내기 전이나 도중에 발생)"""
+
+    def __init__(self, service, error, status_code=None, retry_after=None, retryable=False):
+        super().__init__(error)
+        self.service = service
+        self.error = error
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+    def as_result(self):
+        """generate_* 실패 결과와 같은 형태의 딕셔너리"""
+        result = {"success": False, "error": self.error, "service": self.service, "retryable": self.retryable}
+        if self.status_code is not None:
+            result.update(status_code=self.status_code, retry_after=self.retry_after)
+        return result
+
+
+class TTSGenerator:
+    def __init__(self, elevenlabs_api_key=None, openai_api_key=None, concurrency=None, char_limits=None,
+                 chunk_retries=2, stream_chunk_size=4096, base_urls=None, pool_size=None,
+                 connect_timeout=5.0, read_timeout=60.0, prewarm=False, cache=None, scheduler=None, hedger=None,
+                 health=None, failover_order=DEFAULT_FAILOVER_ORDER, failover_budget=15.0, metrics=None,
+                 google_segment_concurrency=4, catalog=None, router=None):
+        self.elevenlabs_api_key = elevenlabs_api_key
+        self.openai_api_key = openai_api_key
+        self.char_limits = dict(DEFAULT_CHAR_LIMITS, **(char_limits or {}))
+        self.chunk_retries = chunk_retries
+        self.stream_chunk_size = stream_chunk_size
+        self.base_urls = dict(PROVIDER_BASE_URLS, **(base_urls or {}))
+
+        self.elevenlabs_headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.elevenlabs_api_key
+        }
+
+        self.openai_headers = {
+            "Authorization": f"Bearer {self.openai_api_key}",
+            "Content-Type": "application/json"
+        }
+
+        # 서비스별 표시 이름
+        self.service_names = {
+            "google": "Google TTS",
+            "elevenlabs": "ElevenLabs",
+            "openai": "OpenAI TTS"
+        }
+
+        # 서비스별 생성 함수
+        self.generators = {
+            "google": self.generate_google_tts,
+            "elevenlabs": self.generate_elevenlabs_tts,
+            "openai": self.generate_openai_tts
+        }
+
+        # 서비스별 스트리밍 시작 함수
+        self.stream_openers = {
+            "google": self._open_google_stream,
+            "elevenlabs": self._open_elevenlabs_stream,
+            "openai": self._open_openai_stream
+        }
+
+        # 서비스별 스레드 풀 (서비스마다 동시 요청 수를 따로 제한)
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.executors = {
+            provider: ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"tts-{provider}")
+            for provider, workers in self.concurrency.items()
+        }
+
+        # 구글 TTS 요청 하나를 이루는 ~100자 조각들을 동시에 받아오는 스레드 풀
+        self.google_segment_concurrency = max(1, google_segment_concurrency)
+        self.segment_executor = ThreadPoolExecutor(
+            max_workers=self.google_segment_concurrency * max(1, self.concurrency["google"]),
+            thread_name_prefix="tts-google-segment"
+        )
+
+        # 서비스별 keep-alive 세션 (커넥션 재사용 + 타임아웃)
+        self.sessions = ProviderSessions(
+            self.base_urls,
+            pool_size=pool_size or dict(self.concurrency, google=self.concurrency["google"] * self.google_segment_concurrency),
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout
+        )
+        if prewarm:
+            self.sessions.warm_up()
+
+        # 음성/모델 목록 (id로 색인, TTL이 지나면 백그라운드에서 조건부 갱신)
+        self.catalog = catalog or VoiceCatalog()
+        self.catalog.register("elevenlabs_voices", DEFAULT_ELEVENLABS_VOICES,
+                              fetch=self._fetch_elevenlabs_voices if self.elevenlabs_api_key else None)
+        self.catalog.register("elevenlabs_models", DEFAULT_ELEVENLABS_MODELS,
+                              fetch=self._fetch_elevenlabs_models if self.elevenlabs_api_key else None)
+        self.catalog.register("openai_models", DEFAULT_OPENAI_MODELS,
+                              fetch=self._fetch_openai_models if self.openai_api_key else None)
+        self.catalog.register("openai_voices", OPENAI_VOICES)
+        self.catalog.register("openai_formats", OPENAI_FORMATS)
+        self.catalog.register("google_languages", GOOGLE_LANGUAGES, key="code")
+
+        # 합성 결과 캐시 (None이면 캐시 사용 안 함)
+        self.cache = cache
+        # 진행 중인 같은 합성 요청 합치기
+        self.single_flight = SingleFlight()
+
+        # "auto" 모델 선택 (실제 요청의 지연 시간/오류율 기준)
+        self.router = router or ModelRouter()
+
+        # 모든 서비스 호출이 거치는 속도 제한/재시도 스케줄러
+        self.scheduler = scheduler or ProviderScheduler({
+            provider: {"max_concurrency": workers} for provider, workers in self.concurrency.items()
+        })
+
+        # 요청 마감 시간과 헤지(복제) 요청
+        self.hedger = hedger or RequestHedger(max_workers=2 * sum(self.concurrency.values()))
+
+        # 서비스 장애 감지 (연속 실패한 서비스는 가장 빠른 서비스 모드에서 잠시 제외)
+        self.health = health or ProviderHealth()
+        self.failover_order = list(failover_order)
+        self.failover_budget = failover_budget
+        # generate_long은 서비스별 스레드 풀을 기다리므로 별도 풀에서 실행 (같은 풀이면 교착)
+        self.failover_executor = ThreadPoolExecutor(max_workers=len(self.concurrency) * 2, thread_name_prefix="tts-failover")
+
+        # 요청별 시간/크기 지표 (Prometheus 형식으로 내보냄)
+        self.metrics = metrics or SynthesisMetrics()
+
+    @property
+    def elevenlabs_voices(self):
+        return self.catalog.items("elevenlabs_voices")
+
+    @property
+    def elevenlabs_models(self):
+        return self.catalog.items("elevenlabs_models")
+
+    @property
+    def openai_voices(self):
+        return self.catalog.items("openai_voices")
+
+    @property
+    def openai_models(self):
+        return self.catalog.items("openai_models")
+
+    @property
+    def openai_formats(self):
+        return self.catalog.items("openai_formats")
+
+    @property
+    def google_languages(self):
+        return self.catalog.items("google_languages")
+
+    def _catalog_get(self, provider, path, headers, validators):
+        """목록 API 조건부 GET: 바뀌지 않았으면(304) None, 아니면 (JSON, 검증자)"""
+        headers = dict(headers, Accept="application/json")
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        response = self.sessions.get(provider, f"{self.base_urls[provider]}{path}", headers=headers)
+        with response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            return response.json(), {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
+
+    def _fetch_elevenlabs_voices(self, validators):
+        fetched = self._catalog_get("elevenlabs", "/v1/voices", {"xi-api-key": self.elevenlabs_api_key}, validators)
+        if fetched is None:
+            return None
+        data, validators = fetched
+        voices = [
+            {
+                "id": voice["voice_id"],
+                "name": voice["name"],
+                "gender": (voice.get("labels") or {}).get("gender", ""),
+                "accent": (voice.get("labels") or {}).get("accent", "")
+            }
+            for voice in data.get("voices", [])
+        ]
+        return _merge_catalog(voices, DEFAULT_ELEVENLABS_VOICES), validators
+
+    def _fetch_elevenlabs_models(self, validators):
+        fetched = self._catalog_get("elevenlabs", "/v1/models", {"xi-api-key": self.elevenlabs_api_key}, validators)
+        if fetched is None:
+            return None
+        data, validators = fetched
+        models = [
+            {"id": model["model_id"], "name": model.get("name", model["model_id"])}
+            for model in data if model.get("can_do_text_to_speech", True)
+        ]
+        return _merge_catalog(models, DEFAULT_ELEVENLABS_MODELS), validators
+
+    def _fetch_openai_models(self, validators):
+        fetched = self._catalog_get("openai", "/v1/models", {"Authorization": f"Bearer {self.openai_api_key}"}, validators)
+        if fetched is None:
+            return None
+        data, validators = fetched
+        models = [
+            {"id": model["id"], "name": model["id"], "description": ""}
+            for model in sorted(data.get("data", []), key=lambda m: m["id"]) if "tts" in model["id"]
+        ]
+        return _merge_catalog(models, DEFAULT_OPENAI_MODELS), validators
+
+    def connection_stats(self):
+        """서비스별 커넥션 재사용 통계"""
+        return self.sessions.stats()
+
+    def cache_key(self, provider, text, settings):
+        """서비스별 모델/음성을 포함한 캐시 키"""
+        if provider == "google":
+            model, voice = "gtts", settings.get('language', 'ko')
+        elif provider == "elevenlabs":
+            model = settings.get('model_id', 'eleven_multilingual_v2')
+            voice = settings.get('voice_id', DEFAULT_ELEVENLABS_VOICES[0]["id"])
+        else:
+            model, voice = settings.get('model', 'tts-1'), settings.get('voice', 'alloy')
+        return make_cache_key(provider, model, voice, settings, text)
+
+    def get_cached(self, provider, text, settings):
+        """캐시에 있으면 결과 딕셔너리, 없으면 None"""
+        if self.cache is None:
+            return None
+        started = time.perf_counter()
+        entry = self.cache.get(self.cache_key(provider, text, settings))
+        if entry is None:
+            return None
+        return dict(
+            entry["meta"],
+            audio_data=entry["audio_data"],
+            settings=settings,
+            cached=True,
+            metrics={
+                "total": time.perf_counter() - started,
+                "chars": len(text),
+                "bytes": len(entry["audio_data"]),
+                "retries": 0,
+                "cache_hit": True
+            }
+        )
+
+    def scheduler_stats(self):
+        """서비스별 호출/재시도/속도 제한 통계"""
+        return self.scheduler.stats()
+
+    def hedge_stats(self):
+        """서비스별 마감 초과/헤지/취소 통계"""
+        return self.hedger.stats()
+
+    def health_stats(self):
+        """서비스별 연속 실패 횟수와 제외 여부"""
+        return self.health.stats()
+
+    def _attempt(self, provider, text, settings, control):
+        """서비스 호출 한 번 (새 연결의 DNS/TCP/TLS 시간과 첫 바이트 시간을 결과에 붙임)"""
+        reset_connection_timings()
+        result = self.generators[provider](text, settings, control)
+        return dict(result, metrics=dict(connection_timings(), ttfb=control.ttfb))
+
+    def _synthesize(self, provider, text, settings):
+        # 마감 시간은 재시도를 포함한 요청 전체에 적용
+        started = time.perf_counter()
+        deadline_at = time.monotonic() + self.hedger.deadline
+        service = self.service_names[provider]
+        calls = []
+
+        def hedge_slot():
+            # 복제 요청도 스케줄러의 토큰과 동시 실행 자리를 거침 (바로 없으면 보내지 않음)
+            if not self.scheduler.try_acquire(provider, len(text)):
+                return None
+            return lambda result: self.scheduler.release(provider, result)
+
+        def call(release):
+            # 첫 시도의 동시 실행 자리는 시도가 실제로 끝날 때 작업 스레드에서 반환
+            calls.append(1)
+            return self.hedger.run(
+                provider,
+                service,
+                lambda control: self._attempt(provider, text, settings, control),
+                deadline_at,
+                hedge_slot,
+                release
+            )
+
+        result = self.scheduler.call(provider, len(text), call, deadline_at=deadline_at, detach=True)
+        result = dict(result, metrics=dict(
+            result.get("metrics") or {},
+            total=time.perf_counter() - started,
+            chars=len(text),
+            bytes=len(result.get("audio_data") or b""),
+            retries=len(calls) - 1,
+            cache_hit=False
+        ))
+        # 429/5xx/연결 오류/시간 초과만 서비스 장애로 봄 (잘못된 입력으로 인한 4xx는 제외)
+        if result["success"] or is_retryable(result) or result.get("deadline_exceeded"):
+            self.health.record(provider, result["success"])
+            self.record_model_latency(provider, text, settings, result)
+        if self.cache is not None and result["success"]:
+            meta = {k: v for k, v in result.items() if k not in ("audio_data", "settings", "metrics")}
+            self.cache.put(self.cache_key(provider, text, settings), result["audio_data"], meta)
+        return result
+
+    def route_model(self, provider, text, settings):
+        """모델 설정이 "auto"면 지금 지연 목표를 맞추는 가장 품질 높은 모델로 바꾼 설정 반환"""
+        key = MODEL_SETTING_KEYS.get(provider)
+        if key is None or settings.get(key) != AUTO_MODEL:
+            return settings
+        # 긴 텍스트는 조각이 동시에 생성되므로 가장 긴 조각 기준
+        chars = min(len(text), self.char_limits[provider])
+        return dict(settings, **{key: self.router.choose(provider, chars)})
+
+    def record_model_latency(self, provider, text, settings, result):
+        """서비스 호출 결과를 모델별 지연 시간/오류율 통계에 반영"""
+        key = MODEL_SETTING_KEYS.get(provider)
+        if key is not None:
+            self.router.record(provider, settings.get(key), len(text), result["metrics"]["total"], result["success"])
+
+    def _generate_uncached(self, provider, text, settings):
+        # 같은 음성을 동시에 요청하면 서비스 호출 한 번의 결과를 함께 받음
+        # (리더가 캐시에 저장한 뒤 끝나므로 이후 요청은 캐시에서 받음)
+        result, coalesced = self.single_flight.do(
+            self.cache_key(provider, text, settings),
+            lambda: self._synthesize(provider, text, settings)
+        )
+        return coalesced_result(result, coalesced)
+
+    def generate(self, provider, text, settings):
+        """서비스 이름으로 음성 생성 (캐시 우선)"""
+        settings = self.route_model(provider, text, settings)
+        result = self.get_cached(provider, text, settings)
+        if result is None:
+            result = self._generate_uncached(provider, text, settings)
+        self.metrics.record(provider, result)
+        return result
+
+    def _generate_chunk(self, provider, text, settings):
+        """조각 하나 생성 (실패시 지수 백오프로 재시도)"""
+        retries = 0
+        for attempt in range(self.chunk_retries + 1):
+            result = self._generate_uncached(provider, text, settings)
+            retries += result["metrics"]["retries"] + (1 if attempt else 0)
+            if result["success"] or not is_retryable(result):
+                break
+            if attempt < self.chunk_retries:
+                time.sleep(0.5 * 2 ** attempt)
+        result["metrics"]["retries"] = retries
+        return result
+
+    def _merge_metrics(self, chunk_results, started):
+        """조각별 지표를 작업 하나의 지표로 합침 (전체 시간은 작업 시작부터, 첫 바이트는 첫 조각 기준)"""
+        metrics = [r.get("metrics") or {} for r in chunk_results if r is not None]
+        merged = {
+            "total": time.perf_counter() - started,
+            "ttfb": metrics[0].get("ttfb") if metrics else None,
+            "cache_hit": all(m.get("cache_hit", False) for m in metrics)
+        }
+        for name in ("chars", "bytes", "retries", "dns", "connect", "tls", "new_connections"):
+            merged[name] = sum(m.get(name, 0) for m in metrics)
+        # 캐시에서 가져온 조각 수 (다시 생성할 때 재사용된 문장 수)
+        merged["cached_chunks"] = sum(1 for m in metrics if m.get("cache_hit"))
+        return merged
+
+    def _assemble(self, provider, text, settings, chunk_results, started):
+        """조각 결과를 순서대로 이어 붙여 하나의 결과로 만듦"""
+        metrics = self._merge_metrics(chunk_results, started)
+        if len(chunk_results) == 1:
+            return dict(chunk_results[0], metrics=metrics)
+
+        for number, result in enumerate(chunk_results, start=1):
+            if not result["success"]:
+                return dict(result, error=f"{number}/{len(chunk_results)}번째 조각 생성 실패: {result['error']}",
+                            metrics=metrics)
+
+        # MP3는 프레임 단위로 이어 붙여 조각마다 붙은 ID3/Xing 헤더를 제거
+        audio_parts = [r["audio_data"] for r in chunk_results]
+        if settings.get('response_format', 'mp3') == "mp3":
+            audio_data = mp3_frames.concat(audio_parts)
+        else:
+            audio_data = b"".join(audio_parts)
+
+        first = chunk_results[0]
+        return dict(
+            first,
+            audio_data=audio_data,
+            settings=settings,
+            chunks=len(chunk_results),
+            cached=all(r.get("cached", False) for r in chunk_results),
+            metrics=metrics
+        )
+
+    def _finish(self, provider, result):
+        self.metrics.record(provider, result)
+        return result
+
+    def split_chunks(self, provider, text, settings, incremental=False):
+        """생성 단위 조각 목록
+
+        incremental이면 문장 단위로 나누어 조각마다 캐시하므로, 문장 하나를 고쳐 다시 생성할 때
+        바뀐 문장만 서비스에 요청한다. 이어 붙일 수 없는 포맷은 글자 수 제한 기준으로 나눈다.
+        """
+        if incremental and settings.get('response_format', 'mp3') in CONCATENABLE_FORMATS:
+            return split_segments(text, self.char_limits[provider])
+        return split_text(text, self.char_limits[provider])
+
+    def generate_many(self, text, jobs, incremental=False):
+        """(서비스, 설정) 목록을 병렬로 생성하고 완료되는 순서대로 (순번, 결과)를 반환
+
+        서비스 글자 수 제한을 넘는 텍스트는 조각으로 나누어 같은 스레드 풀에서 병렬 생성한 뒤
+        순서대로 이어 붙인다. 실패한 조각만 재시도하므로 나머지 조각은 버려지지 않는다.
+        incremental이면 문장 단위로 나누어 캐시에 없는 문장만 생성한다 (split_chunks 참고).
+        """
+        futures = {}
+        pending = {}
+        job_chunks = {}
+        started = time.perf_counter()
+        jobs = [(provider, self.route_model(provider, text, settings)) for provider, settings in jobs]
+        for index, (provider, settings) in enumerate(jobs):
+            chunks = self.split_chunks(provider, text, settings, incremental)
+            audio_format = settings.get('response_format', 'mp3')
+            if len(chunks) > 1 and audio_format not in CONCATENABLE_FORMATS:
+                yield index, {
+                    "success": False,
+                    "error": f"{audio_format.upper()} 포맷은 긴 텍스트 생성을 지원하지 않습니다",
+                    "service": self.service_names[provider]
+                }
+                continue
+
+            job_chunks[index] = [None] * len(chunks)
+            pending[index] = 0
+            for position, chunk in enumerate(chunks):
+                # 캐시 히트는 스레드 풀 대기열을 거치지 않고 바로 사용
+                cached = self.get_cached(provider, chunk, settings)
+                if cached is not None:
+                    job_chunks[index][position] = cached
+                    continue
+                future = self.executors[provider].submit(self._generate_chunk, provider, chunk, settings)
+                futures[future] = (index, position)
+                pending[index] += 1
+
+            if pending[index] == 0:
+                yield index, self._finish(provider, self._assemble(provider, text, settings, job_chunks.pop(index), started))
+
+        for future in as_completed(futures):
+            index, position = futures[future]
+            job_chunks[index][position] = future.result()
+            pending[index] -= 1
+            if pending[index] == 0:
+                provider, settings = jobs[index]
+                yield index, self._finish(provider, self._assemble(provider, text, settings, job_chunks.pop(index), started))
+
+    def generate_long(self, provider, text, settings, incremental=False):
+        """긴 텍스트도 조각 단위로 나누어 하나의 결과로 생성"""
+        for _, result in self.generate_many(text, [(provider, settings)], incremental):
+            return result
+
+    def generate_fastest(self, text, settings_by_provider, mode="ordered", budget=None, incremental=False):
+        """여러 서비스 중 가장 먼저 성공한 결과 반환 (연속 실패 중인 서비스는 건너뜀)
+
+        ordered: failover_order 순서로 시도하고, 앞 서비스가 실패하거나 예산을 서비스 수로 나눈
+        시간 안에 끝나지 않으면 다음 서비스를 추가로 시작한다.
+        race: 모든 서비스에 동시에 요청한다.
+        진 요청은 중단하지 않고 끝까지 받아 캐시에 저장한다.
+        """
+        budget = self.failover_budget if budget is None else budget
+        providers = [p for p in self.failover_order if p in settings_by_provider]
+        if not providers:
+            return {"success": False, "error": "선택된 서비스가 없습니다", "service": "가장 빠른 서비스"}
+
+        # 모두 장애 중이면 그래도 전부 시도
+        queue = [p for p in providers if self.health.available(p)] or providers
+        skipped = [p for p in providers if p not in queue]
+        stagger = 0.0 if mode == "race" else budget / len(queue)
+        deadline_at = time.monotonic() + budget
+
+        futures = {}
+        tried = []
+        last_failure = None
+        next_launch_at = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if queue and (now >= next_launch_at or all(f.done() for f in futures)):
+                provider = queue.pop(0)
+                tried.append(provider)
+                future = self.failover_executor.submit(
+                    self.generate_long, provider, text, settings_by_provider[provider], incremental
+                )
+                futures[future] = provider
+                next_launch_at = now + stagger
+                continue
+
+            pending = [f for f in futures if not f.done()]
+            if not pending or now >= deadline_at:
+                break
+            timeout = deadline_at - now
+            if queue:
+                timeout = min(timeout, max(0.0, next_launch_at - now))
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                result = future.result()
+                if result["success"]:
+                    for other in futures:
+                        other.cancel()
+                    return dict(result, provider=futures[future], failover={"tried": tried, "skipped": skipped})
+                last_failure = result
+            if done and queue:
+                # 실패하면 기다리지 않고 바로 다음 서비스 시작
+                next_launch_at = time.monotonic()
+
+        for future in futures:
+            future.cancel()
+        # 루프가 끝나기 직전에 완료된 성공 결과
+        for future, provider in futures.items():
+            if future.done() and not future.cancelled() and future.result()["success"]:
+                return dict(future.result(), provider=provider, failover={"tried": tried, "skipped": skipped})
+
+        if all(f.done() for f in futures) and last_failure is not None:
+            return dict(
+                last_failure,
+                error=f"모든 서비스 실패 ({', '.join(tried)}) - {last_failure['error']}",
+                failover={"tried": tried, "skipped": skipped}
+            )
+        return {
+            "success": False,
+            "error": f"{budget:.0f}초 안에 성공한 서비스가 없습니다 ({', '.join(tried)})",
+            "service": "가장 빠른 서비스",
+            "deadline_exceeded": True,
+            "failover": {"tried": tried, "skipped": skipped}
+        }
+
+    def build_jobs(self, settings_by_provider, generation_count=1):
+        """서비스별 설정으로 (서비스, 설정) 작업 목록 생성
+
+        구글은 한 개, 일레븐랩스/OpenAI는 generation_count개를 만들고
+        여러 개 생성시에는 음성을 바꿔가며 생성한다.
+        """
+        jobs = []
+
+        # Google TTS 생성
+        if "google" in settings_by_provider:
+            jobs.append(("google", dict(settings_by_provider["google"])))
+
+        # ElevenLabs / OpenAI TTS 생성 (여러 개)
+        voice_lists = [
+            ("elevenlabs", "voice_id", self.elevenlabs_voices),
+            ("openai", "voice", self.openai_voices)
+        ]
+        for provider, voice_key, voices in voice_lists:
+            if provider not in settings_by_provider:
+                continue
+            for i in range(generation_count):
+                settings = dict(settings_by_provider[provider])
+                # 여러 개 생성시 다른 음성 사용
+                if generation_count > 1:
+                    settings[voice_key] = voices[i % len(voices)]['id']
+                jobs.append((provider, settings))
+
+        return jobs
+
+    def cache_stats(self):
+        """캐시 히트/미스 통계"""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def single_flight_stats(self):
+        """진행 중인 같은 요청을 합친 횟수와 비율, 기다리는 요청 수"""
+        return self.single_flight.stats()
+
+    def router_stats(self):
+        """"auto" 모델의 모델별 선택 횟수, 대체 선택 횟수, 오류율, 글자 수 구간별 p90 지연"""
+        return self.router.stats()
+
+    def catalog_stats(self):
+        """음성/모델 목록별 항목 수와 갱신/304/오류 횟수"""
+        return self.catalog.stats()
+
+    def close(self):
+        """스레드 풀과 서비스별 세션 종료 (대기 중인 작업은 취소, 이후에는 사용할 수 없음)"""
+        for executor in [*self.executors.values(), self.segment_executor, self.failover_executor]:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.hedger.close()
+        self.sessions.close()
+
+    def _read_body(self, response, control):
+        """응답 본문을 조각 단위로 읽음 (첫 바이트 시각 기록, 취소되면 None)"""
+        buffer = BytesIO()
+        with response:
+            for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+                if control is not None:
+                    if control.cancelled.is_set():
+                        return None
+                    control.mark_first_byte()
+                buffer.write(chunk)
+        return buffer.getvalue()
+
+    def _cancelled_result(self, service):
+        return {
+            "success": False,
+            "error": "요청이 취소되었습니다",
+            "service": service,
+            "cancelled": True
+        }
+
+    def _failure_details(self, response=None, exception=None):
+        """실패 결과에 붙일 상태 코드/Retry-After/재시도 가능 여부"""
+        if exception is not None:
+            # gTTSError는 실패한 HTTP 응답을 rsp로 가지고 있음
+            response = getattr(exception, "rsp", None)
+            if response is None:
+                return {"retryable": isinstance(exception, (requests.RequestException, gTTSError))}
+        return {
+            "status_code": response.status_code,
+            "retry_after": parse_retry_after(response.headers.get("Retry-After"))
+        }
+
+    def _google_request(self, text, settings):
+        lang = settings.get('language', 'ko')
+        slow = settings.get('slow', False)
+        info = {
+            "service": f"Google TTS ({lang.upper()})",
+            "filename": f"google_tts_{lang}.mp3"
+        }
+        return gTTS(text=text, lang=lang, slow=slow), info
+
+    def _fetch_google_segment(self, tts, prepared):
+        """gTTS 요청 하나를 서비스 세션으로 보내고 (디코딩된 오디오, 연결 시간) 반환"""
+        reset_connection_timings()
+        prepared.url = self.base_urls["google"] + GOOGLE_TTS_PATH
+        try:
+            response = self.sessions.send("google", prepared)
+        except requests.RequestException as e:
+            raise gTTSError(tts=tts) from e
+        audio = BytesIO()
+        with response:
+            if response.status_code != 200:
+                raise gTTSError(tts=tts, response=response)
+            for line in response.iter_lines(chunk_size=1024):
+                decoded_line = line.decode("utf-8")
+                if "jQ1olc" in decoded_line:
+                    audio_search = GOOGLE_AUDIO_PATTERN.search(decoded_line)
+                    if not audio_search:
+                        raise gTTSError(tts=tts, response=response)
+                    audio.write(base64.b64decode(audio_search.group(1).encode("ascii")))
+        return audio.getvalue(), connection_timings()
+
+    def _iter_google(self, tts):
+        """gTTS가 ~100자 단위로 나눈 요청을 동시에 보내고 디코딩된 오디오를 원래 순서대로 반환
+
+        gTTS.stream()은 조각을 하나씩 차례로 요청하고 요청마다 새 연결을 만들기 때문에
+        요청 생성만 gTTS에 맡기고, 전송은 keep-alive 세션으로 google_segment_concurrency개까지 동시에 한다.
+        """
+        requests_to_send = iter(tts._prepare_requests())
+        window = deque()
+        try:
+            for prepared in itertools.islice(requests_to_send, self.google_segment_concurrency):
+                window.append(self.segment_executor.submit(self._fetch_google_segment, tts, prepared))
+            for index in itertools.count():
+                if not window:
+                    break
+                audio, timings = window.popleft().result()
+                # 다른 스레드에서 연 연결 시간도 이 요청의 지표에 포함
+                add_connection_timings(timings)
+                for prepared in itertools.islice(requests_to_send, 1):
+                    window.append(self.segment_executor.submit(self._fetch_google_segment, tts, prepared))
+                # 두 번째 조각부터는 하나의 MP3 스트림으로 이어지도록 헤더 프레임 제거
+                yield audio if index == 0 else mp3_frames.strip_headers(audio)
+        finally:
+            # 실패하거나 취소되면 아직 시작하지 않은 조각 요청은 보내지 않음
+            for future in window:
+                future.cancel()
+
+    def generate_google_tts(self, text, settings, control=None):
+        """구글 TTS로 음성 생성"""
+        try:
+            tts, info = self._google_request(text, settings)
+            audio_buffer = BytesIO()
+            for piece in self._iter_google(tts):
+                if control is not None:
+                    if control.cancelled.is_set():
+                        return self._cancelled_result("Google TTS")
+                    control.mark_first_byte()
+                audio_buffer.write(piece)
+            audio_buffer.seek(0)
+
+            return {
+                "success": True,
+                "audio_data": audio_buffer.read(),
+                "service": info["service"],
+                "settings": settings,
+                "filename": info["filename"]
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "service": "Google TTS",
+                **self._failure_details(exception=e)
+            }
+
+    def _elevenlabs_request(self, text, settings, stream=False):
+        voice_id = settings.get('voice_id', DEFAULT_ELEVENLABS_VOICES[0]["id"])
+        model_id = settings.get('model_id', 'eleven_multilingual_v2')
+        stability = float(settings.get('stability', 0.5))
+        similarity_boost = float(settings.get('similarity_boost', 0.5))
+        style = float(settings.get('style', 0.0))
+        use_speaker_boost = settings.get('use_speaker_boost', True)
+
+        url = f"{self.base_urls['elevenlabs']}/v1/text-to-speech/{voice_id}"
+        if stream:
+            url += "/stream"
+
+        data = {
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": {
+                "stability": stability,
+                "similarity_boost": similarity_boost,
+                "style": style,
+                "use_speaker_boost": use_speaker_boost
+            }
+        }
+
+        voice_name = self.catalog.lookup("elevenlabs_voices", voice_id, {"name": "Unknown"})["name"]
+        model_name = self.catalog.lookup("elevenlabs_models", model_id, {"name": "Unknown"})["name"]
+        info = {
+            "service": f"ElevenLabs ({voice_name} - {model_name})",
+            "filename": f"elevenlabs_{voice_name.lower()}.mp3"
+        }
+        return url, data, info
+
+    def _elevenlabs_error(self, response):
+        return elevenlabs_error_message(response.status_code)
+
+    def generate_elevenlabs_tts(self, text, settings, control=None):
+        """일레븐랩스 TTS로 음성 생성"""
+        try:
+            if not self.elevenlabs_api_key:
+                return {
+                    "success": False,
+                    "error": "ElevenLabs API 키가 설정되지 않았습니다",
+                    "service": "ElevenLabs"
+                }
+
+            url, data, info = self._elevenlabs_request(text, settings)
+            response = self.sessions.post("elevenlabs", url, json=data, headers=self.elevenlabs_headers, stream=True)
+
+            if response.status_code == 200:
+                audio_data = self._read_body(response, control)
+                if audio_data is None:
+                    return self._cancelled_result("ElevenLabs")
+                return {
+                    "success": True,
+                    "audio_data": audio_data,
+                    "service": info["service"],
+                    "settings": settings,
+                    "filename": info["filename"]
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": self._elevenlabs_error(response),
+                    "service": "ElevenLabs",
+                    **self._failure_details(response)
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "service": "ElevenLabs",
+                **self._failure_details(exception=e)
+            }
+
+    def _openai_request(self, text, settings):
+        voice = settings.get('voice', 'alloy')
+        model = settings.get('model', 'tts-1')
+        speed = float(settings.get('speed', 1.0))
+        audio_format = settings.get('response_format', 'mp3')
+
+        url = f"{self.base_urls['openai']}/v1/audio/speech"
+
+        data = {
+            "model": model,
+            "input": text,
+            "voice": voice,
+            "speed": speed,
+            "response_format": audio_format
+        }
+
+        voice_name = self.catalog.lookup("openai_voices", voice, {"name": voice})["name"]
+        model_name = self.catalog.lookup("openai_models", model, {"name": model})["name"]
+        info = {
+            "service": f"OpenAI TTS ({voice_name} - {model_name})",
+            "filename": f"openai_{voice}_{model}.{audio_format}"
+        }
+        return url, data, info
+
+    def _openai_error(self, response):
+        try:
+            error_data = response.json()
+        except:
+            error_data = None
+        return openai_error_message(response.status_code, error_data)
+
+    def generate_openai_tts(self, text, settings, control=None):
+        """OpenAI TTS로 음성 생성"""
+        try:
+            if not self.openai_api_key:
+                return {
+                    "success": False,
+                    "error": "OpenAI API 키가 설정되지 않았습니다",
+                    "service": "OpenAI TTS"
+                }
+
+            url, data, info = self._openai_request(text, settings)
+            response = self.sessions.post("openai", url, json=data, headers=self.openai_headers, stream=True)
+
+            if response.status_code == 200:
+                audio_data = self._read_body(response, control)
+                if audio_data is None:
+                    return self._cancelled_result("OpenAI TTS")
+                return {
+                    "success": True,
+                    "audio_data": audio_data,
+                    "service": info["service"],
+                    "settings": settings,
+                    "filename": info["filename"]
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": self._openai_error(response),
+                    "service": "OpenAI TTS",
+                    **self._failure_details(response)
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"연결 오류: {str(e)}",
+                "service": "OpenAI TTS",
+                **self._failure_details(exception=e)
+            }
+
+    def _iter_response(self, service, response):
+        """HTTP 응답 본문을 도착하는 대로 조각 단위로 반환"""
+        with response:
+            try:
+                for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+                    if chunk:
+                        yield chunk
+            except Exception as e:
+                raise TTSStreamError(service, f"연결 오류: {str(e)}")
+
+    def _open_google_stream(self, text, settings):
+        tts, info = self._google_request(text, settings)
+
+        def iterate():
+            try:
+                yield from self._iter_google(tts)
+            except Exception as e:
+                raise TTSStreamError("Google TTS", str(e))
+
+        return info, iterate()
+
+    def _open_elevenlabs_stream(self, text, settings):
+        if not self.elevenlabs_api_key:
+            raise TTSStreamError("ElevenLabs", "ElevenLabs API 키가 설정되지 않았습니다")
+
+        url, data, info = self._elevenlabs_request(text, settings, stream=True)
+        try:
+            response = self.sessions.post("elevenlabs", url, json=data, headers=self.elevenlabs_headers, stream=True)
+        except Exception as e:
+            raise TTSStreamError("ElevenLabs", str(e), **self._failure_details(exception=e))
+        if response.status_code != 200:
+            error_msg = self._elevenlabs_error(response)
+            response.close()
+            raise TTSStreamError("ElevenLabs", error_msg, **self._failure_details(response))
+        return info, self._iter_response("ElevenLabs", response)
+
+    def _open_openai_stream(self, text, settings):
+        if not self.openai_api_key:
+            raise TTSStreamError("OpenAI TTS", "OpenAI API 키가 설정되지 않았습니다")
+
+        url, data, info = self._openai_request(text, settings)
+        try:
+            response = self.sessions.post("openai", url, json=data, headers=self.openai_headers, stream=True)
+        except Exception as e:
+            raise TTSStreamError("OpenAI TTS", f"연결 오류: {str(e)}", **self._failure_details(exception=e))
+        if response.status_code != 200:
+            error_msg = self._openai_error(response)
+            response.close()
+            raise TTSStreamError("OpenAI TTS", error_msg, **self._failure_details(response))
+        return info, self._iter_response("OpenAI TTS", response)
+
+    def open_stream(self, provider, text, settings):
+        """스트리밍 생성 시작: 응답 상태까지 확인한 뒤 (정보, 오디오 조각 반복자) 반환
+
+        첫 조각은 서비스 스트리밍 응답을 그대로 흘려보내고, 긴 텍스트의 나머지 조각은
+        그동안 스레드 풀에서 미리 생성해 두었다가 순서대로 이어서 내보낸다.
+        """
+        service = self.service_names[provider]
+        settings = self.route_model(provider, text, settings)
+        chunks = split_text(text, self.char_limits[provider])
+        if not chunks:
+            raise TTSStreamError(service, "텍스트가 비어 있습니다")
+        audio_format = settings.get('response_format', 'mp3')
+        if len(chunks) > 1 and audio_format not in CONCATENABLE_FORMATS:
+            raise TTSStreamError(service, f"{audio_format.upper()} 포맷은 긴 텍스트 생성을 지원하지 않습니다")
+
+        def prefetch(chunk):
+            cached = self.get_cached(provider, chunk, settings)
+            return cached if cached is not None else self._generate_chunk(provider, chunk, settings)
+
+        started = time.perf_counter()
+        rest = [self.executors[provider].submit(prefetch, chunk) for chunk in chunks[1:]]
+
+        cached = self.get_cached(provider, chunks[0], settings)
+        stream_metrics = {"chars": len(text), "retries": 0, "cache_hit": cached is not None}
+        if cached is not None:
+            info = {"service": cached["service"], "filename": cached["filename"]}
+            first = iter([cached["audio_data"]])
+        else:
+            calls = []
+
+            def open_first():
+                calls.append(1)
+                reset_connection_timings()
+                try:
+                    return {"success": True, "stream": self.stream_openers[provider](chunks[0], settings)}
+                except TTSStreamError as e:
+                    return dict(e.as_result(), exception=e)
+                finally:
+                    stream_metrics.update(connection_timings())
+
+            # 스트림은 응답 헤더를 받을 때까지만 스케줄러의 동시 실행 슬롯을 차지
+            opened = self.scheduler.call(provider, len(chunks[0]), open_first)
+            stream_metrics["retries"] = len(calls) - 1
+            if not opened["success"]:
+                for future in rest:
+                    future.cancel()
+                self.metrics.record(provider, dict(opened, metrics=dict(stream_metrics, total=time.perf_counter() - started)))
+                raise opened["exception"]
+            info, first = opened["stream"]
+
+        def iterate():
+            size = 0
+            success = False
+            try:
+                received = []
+                for piece in first:
+                    if size == 0:
+                        stream_metrics["ttfb"] = time.perf_counter() - started
+                    size += len(piece)
+                    received.append(piece)
+                    yield piece
+                # 끝까지 받은 첫 조각은 캐시에 저장
+                if cached is None and self.cache is not None:
+                    self.cache.put(self.cache_key(provider, chunks[0], settings), b"".join(received), dict(info))
+
+                for future in rest:
+                    result = future.result()
+                    if not result["success"]:
+                        raise TTSStreamError(service, result["error"])
+                    audio = result["audio_data"]
+                    if audio_format == "mp3":
+                        audio = mp3_frames.strip_headers(audio)
+                    size += len(audio)
+                    yield audio
+                success = True
+            finally:
+                for future in rest:
+                    future.cancel()
+                self.metrics.record(provider, {
+                    "success": success,
+                    "metrics": dict(stream_metrics, total=time.perf_counter() - started, bytes=size)
+                })
+
+        return info, iterate()
+
+    def stream(self, provider, text, settings):
+        """오디오 조각을 도착하는 대로 반환하는 제너레이터"""
+        _, chunks = self.open_stream(provider, text, settings)
+        yield from chunks
+
+
+def create_shared_store(get_config=env_config):
+    """SHARED_STORE_DIR의 공유 저장소 (빈 값이면 None: 워커별 디스크 캐시 사용)"""
+    root = get_config("SHARED_STORE_DIR", os.path.join("output", "shared"))
+    if not root:
+        return None
+    return SharedStore(
+        root,
+        max_bytes=int(float(get_config("SHARED_STORE_MB", 2048)) * 1024 * 1024),
+        ttl=float(get_config("SYNTHESIS_CACHE_TTL_HOURS", 168)) * 3600
+    )
+
+
+def create_tts_generator(get_config=env_config):
+    """설정 조회 함수로 TTSGenerator 생성 (Streamlit은 secrets, 서버는 환경변수)"""
+    pool_size = get_config("HTTP_POOL_SIZE")
+    failover_order = get_config("FAILOVER_ORDER")
+    config_prefixes = {"google": "GOOGLE_TTS", "elevenlabs": "ELEVENLABS", "openai": "OPENAI"}
+    # 서비스 주소 (비워 두면 실제 API)
+    base_urls = {provider: get_config(f"{prefix}_BASE_URL") for provider, prefix in config_prefixes.items()}
+    concurrency = {
+        provider: int(get_config(f"{prefix}_CONCURRENCY", DEFAULT_CONCURRENCY[provider]))
+        for provider, prefix in config_prefixes.items()
+    }
+    return TTSGenerator(
+        elevenlabs_api_key=get_config("ELEVENLABS_API_KEY"),
+        openai_api_key=get_config("OPENAI_API_KEY"),
+        concurrency=concurrency,
+        char_limits={
+            provider: int(get_config(f"{prefix}_CHAR_LIMIT", DEFAULT_CHAR_LIMITS[provider]))
+            for provider, prefix in config_prefixes.items()
+        },
+        chunk_retries=int(get_config("CHUNK_RETRIES", 2)),
+        stream_chunk_size=int(get_config("STREAM_CHUNK_SIZE", 4096)),
+        base_urls={provider: url.rstrip("/") for provider, url in base_urls.items() if url},
+        pool_size=int(pool_size) if pool_size else None,
+        connect_timeout=float(get_config("HTTP_CONNECT_TIMEOUT", 5.0)),
+        read_timeout=float(get_config("HTTP_READ_TIMEOUT", 60.0)),
+        prewarm=str(get_config("HTTP_PREWARM", "false")).lower() in ("1", "true", "yes"),
+        cache=SynthesisCache(
+            get_config("SYNTHESIS_CACHE_DIR", os.path.join("output", "cache")),
+            memory_max_bytes=int(float(get_config("SYNTHESIS_CACHE_MEMORY_MB", 64)) * 1024 * 1024),
+            disk_max_bytes=int(float(get_config("SYNTHESIS_CACHE_DISK_MB", 1024)) * 1024 * 1024),
+            ttl=float(get_config("SYNTHESIS_CACHE_TTL_HOURS", 168)) * 3600,
+            # 노드의 모든 워커/레플리카가 같은 합성을 한 번만 하도록 공유 저장소를 디스크 단계로 사용
+            shared=create_shared_store(get_config)
+        ),
+        # 서비스별 속도 제한 (0이면 제한 없음)
+        scheduler=ProviderScheduler(
+            {
+                provider: {
+                    "rps": float(get_config(f"{prefix}_RPS", 0)),
+                    "chars_per_min": int(get_config(f"{prefix}_CHARS_PER_MIN", 0)),
+                    "max_concurrency": concurrency[provider]
+                }
+                for provider, prefix in config_prefixes.items()
+            },
+            max_retries=int(get_config("PROVIDER_MAX_RETRIES", 3)),
+            max_backoff=float(get_config("PROVIDER_MAX_BACKOFF", 30.0))
+        ),
+        # 헤지 요청은 유료 호출을 늘리므로 기본값은 꺼짐
+        hedger=RequestHedger(
+            deadline=float(get_config("REQUEST_DEADLINE", 120.0)),
+            hedge=str(get_config("HEDGE_REQUESTS", "false")).lower() in ("1", "true", "yes"),
+            hedge_quantile=float(get_config("HEDGE_QUANTILE", 95)),
+            min_samples=int(get_config("HEDGE_MIN_SAMPLES", 20)),
+            max_workers=2 * sum(concurrency.values())
+        ),
+        health=ProviderHealth(
+            failure_threshold=int(get_config("FAILOVER_FAILURE_THRESHOLD", 3)),
+            cooldown=float(get_config("FAILOVER_COOLDOWN", 30.0))
+        ),
+        catalog=VoiceCatalog(
+            get_config("VOICE_CATALOG_PATH", os.path.join("output", "voice_catalog.json")),
+            ttl=float(get_config("VOICE_CATALOG_TTL", 3600))
+        ),
+        failover_order=[p.strip() for p in failover_order.split(",")] if failover_order else DEFAULT_FAILOVER_ORDER,
+        failover_budget=float(get_config("FAILOVER_BUDGET", 15.0)),
+        router=ModelRouter(
+            latency_targets=parse_latency_targets(get_config("MODEL_LATENCY_TARGETS", "")) or DEFAULT_LATENCY_TARGETS,
+            window=float(get_config("MODEL_ROUTER_WINDOW", 300.0)),
+            min_samples=int(get_config("MODEL_ROUTER_MIN_SAMPLES", 5)),
+            max_error_rate=float(get_config("MODEL_ROUTER_MAX_ERROR_RATE", 0.2))
+        ),
+        google_segment_concurrency=int(get_config("GOOGLE_TTS_SEGMENT_CONCURRENCY", 4))
+    )
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class VoiceCatalog:
+    """서비스별 음성/모델 목록 캐시
+
+    목록은 id로 색인해 두고, TTL이 지나면 백그라운드에서 ETag/If-Modified-Since로 재검증한다.
+    조회는 항상 지금 가진 목록(스냅샷 → 기본값 순)을 바로 돌려주므로 음성 생성을 막지 않는다.
+    """
+
+    def __init__(self, snapshot_path=None, ttl=3600.0, error_retry=60.0):
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.error_retry = error_retry
+
+        self._catalogs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-catalog")
+        self._snapshot = self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not self.snapshot_path:
+            return {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            data = {
+                name: {
+                    "items": catalog["items"],
+                    "validators": catalog["validators"],
+                    "fetched_at": catalog["fetched_wall"]
+                }
+                for name, catalog in self._catalogs.items() if catalog["fetch"] is not None and catalog["fetched_wall"]
+            }
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def register(self, name, defaults, key="id", fetch=None):
+        """목록 등록
+
+        fetch(validators)는 바뀌지 않았으면 None, 아니면 (항목 목록, {"etag", "last_modified"})을 반환한다.
+        fetch가 None이면 기본값만 쓰는 고정 목록이다.
+        """
+        snapshot = self._snapshot.get(name) if fetch is not None else None
+        items = snapshot["items"] if snapshot else list(defaults)
+        with self._lock:
+            self._catalogs[name] = {
+                "key": key,
+                "fetch": fetch,
+                "items": items,
+                "index": {item[key]: item for item in items},
+                "validators": snapshot["validators"] if snapshot else {},
+                # 스냅샷이 TTL 안이면 바로 새로 받지 않음 (벽시계 → 단조 시계 변환)
+                "fetched_at": time.monotonic() - (time.time() - snapshot["fetched_at"]) if snapshot else None,
+                "fetched_wall": snapshot["fetched_at"] if snapshot else None,
+                "refreshing": False,
+                "refreshes": 0,
+                "not_modified": 0,
+                "errors": 0
+            }
+
+    def _stale(self, catalog):
+        if catalog["fetch"] is None or catalog["refreshing"]:
+            return False
+        return catalog["fetched_at"] is None or time.monotonic() - catalog["fetched_at"] >= self.ttl
+
+    def items(self, name):
+        """현재 목록 (오래되었으면 백그라운드 갱신을 시작하고 기존 목록을 바로 반환)"""
+        with self._lock:
+            catalog = self._catalogs[name]
+            stale = self._stale(catalog)
+            if stale:
+                catalog["refreshing"] = True
+            items = catalog["items"]
+        if stale:
+            self._executor.submit(self._refresh, name)
+        return items
+
+    def lookup(self, name, item_id, default=None):
+        """id로 항목 하나 조회"""
+        with self._lock:
+            return self._catalogs[name]["index"].get(item_id, default)
+
+    def refresh(self, name):
+        """지금 바로 재검증 (호출한 스레드에서 실행)"""
+        with self._lock:
+            self._catalogs[name]["refreshing"] = True
+        self._refresh(name)
+
+    def _refresh(self, name):
+        with self._lock:
+            catalog = self._catalogs[name]
+            fetch, validators = catalog["fetch"], dict(catalog["validators"])
+        try:
+            fetched = fetch(validators)
+        except Exception:
+            with self._lock:
+                catalog["errors"] += 1
+                catalog["refreshing"] = False
+                # 실패하면 TTL 대신 error_retry 뒤에 다시 시도
+                catalog["fetched_at"] = time.monotonic() - self.ttl + self.error_retry
+            return
+
+        with self._lock:
+            catalog["refreshing"] = False
+            catalog["fetched_at"] = time.monotonic()
+            catalog["fetched_wall"] = time.time()
+            if fetched is None:
+                catalog["not_modified"] += 1
+            else:
+                items, validators = fetched
+                catalog["items"] = items
+                catalog["index"] = {item[catalog["key"]]: item for item in items}
+                catalog["validators"] = validators
+                catalog["refreshes"] += 1
+        try:
+            self._save_snapshot()
+        except OSError:
+            pass
+
+    def stats(self):
+        """목록별 항목 수, 갱신/304/오류 횟수, 마지막 확인 후 경과 시간"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "items": len(catalog["items"]),
+                    "refreshes": catalog["refreshes"],
+                    "not_modified": catalog["not_modified"],
+                    "errors": catalog["errors"],
+                    "age": now - catalog["fetched_at"] if catalog["fetched_at"] is not None else None
+                }
+                for name, catalog in self._catalogs.items() if catalog["fetch"] is not None
+            }
@@ -0,0 +1,103 @@
+"""여러 음성 파일을 ZIP 하나로 묶어 만드는 대로 내보내기
+
+파일을 조각 단위로 읽어 압축 파일 조각을 바로 돌려주므로 파일 수/크기와 관계없이 메모리 사용량이 일정하다.
+이미 압축된 음성(mp3/opus/aac/flac)은 다시 압축하지 않고 그대로 저장하고, 마지막에 manifest.json을 넣는다.
+"""
+import io
+import json
+import os
+import time
+import zipfile
+
+# 파일을 읽고 내보내는 조각 크기
+CHUNK_SIZE = 64 * 1024
+
+# 다시 압축해도 줄지 않는 형식 (그 외 wav/pcm은 deflate)
+STORED_FORMATS = {"mp3", "opus", "aac", "flac", "ogg"}
+
+
+class _StreamBuffer(io.RawIOBase):
+    """zipfile이 쓴 바이트를 모아 두었다가 꺼내 가는 버퍼 (탐색 불가 → 항목마다 데이터 디스크립터 사용)"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(name, used):
+    """같은 이름이 있으면 확장자 앞에 _2, _3... 을 붙임"""
+    base, ext = os.path.splitext(os.path.basename(name) or "audio")
+    candidate, number = f"{base}{ext}", 2
+    while candidate in used or candidate == "manifest.json":
+        candidate, number = f"{base}_{number}{ext}", number + 1
+    used.add(candidate)
+    return candidate
+
+
+def _zip_info(name, created):
+    info = zipfile.ZipInfo(name, date_time=time.localtime(created or time.time())[:6])
+    extension = os.path.splitext(name)[1].lstrip(".").lower()
+    info.compress_type = zipfile.ZIP_STORED if extension in STORED_FORMATS else zipfile.ZIP_DEFLATED
+    return info
+
+
+def iter_zip(entries, manifest=None, chunk_size=CHUNK_SIZE):
+    """ZIP 파일을 조각(bytes) 단위로 생성
+
+    entries는 {"name": 파일명, "path": 음성 파일 경로, "meta": manifest에 남길 정보, "created": 생성 시각}의
+    목록(또는 이터레이터)이다. 경로가 없거나 읽을 수 없는 항목은 manifest에 missing으로 기록한다.
+    manifest는 manifest.json에 함께 넣을 값 (files 항목은 여기서 채움)
+    """
+    buffer = _StreamBuffer()
+    used = set()
+    files = []
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for entry in entries:
+            name = _unique_name(entry["name"], used)
+            record = dict(entry.get("meta") or {}, name=name)
+            try:
+                f = open(entry["path"], "rb") if entry.get("path") else None
+            except OSError:
+                f = None
+            if f is None:
+                used.discard(name)
+                files.append(dict(record, missing=True))
+                continue
+
+            with f:
+                info = _zip_info(name, entry.get("created"))
+                # 4GB 이상이면 ZIP64 헤더가 필요하므로 크기를 미리 알려줌
+                info.file_size = os.fstat(f.fileno()).st_size
+                with archive.open(info, "w") as out:
+                    for chunk in iter(lambda: f.read(chunk_size), b""):
+                        out.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            files.append(dict(record, size=info.file_size))
+            data = buffer.drain()
+            if data:
+                yield data
+
+        archive.writestr(
+            "manifest.json",
+            json.dumps(dict(manifest or {}, files=files), ensure_ascii=False, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED
+        )
+    yield buffer.drain()